@@ -2,6 +2,7 @@
 
 提供RailwayOCR应用程序的启动、单实例检测、密码验证和主窗口管理功能
 """
+import multiprocessing
 import sys
 import time
 import traceback
@@ -179,6 +180,8 @@ def handle_incoming_connection(server):
 
 
 if __name__ == '__main__':
+    # 打包后的程序以spawn方式启动本地OCR子进程时需要
+    multiprocessing.freeze_support()
     try:
         sys.exit(main())
     except Exception as exc:
@@ -4,6 +4,8 @@ from PyInstaller.utils.hooks import collect_all
 datas = []
 binaries = []
 hiddenimports = []
+# clients包按需导入各客户端模块，打包时需要显式包含
+hiddenimports += ['clients.ali_client', 'clients.baidu_client', 'clients.local_client', 'clients.paddle_client']
 tmp_ret = collect_all('paddlex')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('paddleocr')
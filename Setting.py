@@ -186,7 +186,16 @@ class SettingWindow(QMainWindow, Ui_SettingWindow):
             if not self.validate_required_fields():
                 return
 
-            config = {
+            # 保留界面上没有的高级配置项（如流水线线程数、队列深度）
+            config = {}
+            if os.path.exists(self.config_file):
+                try:
+                    with open(self.config_file, 'r', encoding='utf-8') as f:
+                        config = json.load(f)
+                except (json.JSONDecodeError, IOError, OSError):
+                    config = {}
+
+            config.update({
                 'BAIDU_API_KEY': self.lineEdit_BAIDU_API_KEY.text(),
                 'BAIDU_SECRET_KEY': self.lineEdit_BAIDU_SECRET_KEY.text(),
                 'ALI_APPCODE': self.lineEdit_ALI_APPCODE.text(),
@@ -194,7 +203,7 @@ class SettingWindow(QMainWindow, Ui_SettingWindow):
                 'RETRY_TIMES': self.spinBox_RETRY_TIMES.value(),
                 'RE': self.lineEdit_RE.text(),
                 'MODE_INDEX': self.comboBox_mode.currentIndex()
-            }
+            })
 
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
@@ -6,8 +6,8 @@
 
 import traceback
 from PyQt6.QtCore import QThread, pyqtSignal
-from clients import AliClient, BaiduClient, LocalClient
-from clients.paddle_client import PaddleClient
+from clients import AliClient, BaiduClient
+from clients.process_pool import create_local_engine
 from utils import MODE_ALI, MODE_LOCAL, MODE_BAIDU, MODE_PADDLE, log
 
 
@@ -96,7 +96,7 @@ class ClientLoadingThread(QThread):
     def _load_paddle_client(self):
         """加载飞桨OCR客户端"""
         try:
-            self.client = PaddleClient(max_retries=1)
+            self.client = create_local_engine('paddle', self.config, max_retries=1)
             log("INFO", "飞桨OCR客户端初始化成功")
         except Exception as e:
             log("ERROR", f"飞桨OCR客户端加载失败: {str(e)}")
@@ -105,7 +105,7 @@ class ClientLoadingThread(QThread):
     def _load_local_client(self):
         """加载本地OCR客户端"""
         try:
-            self.client = LocalClient(max_retries=1)
+            self.client = create_local_engine('local', self.config, max_retries=1)
             log("INFO", "本地OCR客户端初始化成功")
         except Exception as e:
             log("ERROR", f"本地客户端加载失败: {str(e)}")
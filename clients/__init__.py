@@ -1,8 +1,20 @@
 """OCR客户端包，提供不同OCR服务的客户端实现
 
-包含阿里云、百度和本地OCR客户端的统一入口"""
-from .ali_client import AliClient
-from .baidu_client import BaiduClient
-from .local_client import LocalClient
+包含阿里云、百度和本地OCR客户端的统一入口。客户端在首次访问时才导入，
+使用云端识别或命令行运行时不必加载EasyOCR等本地模型依赖。"""
+import importlib
+
+_CLIENT_MODULES = {
+    'AliClient': '.ali_client',
+    'BaiduClient': '.baidu_client',
+    'LocalClient': '.local_client',
+}
 
 __all__ = ['AliClient', 'BaiduClient', 'LocalClient']
+
+
+def __getattr__(name):
+    module_name = _CLIENT_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
@@ -5,17 +5,15 @@ import base64
 import json
 import os
 import re
-import ssl
-import threading
 
 from typing import Optional, Union
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
 
 import requests
 
 from utils import load_config, log
-from .base_client import BaseClient
+from .base_client import (BaseClient, REQUEST_STATUS_ERROR, REQUEST_STATUS_OK,
+                          REQUEST_STATUS_THROTTLED, REQUEST_STATUS_TIMEOUT)
+from .http_session import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, get_session, preconnect
 
 
 class AliClient(BaseClient):
@@ -29,10 +27,13 @@ class AliClient(BaseClient):
         self.request_url = "https://gjbsb.market.alicloudapi.com/ocrservice/advanced"
         self.config = load_config()
         self.appcode = self.config.get("ALI_APPCODE", "")
-        self.context = ssl._create_unverified_context()
         self.pattern = re.compile(self.config.get("RE", r'.*'))
         self.client_type = 'ali'
-        self.api_lock = threading.Lock()
+        self.verify_ssl = bool(self.config.get("ALI_VERIFY_SSL", True))
+        self.session = get_session(self.client_type, self.config.get("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE),
+                                   verify=self.verify_ssl)
+        if self.appcode:
+            preconnect(self.session, self.request_url, self.config.get("HTTP_PRECONNECT", 2))
 
     def get_img(self, img_file):
         """获取图片数据，支持本地文件路径或URL
@@ -58,33 +59,73 @@ class AliClient(BaseClient):
 
         Args:
             headers: 请求头信息
-            body: 请求体数据
+            body: 已编码的JSON请求体字节
 
         Returns:
             str: API响应内容
         """
         try:
-            params = json.dumps(body).encode(encoding='UTF8')
-            req = Request(self.request_url, params, headers)
-            with self.api_lock:
-                with urlopen(req, context=self.context, timeout=30) as r:
-                    return r.read().decode("utf8")
-        except HTTPError as e:
-            error_msg = f"HTTP错误: {e.code}, 详情: {e.read().decode('utf8')}"
-            log("错误", f"识别服务请求失败: {error_msg}")
+            response = self.session.post(self.request_url, data=body, headers=headers, timeout=DEFAULT_TIMEOUT)
+        except requests.exceptions.Timeout as e:
+            error_msg = f"请求超时: {str(e)}"
+            self.set_request_status(REQUEST_STATUS_TIMEOUT)
+            log("ERROR", f"API请求失败: {error_msg}")
             return json.dumps({"error": error_msg})
-        except URLError as e:
+        except requests.exceptions.ConnectionError as e:
             error_msg = f"URL错误: {str(e)}"
+            self.set_request_status(REQUEST_STATUS_ERROR)
             log("ERROR", f"API请求失败: {error_msg}")
             return json.dumps({"error": error_msg})
         except requests.exceptions.RequestException as e:
             error_msg = f"未知错误: {str(e)}"
+            self.set_request_status(REQUEST_STATUS_ERROR)
             log("ERROR", f"API请求失败: {error_msg}")
             return json.dumps({"error": error_msg})
-        except TimeoutError as e:
-            error_msg = f"请求超时: {str(e)}"
-            log("ERROR", f"API请求失败: {error_msg}")
+
+        text = response.content.decode("utf8", errors="replace")
+        status = self.classify_response(response.status_code, text, response.headers)
+        self.set_request_status(status)
+        if status != REQUEST_STATUS_OK:
+            error_msg = f"HTTP错误: {response.status_code}, 详情: {text}"
+            log("ERROR", f"识别服务请求失败: {error_msg}")
             return json.dumps({"error": error_msg})
+        return text
+
+    def classify_response(self, status_code, text, headers=None):
+        """根据HTTP状态码和响应内容判断请求状态
+
+        Args:
+            status_code: HTTP状态码
+            text: 响应正文
+            headers: 响应头
+
+        Returns:
+            str: 请求状态常量
+        """
+        if status_code == 200:
+            return REQUEST_STATUS_OK
+        return self._classify_http_error(status_code, text, headers)
+
+    @staticmethod
+    def _classify_http_error(code, details, headers=None):
+        """根据HTTP错误判断是否为限流
+
+        阿里云API网关限流时返回429，或返回403并在错误信息中注明Throttled/Quota
+
+        Args:
+            code: HTTP状态码
+            details: 响应正文
+            headers: 响应头
+
+        Returns:
+            str: 请求状态常量
+        """
+        if code == 429:
+            return REQUEST_STATUS_THROTTLED
+        gateway_error = headers.get("X-Ca-Error-Message", "") if headers else ""
+        if code == 403 and any(key in f"{gateway_error} {details}" for key in ("Throttl", "Quota")):
+            return REQUEST_STATUS_THROTTLED
+        return REQUEST_STATUS_ERROR
 
     def extract_matches(self, texts, pattern: re.Pattern):
         """从API响应中提取匹配的文本结果
@@ -121,43 +162,64 @@ class AliClient(BaseClient):
             str: 识别结果文本，识别失败时返回None
         """
         self.validate_image_source(image_source, is_url)
-        params = None
         if not self.appcode:
             log("ERROR", "未提供AppCode, 无法调用API")
             return None
 
-        if params is None:
-            params = {
-                "prob": False,
-                "charInfo": False,
-                "rotate": False,
-                "table": False,
-                "sortPage": False,
-                "noStamp": False,
-                "figure": False,
-                "row": False,
-                "paragraph": False,
-                "oricoord": False
-            }
-
         try:
-            if is_url:
-                img_url = image_source
-                params.update({'url': img_url})
-            else:
-                img_base64 = str(base64.b64encode(image_source), 'utf-8')
-                params.update({'img': img_base64})
-
-            headers = {
-                'Authorization': f'APPCODE {self.appcode}',
-                'Content-Type': 'application/json; charset=UTF-8'
-            }
-
-            response = self.posturl(headers, params)
-            result = self.extract_matches(response, self.pattern)
-            return self.process_recognition_result(result, image_source, is_url)
+            _, headers, body = self.build_request(image_source, is_url)
+            response = self.posturl(headers, body)
+            return self.parse_response(response, image_source, is_url)
         except (ValueError, IOError, requests.exceptions.RequestException) as e:
             error_msg = f"识别过程中发生错误: {str(e)}"
             log("ERROR", error_msg)
             return None
-    
\ No newline at end of file
+
+    def build_request(self, image_source: Union[str, bytes], is_url: bool = False):
+        """构建识别请求，同步和异步引擎共用
+
+        Args:
+            image_source: 图片源，字节数据或URL
+            is_url: 是否为URL标识
+
+        Returns:
+            tuple: (请求地址, 请求头, 已编码的请求体字节)
+        """
+        params = {
+            "prob": False,
+            "charInfo": False,
+            "rotate": False,
+            "table": False,
+            "sortPage": False,
+            "noStamp": False,
+            "figure": False,
+            "row": False,
+            "paragraph": False,
+            "oricoord": False
+        }
+        if is_url:
+            params.update({'url': image_source})
+        else:
+            img_base64 = str(base64.b64encode(image_source), 'utf-8')
+            params.update({'img': img_base64})
+
+        headers = {
+            'Authorization': f'APPCODE {self.appcode}',
+            'Content-Type': 'application/json; charset=UTF-8'
+        }
+        return self.request_url, headers, json.dumps(params).encode(encoding='UTF8')
+
+    def parse_response(self, response: str, image_source: Union[str, bytes],
+                       is_url: bool = False) -> Optional[str]:
+        """从API响应中提取并处理识别结果
+
+        Args:
+            response: API响应文本
+            image_source: 图片源，用于日志
+            is_url: 是否为URL标识
+
+        Returns:
+            str: 识别结果文本，未匹配时返回None
+        """
+        result = self.extract_matches(response, self.pattern)
+        return self.process_recognition_result(result, image_source, is_url)
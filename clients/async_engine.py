@@ -0,0 +1,263 @@
+"""异步云端OCR识别引擎
+
+基于asyncio和httpx，在单个事件循环中并发执行大量阿里云/百度OCR请求，
+每个请求有独立的截止时间。并发规模受提供商配额（限速器）和自适应并发控制器约束，而不是Python线程数。
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import httpx
+
+from utils import log, log_print
+from .base_client import (REQUEST_STATUS_ERROR, REQUEST_STATUS_OK,
+                          REQUEST_STATUS_THROTTLED, REQUEST_STATUS_TIMEOUT)
+
+# 可以重试的请求状态，正常返回但未匹配的结果不会重试
+_RETRYABLE_STATUSES = (REQUEST_STATUS_THROTTLED, REQUEST_STATUS_TIMEOUT, REQUEST_STATUS_ERROR)
+
+# 可以重试的4xx状态码，其余4xx（认证失败、无权限、参数错误等）重试也不会成功
+_RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+class AsyncCloudEngine:
+    """异步云端OCR引擎
+
+    在后台线程中运行事件循环，submit()可以从任意线程调用并返回concurrent.futures.Future，
+    结果为包含 result/status/attempts/error/rate_limit_wait 的字典，rate_limit_wait为等待限速许可的总秒数。
+    同时进行的请求数超过max_in_flight时submit()阻塞，为上游提供背压。
+    """
+
+    def __init__(self, client, max_in_flight=256, request_timeout=60, max_retries=3,
+                 backoff_factor=2.0, max_backoff_time=30, rate_limiter=None, max_connections=64,
+                 concurrency_controller=None):
+        """初始化异步引擎
+
+        Args:
+            client: AliClient或BaiduClient实例，提供build_request/classify_response/parse_response
+            max_in_flight: 同时进行的最大请求数
+            request_timeout: 每个文件的截止时间（秒），包含重试与退避
+            max_retries: 最大尝试次数
+            backoff_factor: 重试退避系数
+            max_backoff_time: 单次退避的最长时间（秒）
+            rate_limiter: 可选的TokenBucketRateLimiter，按提供商共享
+            max_connections: HTTP连接池大小
+            concurrency_controller: 可选的AdaptiveConcurrencyController，控制同时发出的HTTP请求数
+        """
+        self.client = client
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.request_timeout = float(request_timeout)
+        self.max_retries = max(1, int(max_retries))
+        self.backoff_factor = backoff_factor
+        self.max_backoff_time = max_backoff_time
+        self.rate_limiter = rate_limiter
+        self.max_connections = max(1, int(max_connections))
+        self.concurrency_controller = concurrency_controller
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._loop = None
+        self._http = None
+        self._thread = None
+        self._ready = threading.Event()
+        # 已提交但尚未完成的请求，包括还没有开始执行的请求
+        self._futures = set()
+        self._futures_lock = threading.Lock()
+        self._cancelled = False
+        self._controller_changed = None
+
+    def start(self):
+        """启动事件循环线程并创建HTTP连接池
+
+        Raises:
+            RuntimeError: 缺少阿里云AppCode或无法获取百度访问令牌，此时每个请求都会失败
+        """
+        if self._thread is not None:
+            return
+        if hasattr(self.client, 'appcode') and not self.client.appcode:
+            raise RuntimeError("未提供AppCode, 无法调用API")
+        if hasattr(self.client, 'get_access_token') and not self.client.get_access_token():
+            raise RuntimeError("百度OCR认证失败，请检查API密钥")
+
+        self._thread = threading.Thread(target=self._run_loop, name="AsyncCloudEngine", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        log_print(f"[异步引擎] {self.client.client_type} 已启动，最大并发请求数: {self.max_in_flight}")
+
+    def _run_loop(self):
+        """事件循环线程主函数"""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        # 与同步客户端使用相同的证书校验设置
+        self._http = httpx.AsyncClient(limits=limits, verify=getattr(self.client, 'verify_ssl', True),
+                                       timeout=self.request_timeout)
+        self._controller_changed = asyncio.Condition()
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._http.aclose())
+            self._loop.close()
+
+    def submit(self, image_source: bytes, is_cancelled=None) -> concurrent.futures.Future:
+        """提交一张图像进行识别
+
+        Args:
+            image_source: 图像字节数据
+            is_cancelled: 可选的无参回调，等待并发名额期间返回True时放弃提交
+
+        Returns:
+            concurrent.futures.Future: 识别完成后的结果字典
+
+        Raises:
+            RuntimeError: 引擎未启动、已调用cancel_pending或等待期间被取消
+        """
+        if self._loop is None:
+            raise RuntimeError("异步引擎尚未启动")
+        while not self._slots.acquire(timeout=0.5):
+            if self._cancelled or (is_cancelled is not None and is_cancelled()):
+                raise RuntimeError("等待异步识别名额时已取消")
+
+        with self._futures_lock:
+            if self._cancelled:
+                self._slots.release()
+                raise RuntimeError("异步引擎已取消所有请求")
+            future = asyncio.run_coroutine_threadsafe(self._recognize(image_source), self._loop)
+            self._futures.add(future)
+        future.add_done_callback(self._on_future_done)
+        return future
+
+    def _on_future_done(self, future):
+        with self._futures_lock:
+            self._futures.discard(future)
+        self._slots.release()
+
+    def cancel_pending(self):
+        """取消所有尚未完成的识别请求，包括已提交但还没有开始执行的请求，之后的提交会被拒绝"""
+        with self._futures_lock:
+            self._cancelled = True
+            futures = list(self._futures)
+        # 取消concurrent.futures.Future会在事件循环中取消对应的任务，未开始的任务不会再执行
+        for future in futures:
+            future.cancel()
+
+    def close(self):
+        """停止事件循环并关闭连接池"""
+        if self._loop is None:
+            return
+        self.cancel_pending()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self._thread = None
+        self._loop = None
+
+    async def _recognize(self, image_source: bytes) -> dict:
+        """识别单张图像，包含限速、重试和截止时间控制"""
+        deadline = time.monotonic() + self.request_timeout
+        outcome = {'result': None, 'status': REQUEST_STATUS_ERROR, 'attempts': 0, 'error': None,
+                   'rate_limit_wait': 0.0}
+        try:
+            url, headers, body = self.client.build_request(image_source)
+            for attempt in range(self.max_retries):
+                if attempt > 0:
+                    backoff = min(self.backoff_factor ** attempt, self.max_backoff_time)
+                    await asyncio.sleep(backoff)
+                if deadline <= time.monotonic():
+                    outcome.update(status=REQUEST_STATUS_TIMEOUT, error='请求超过截止时间')
+                    break
+
+                status, text, retryable = await self._attempt(url, headers, body, deadline, outcome)
+                if text is None:
+                    outcome.update(status=REQUEST_STATUS_TIMEOUT, error='请求超过截止时间')
+                    break
+                outcome['attempts'] = attempt + 1
+                outcome['status'] = status
+                if status == REQUEST_STATUS_OK:
+                    outcome['result'] = self.client.parse_response(text, image_source)
+                    outcome['error'] = None if outcome['result'] else '未识别到有效结果'
+                    break
+                outcome['error'] = text
+                if not retryable or status not in _RETRYABLE_STATUSES:
+                    break
+        except (ValueError, TypeError) as e:
+            outcome['error'] = f"构建识别请求失败: {str(e)}"
+            log("ERROR", outcome['error'])
+        return outcome
+
+    async def _attempt(self, url, headers, body, deadline, outcome):
+        """在并发名额和限速许可内发送一次请求，并将耗时和限流情况反馈给并发控制器
+
+        先占用并发名额再预约限速许可，只有即将发出的请求才会预约许可；
+        请求被取消或在截止时间前没能发出时归还许可，也不向控制器反馈延迟样本。
+
+        Args:
+            outcome: 本图像的结果字典，等待许可的时间累加到rate_limit_wait
+
+        Returns:
+            tuple: (请求状态, 响应文本或错误信息, 是否可以重试)，截止时间前未能发出请求时响应为None
+        """
+        controller = self.concurrency_controller
+        if controller is not None:
+            # 名额只在本事件循环中的请求结束时释放，释放后唤醒等待的请求即可
+            async with self._controller_changed:
+                await self._controller_changed.wait_for(controller.try_acquire)
+
+        status = None
+        start_time = None
+        permit = False
+        try:
+            if self.rate_limiter is not None:
+                permit = True
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    outcome['rate_limit_wait'] += wait
+                    await asyncio.sleep(wait)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return REQUEST_STATUS_TIMEOUT, None, False
+            permit = False
+            start_time = time.monotonic()
+            status, text, retryable = await self._post(url, headers, body, remaining)
+            return status, text, retryable
+        finally:
+            if permit:
+                # 已预约的许可没有用于请求，归还给限速器
+                self.rate_limiter.refund()
+            if controller is not None:
+                if status is None:
+                    controller.discard()
+                else:
+                    controller.release(time.monotonic() - start_time,
+                                       throttled=status == REQUEST_STATUS_THROTTLED,
+                                       timed_out=status == REQUEST_STATUS_TIMEOUT)
+                async with self._controller_changed:
+                    self._controller_changed.notify_all()
+
+    async def _post(self, url, headers, body, timeout):
+        """发送单次HTTP请求
+
+        Returns:
+            tuple: (请求状态, 响应文本或错误信息, 是否可以重试)
+        """
+        try:
+            response = await asyncio.wait_for(
+                self._http.post(url, content=body, headers=headers), timeout=timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            return REQUEST_STATUS_TIMEOUT, f"请求超时: {str(e)}", True
+        except httpx.HTTPError as e:
+            return REQUEST_STATUS_ERROR, f"网络请求异常: {str(e)}", True
+
+        text = response.text
+        code = response.status_code
+        status = self.client.classify_response(code, text, response.headers)
+        if status == REQUEST_STATUS_OK:
+            return status, text, True
+        error = f"HTTP错误: {code}, 详情: {text[:200]}"
+        if status == REQUEST_STATUS_ERROR and 400 <= code < 500 and code not in _RETRYABLE_CLIENT_ERRORS:
+            # 认证失败、无权限等客户端错误直接失败，不占用重试次数和限速许可
+            log("ERROR", f"识别请求被拒绝，不再重试: {error}")
+            return status, error, False
+        return status, error, True
+
@@ -5,17 +5,19 @@
 import base64
 import json
 import re
-import ssl
 import threading
 import urllib.parse
 from typing import Optional, Union
-from urllib.error import HTTPError
-from urllib.request import Request, urlopen
 
 import requests
 
 from utils import load_config, log, log_print
-from .base_client import BaseClient
+from .base_client import (BaseClient, REQUEST_STATUS_ERROR, REQUEST_STATUS_OK,
+                          REQUEST_STATUS_THROTTLED, REQUEST_STATUS_TIMEOUT)
+from .http_session import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, get_session, preconnect
+
+# 百度OCR返回的QPS超限错误码
+BAIDU_QPS_LIMIT_ERROR_CODES = (18,)
 
 
 class BaiduClient(BaseClient):
@@ -32,7 +34,12 @@ class BaiduClient(BaseClient):
         self.api_key = self.config.get("BAIDU_API_KEY", "")
         self.secret_key = self.config.get("BAIDU_SECRET_KEY", "")
         self.access_token = ""
-        self.context = ssl._create_unverified_context()
+        self.pattern = re.compile(self.config.get("RE", r'.*'))
+        self.verify_ssl = bool(self.config.get("BAIDU_VERIFY_SSL", True))
+        self.session = get_session(self.client_type, self.config.get("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE),
+                                   verify=self.verify_ssl)
+        if self.api_key and self.secret_key:
+            preconnect(self.session, self.request_url, self.config.get("HTTP_PRECONNECT", 2))
 
     def get_access_token(self):
         """获取百度OCR访问令牌
@@ -50,8 +57,11 @@ class BaiduClient(BaseClient):
                 "client_secret": self.secret_key
             }
             try:
+                # 令牌只需获取一次，其他线程在锁内复查后直接复用
                 with self.api_lock:
-                    response = requests.post(token_url, params=params, timeout=10)
+                    if self.access_token:
+                        return self.access_token
+                    response = self.session.post(token_url, params=params, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     self.access_token = data.get("access_token", "")
@@ -69,18 +79,67 @@ class BaiduClient(BaseClient):
         
         Args:
             headers: 请求头信息
-            body: 请求体内容
+            body: 已编码的表单请求体字节
             
         Returns:
             str: API响应内容
         """
         try:
-            req_url = f"{self.request_url}?access_token={self.access_token}"
-            req = Request(req_url, body.encode("utf-8"), headers)
-            with urlopen(req, context=self.context) as r:
-                return r.read().decode("utf8")
-        except HTTPError as e:
-            return json.dumps({"error": f"HTTP错误: {e.code}", "details": e.read().decode("utf8")})
+            response = self.session.post(self._request_endpoint(), data=body, headers=headers,
+                                         timeout=DEFAULT_TIMEOUT)
+        except requests.exceptions.Timeout:
+            self.set_request_status(REQUEST_STATUS_TIMEOUT)
+            raise
+        except requests.exceptions.RequestException:
+            self.set_request_status(REQUEST_STATUS_ERROR)
+            raise
+
+        text = response.content.decode("utf8", errors="replace")
+        self.set_request_status(self.classify_response(response.status_code, text))
+        if response.status_code != 200:
+            return json.dumps({"error": f"HTTP错误: {response.status_code}", "details": text})
+        return text
+
+    def _request_endpoint(self):
+        """返回附带访问令牌的识别接口地址"""
+        return f"{self.request_url}?access_token={self.access_token}"
+
+    def classify_response(self, status_code, text, headers=None):
+        """根据HTTP状态码和响应内容判断请求状态
+
+        Args:
+            status_code: HTTP状态码
+            text: 响应正文
+            headers: 响应头（百度接口未使用）
+
+        Returns:
+            str: 请求状态常量
+        """
+        if status_code == 429:
+            return REQUEST_STATUS_THROTTLED
+        if status_code != 200:
+            return REQUEST_STATUS_ERROR
+        return self._classify_response(text)
+
+    @staticmethod
+    def _classify_response(response):
+        """根据响应中的error_code判断请求状态
+
+        Args:
+            response: API响应文本
+
+        Returns:
+            str: 请求状态常量
+        """
+        if '"error_code"' not in response:
+            return REQUEST_STATUS_OK
+        try:
+            error_code = json.loads(response).get("error_code")
+        except (json.JSONDecodeError, AttributeError):
+            return REQUEST_STATUS_ERROR
+        if error_code in BAIDU_QPS_LIMIT_ERROR_CODES:
+            return REQUEST_STATUS_THROTTLED
+        return REQUEST_STATUS_ERROR
 
     def extract_matches(self, texts, pattern: re.Pattern):
         """从API响应中提取匹配结果
@@ -124,23 +183,49 @@ class BaiduClient(BaseClient):
             log("ERROR", "无法获取访问令牌，请检查网络连接或API密钥")
             return None
 
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-
         try:
-            if is_url:
-                response = requests.get(image_source, timeout=10)
-                image_data = response.content
-                img_base64 = str(base64.b64encode(image_data), 'utf-8')
-            else:
-                img_base64 = str(base64.b64encode(image_source), 'utf-8')
-
-            body = urllib.parse.urlencode({"image": img_base64})
+            _, headers, body = self.build_request(image_source, is_url)
             response = self.posturl(headers, body)
-            pattern = re.compile(self.config.get("RE", r'.*'))
-            result = self.extract_matches(response, pattern)
-            return self.process_recognition_result(result, image_source, is_url)
+            return self.parse_response(response, image_source, is_url)
         except (requests.exceptions.RequestException, IOError, ValueError) as e:
             log("ERROR", f"图像识别请求失败: {str(e)}")
             return None
+
+    def build_request(self, image_source: Union[str, bytes], is_url: bool = False):
+        """构建识别请求，同步和异步引擎共用
+
+        调用前需要已获取访问令牌；URL图像源会先下载图像内容。
+
+        Args:
+            image_source: 图像源，字节数据或URL
+            is_url: 是否为URL图像源
+
+        Returns:
+            tuple: (请求地址, 请求头, 已编码的请求体字节)
+        """
+        if is_url:
+            response = requests.get(image_source, timeout=10)
+            img_base64 = str(base64.b64encode(response.content), 'utf-8')
+        else:
+            img_base64 = str(base64.b64encode(image_source), 'utf-8')
+
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        body = urllib.parse.urlencode({"image": img_base64}).encode("utf-8")
+        return self._request_endpoint(), headers, body
+
+    def parse_response(self, response: str, image_source: Union[str, bytes],
+                       is_url: bool = False) -> Optional[str]:
+        """从API响应中提取并处理识别结果
+
+        Args:
+            response: API响应文本
+            image_source: 图像源，用于日志
+            is_url: 是否为URL图像源
+
+        Returns:
+            Optional[str]: 识别到的文本内容，未匹配时返回None
+        """
+        result = self.extract_matches(response, self.pattern)
+        return self.process_recognition_result(result, image_source, is_url)
@@ -8,10 +8,19 @@ import base64
 import gc
 import os
 import re
+import threading
 import time
 
 from utils import log, log_print
 
+# 最近一次请求的状态，供并发控制器判断是否需要回退
+REQUEST_STATUS_OK = "ok"
+REQUEST_STATUS_THROTTLED = "throttled"
+REQUEST_STATUS_TIMEOUT = "timeout"
+REQUEST_STATUS_ERROR = "error"
+# 图像数据本身无法解码，重试或更换时机都不会改变结果
+REQUEST_STATUS_UNREADABLE = "unreadable"
+
 
 class BaseClient(ABC):
     """OCR客户端抽象基类
@@ -86,6 +95,24 @@ class BaseClient(ABC):
             return "binary_image"
         return "unknown_image"
 
+    def set_request_status(self, status: str):
+        """记录当前线程最近一次请求的状态
+
+        参数:
+            status: REQUEST_STATUS_* 常量之一
+        """
+        state = self.__dict__.setdefault('_request_state', threading.local())
+        state.status = status
+
+    def get_request_status(self) -> str:
+        """获取当前线程最近一次请求的状态
+
+        返回:
+            str: REQUEST_STATUS_* 常量之一，未记录时视为成功
+        """
+        state = self.__dict__.get('_request_state')
+        return getattr(state, 'status', REQUEST_STATUS_OK)
+
     def __str__(self) -> str:
         return f"{self.client_type}_client"
 
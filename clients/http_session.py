@@ -0,0 +1,77 @@
+"""HTTP连接池模块
+
+为云端OCR客户端提供按服务商共享的keep-alive会话。连接在请求之间复用，
+每张图像只需要一次请求往返，不再重复TCP/TLS握手；网络请求本身不持有任何全局锁。
+"""
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import log_print
+
+# 默认请求超时（秒）
+DEFAULT_TIMEOUT = 30
+
+# 默认连接池大小，需不小于云端客户端的最大并发数
+DEFAULT_POOL_SIZE = 32
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(provider: str, pool_size: int = DEFAULT_POOL_SIZE, verify: bool = True) -> requests.Session:
+    """获取服务商共享的HTTP会话
+
+    requests.Session本身可以被多个线程同时使用，连接池满时新请求会临时建立连接。
+
+    Args:
+        provider: 服务商标识，例如 "ali"、"baidu"
+        pool_size: 每个主机保持的最大连接数
+        verify: 是否校验服务器证书，只有配置中明确关闭（ALI_VERIFY_SSL/BAIDU_VERIFY_SSL）时才为False
+
+    Returns:
+        requests.Session: 带连接池的会话
+    """
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, int(pool_size)), max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        session.verify = bool(verify)
+        return session
+
+
+def preconnect(session: requests.Session, url: str, connections: int = 1):
+    """在后台预先建立连接，完成TCP/TLS握手
+
+    发送不带凭据的HEAD请求，响应状态无关紧要，连接会留在池中供后续请求复用。
+
+    Args:
+        session: get_session返回的会话
+        url: 服务接口地址
+        connections: 预建立的连接数
+    """
+    parts = urlsplit(url)
+    base_url = f"{parts.scheme}://{parts.netloc}/"
+
+    def _connect():
+        try:
+            session.head(base_url, timeout=DEFAULT_TIMEOUT).close()
+        except requests.exceptions.RequestException as e:
+            log_print(f"[连接池] 预连接 {parts.netloc} 失败: {str(e)}")
+
+    for _ in range(max(0, int(connections))):
+        threading.Thread(target=_connect, name="HttpPreconnect", daemon=True).start()
+
+
+def close_sessions():
+    """关闭所有共享会话及其连接"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
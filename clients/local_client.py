@@ -3,16 +3,17 @@ import gc
 import re
 import threading
 import time
-from io import BytesIO
-from typing import Optional, Union
+from typing import List, Optional, Tuple, Union
 
 import easyocr
 import numpy as np
 import requests
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image
 
 from utils import load_config, log, log_print
-from .base_client import BaseClient
+from .base_client import BaseClient, REQUEST_STATUS_ERROR, REQUEST_STATUS_OK, REQUEST_STATUS_UNREADABLE
+from .image_decode import open_image, resolve_decode_size
+from .preprocessing import PREPROCESS_VERSION, preprocess_image
 
 
 class LocalClient(BaseClient):
@@ -31,6 +32,9 @@ class LocalClient(BaseClient):
         self._is_cleaning = False  # 初始化清理状态标志
         self.recognition_attempts = self.config.get("RECOGNITION_ATTEMPTS", 2)
         self.max_threads = 1
+        # JPEG按预处理尺寸缩小解码；GPU模式不缩小图像，按原始分辨率解码
+        self.decode_size = resolve_decode_size(self.config, gpu)
+        self.preprocess_version = PREPROCESS_VERSION
         self._initialize_reader()
 
     def _initialize_reader(self):
@@ -86,63 +90,22 @@ class LocalClient(BaseClient):
         return img_file
 
     def optimized_preprocess_from_image(self, image: Image.Image, filename: str,
-                                       max_size=800, enhance_attempt=0):
+                                        max_size=800, enhance_attempt=0):
         """优化图像预处理
-        
-        对输入图像进行尺寸调整、格式转换和增强处理，
-        提高OCR识别准确率。
-        
+
+        对输入图像进行尺寸调整、灰度化和增强处理，提高OCR识别准确率，
+        具体处理见clients.preprocessing.preprocess_image。GPU模式不缩小图像。
+
         参数:
-            image: PIL图像对象
+            image: PIL图像对象，不会被修改
             filename: 图像文件名用于日志记录
             max_size: 最大尺寸限制
             enhance_attempt: 增强尝试次数，控制处理强度
-            
+
         返回:
             numpy数组格式的预处理图像或None
         """
-        try:
-            # 获取图像尺寸但不存储未使用的变量
-            if not self.gpu and max(image.size) > max_size:
-                scale = max_size / max(image.size)
-                new_size = (int(image.size[0] * scale), int(image.size[1] * scale))
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-
-            if image.mode not in ['L', 'RGB', 'RGBA']:
-                log("WARNING", "不支持的图像格式，已自动转换")
-                log_print(f"[本地预处理] 图像模式转换: {image.mode}→RGB (文件: {filename})")
-                image = image.convert('RGB')
-
-            if enhance_attempt == 0:
-                gray_image = image.convert('L')
-                enhancer = ImageEnhance.Contrast(gray_image)
-                gray_image = enhancer.enhance(1.2)
-            elif enhance_attempt == 1:
-                gray_image = image.convert('L')
-                enhancer = ImageEnhance.Contrast(gray_image)
-                gray_image = enhancer.enhance(1.8)
-                gray_image = gray_image.filter(ImageFilter.SHARPEN)
-            elif enhance_attempt == 2:
-                gray_image = image.convert('L')
-                threshold = 128
-                gray_image = gray_image.point(lambda p: p > threshold and 255)
-
-            np_image = np.array(gray_image)
-
-            min_val = np.min(np_image)
-            max_val = np.max(np_image)
-            if max_val > min_val:
-                np_image = ((np_image - min_val) / (max_val - min_val) * 255).astype(np.uint8)
-
-            return np_image
-        except (IOError, ValueError, TypeError) as e:
-            error_msg = f"图像预处理错误: {str(e)}"
-            log("ERROR", error_msg)
-            log_print(f"[ERROR] {error_msg}")
-            log("ERROR", f"图像预处理失败: {filename}")
-            return None
-
-
+        return preprocess_image(image, filename, max_size=max_size, enhance_attempt=enhance_attempt, resize=not self.gpu)
 
     def _load_image(self, image_source, is_url, filename):
         """加载图像并返回PIL图像对象"""
@@ -151,15 +114,17 @@ class LocalClient(BaseClient):
                 response = requests.get(image_source, timeout=10)
                 response.raise_for_status()
                 img_data = response.content
-                return Image.open(BytesIO(img_data))
+                return open_image(img_data, self.decode_size)
             except requests.exceptions.RequestException as e:
+                self.set_request_status(REQUEST_STATUS_ERROR)
                 log("ERROR", f"图像下载失败: {str(e)}")
                 log_print(f"[本地OCR] URL下载异常: {str(e)} (URL: {image_source[:50]}...)")
                 return None
         else:
             try:
-                return Image.open(BytesIO(image_source))
+                return open_image(image_source, self.decode_size)
             except (IOError, OSError) as e:
+                self.set_request_status(REQUEST_STATUS_UNREADABLE)
                 log("ERROR", f"无法打开图像文件: {str(e)}")
                 log_print(f"[ERROR] 文件不是有效的图像格式或已损坏: {filename}")
                 return None
@@ -169,9 +134,7 @@ class LocalClient(BaseClient):
             log("ERROR", "图像源不能为空")
             return None
 
-        start_time = time.time()
         filename = self.get_image_filename(image_source, is_url)
-        processed_image = None
         original_image = None
 
         # 参数校验
@@ -185,72 +148,7 @@ class LocalClient(BaseClient):
             original_image = self._load_image(image_source, is_url, filename)
             if original_image is None:
                 return None
-
-            for attempt in range(self.recognition_attempts):
-                try:
-                    max_size = 300 if attempt == 0 else 400
-                    processed_image = self.optimized_preprocess_from_image(
-                        original_image.copy(),
-                        filename,
-                        max_size=max_size,
-                        enhance_attempt=attempt
-                    )
-
-                    if processed_image is not None:
-            
-
-                        # 双重检查锁定模式
-                        if self.reader is None:
-                            log_print("[本地OCR] 阅读器未就绪，触发重新初始化...")
-                            self._initialize_reader()
-
-                            if self.reader is None:
-                                log_print("[ERROR] OCR阅读器初始化失败，无法继续识别")
-                                continue
-
-                        with self._reader_lock:
-                            if self.reader is None:
-                                log_print("[ERROR] OCR阅读器在锁定期间变为None，无法继续识别")
-                                continue
-
-                            try:
-                                if attempt == 0:
-                                    result = self.reader.readtext(
-                                        processed_image,
-                                        detail=0,
-                                        contrast_ths=0.1,
-                                        adjust_contrast=0.5
-                                    )
-                                else:
-                                    result = self.reader.readtext(
-                                        processed_image,
-                                        detail=0,
-                                        contrast_ths=0.05,
-                                        adjust_contrast=0.7,
-                                        text_threshold=0.7
-                                    )
-                            except (RuntimeError, ValueError, TypeError) as e:
-                                error_type = type(e).__name__
-                                error_msg = f"OCR识别异常 ({error_type}): {str(e)}"
-                                if super().handle_ocr_error(error_msg, attempt, self.max_retries):
-                                    continue
-                                return None
-
-                        matched_result = super().extract_matches(result, self.pattern)
-
-                        if matched_result:
-                            _ = time.time() - start_time  # 处理时间，用于调试
-                            return matched_result
-
-                except (RuntimeError, ValueError) as e:
-                    error_type = type(e).__name__
-                    error_msg = f"OCR识别异常 (尝试 {attempt + 1}, {error_type}): {str(e)}"
-                    super().handle_general_exception(error_msg, error_type)
-                    continue
-                finally:
-                    # 使用基类方法清理资源
-                    super().cleanup_resources(locals(), ['processed_image', 'enhanced_img', 'gray_img', 'thresh_img'])
-            return None
+            return self._recognize_image(original_image, filename)
 
         except (RuntimeError, ValueError, TypeError) as e:
             error_msg = f"识别过程中发生意外错误: {str(e)}"
@@ -262,12 +160,180 @@ class LocalClient(BaseClient):
                 if original_image is not None:
                     original_image.close()
                     del original_image
-                if 'processed_image' in locals() and processed_image is not None:
-                    del processed_image
                 gc.collect()
             except (TypeError, AttributeError, OSError) as e:
                 log_print(f"[WARNING] 图像资源释放失败: {str(e)}")
 
+    def _recognize_image(self, original_image: Image.Image, filename: str, first_attempt: int = 0) -> Optional[str]:
+        """按增强尝试次数逐次预处理并识别已加载的图像
+
+        参数:
+            original_image: PIL图像对象
+            filename: 图像文件名用于日志记录
+            first_attempt: 起始的增强尝试序号，批量识别已完成第一轮时从1开始
+
+        返回:
+            匹配的识别结果或None
+        """
+        processed_image = None
+        for attempt in range(first_attempt, self.recognition_attempts):
+            try:
+                max_size = 300 if attempt == 0 else 400
+                processed_image = self.optimized_preprocess_from_image(
+                    original_image,
+                    filename,
+                    max_size=max_size,
+                    enhance_attempt=attempt
+                )
+
+                if processed_image is not None:
+
+                    # 双重检查锁定模式
+                    if self.reader is None:
+                        log_print("[本地OCR] 阅读器未就绪，触发重新初始化...")
+                        self._initialize_reader()
+
+                        if self.reader is None:
+                            log_print("[ERROR] OCR阅读器初始化失败，无法继续识别")
+                            continue
+
+                    with self._reader_lock:
+                        if self.reader is None:
+                            log_print("[ERROR] OCR阅读器在锁定期间变为None，无法继续识别")
+                            continue
+
+                        try:
+                            if attempt == 0:
+                                result = self.reader.readtext(
+                                    processed_image,
+                                    detail=0,
+                                    contrast_ths=0.1,
+                                    adjust_contrast=0.5
+                                )
+                            else:
+                                result = self.reader.readtext(
+                                    processed_image,
+                                    detail=0,
+                                    contrast_ths=0.05,
+                                    adjust_contrast=0.7,
+                                    text_threshold=0.7
+                                )
+                        except (RuntimeError, ValueError, TypeError) as e:
+                            error_type = type(e).__name__
+                            error_msg = f"OCR识别异常 ({error_type}): {str(e)}"
+                            if super().handle_ocr_error(error_msg, attempt, self.max_retries):
+                                continue
+                            return None
+
+                    matched_result = super().extract_matches(result, self.pattern)
+
+                    if matched_result:
+                        return matched_result
+
+            except (RuntimeError, ValueError) as e:
+                error_type = type(e).__name__
+                error_msg = f"OCR识别异常 (尝试 {attempt + 1}, {error_type}): {str(e)}"
+                super().handle_general_exception(error_msg, error_type)
+                continue
+            finally:
+                # 使用基类方法清理资源
+                super().cleanup_resources(locals(), ['processed_image', 'enhanced_img', 'gray_img', 'thresh_img'])
+        return None
+
+    def recognize_batch(self, image_sources: List[bytes]) -> List[Tuple[Optional[str], str]]:
+        """批量识别多张图像
+
+        第一轮预处理后的图像补齐到相同尺寸，通过EasyOCR的readtext_batched一次完成检测和识别，
+        省去逐张调用的模型调度开销；第一轮未匹配的图像再按单张流程继续后续的增强尝试。
+
+        参数:
+            image_sources: 图像字节数据列表
+
+        返回:
+            与输入顺序一致的 (识别结果, 请求状态) 列表，未识别的位置结果为None；
+            状态按图像分别记录，一张图像无法解码不影响同批其他图像
+        """
+        results = [None] * len(image_sources)
+        statuses = [REQUEST_STATUS_OK] * len(image_sources)
+        images = [None] * len(image_sources)
+        filename = self.get_image_filename(b"", False)
+        try:
+            processed = []
+            for index, image_source in enumerate(image_sources):
+                if not isinstance(image_source, bytes):
+                    log("ERROR", "参数校验失败: 非URL图像源必须是字节类型")
+                    statuses[index] = REQUEST_STATUS_ERROR
+                    continue
+                self.set_request_status(REQUEST_STATUS_OK)
+                images[index] = self._load_image(image_source, False, filename)
+                if images[index] is None:
+                    statuses[index] = self.get_request_status()
+                    continue
+                np_image = self.optimized_preprocess_from_image(
+                    images[index], filename, max_size=300, enhance_attempt=0)
+                if np_image is not None:
+                    processed.append((index, np_image))
+
+            batch_texts = self._readtext_batched([np_image for _, np_image in processed]) if processed else None
+            batched = set()
+            if batch_texts is not None:
+                for (index, _), texts in zip(processed, batch_texts):
+                    batched.add(index)
+                    results[index] = super().extract_matches(texts, self.pattern)
+
+            for index, image in enumerate(images):
+                if image is None or results[index] is not None:
+                    continue
+                try:
+                    results[index] = self._recognize_image(
+                        image, filename, first_attempt=1 if index in batched else 0)
+                except (RuntimeError, ValueError, TypeError) as e:
+                    log("ERROR", f"识别过程中发生意外错误: {str(e)}")
+                    statuses[index] = REQUEST_STATUS_ERROR
+            return list(zip(results, statuses))
+        finally:
+            for image in images:
+                if image is not None:
+                    image.close()
+            gc.collect()
+
+    def _readtext_batched(self, np_images):
+        """以相同尺寸批量调用EasyOCR
+
+        readtext_batched要求同一批图像尺寸一致，较小的图像按边缘像素补齐到批内最大尺寸，
+        不做缩放，避免改变字符的宽高比。
+
+        参数:
+            np_images: 第一轮预处理后的灰度numpy数组列表
+
+        返回:
+            每张图像的识别文本列表；批量接口不可用或出错时返回None，由调用方逐张识别
+        """
+        height = max(img.shape[0] for img in np_images)
+        width = max(img.shape[1] for img in np_images)
+        padded = [
+            np.pad(img, ((0, height - img.shape[0]), (0, width - img.shape[1])), mode='edge')
+            for img in np_images
+        ]
+
+        if self.reader is None:
+            self._initialize_reader()
+        with self._reader_lock:
+            if self.reader is None:
+                log_print("[ERROR] OCR阅读器初始化失败，无法批量识别")
+                return None
+            try:
+                return self.reader.readtext_batched(
+                    padded,
+                    detail=0,
+                    batch_size=len(padded),
+                    contrast_ths=0.1,
+                    adjust_contrast=0.5
+                )
+            except (AttributeError, RuntimeError, ValueError, TypeError) as e:
+                log_print(f"[本地OCR] 批量识别失败，改为逐张识别: {type(e).__name__}: {str(e)}")
+                return None
+
     def validate_image_source(self, image_source, is_url):
         """验证图像源格式
         
@@ -3,16 +3,16 @@ import gc
 import re
 import threading
 import time
-from io import BytesIO
 from typing import Optional, Union
 
 from paddleocr import PaddleOCR
-import numpy as np
 import requests
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image
 
 from utils import load_config, log, log_print
-from .base_client import BaseClient
+from .base_client import BaseClient, REQUEST_STATUS_ERROR, REQUEST_STATUS_UNREADABLE
+from .image_decode import open_image, resolve_decode_size
+from .preprocessing import PREPROCESS_VERSION, preprocess_image
 
 
 class PaddleClient(BaseClient):
@@ -31,6 +31,9 @@ class PaddleClient(BaseClient):
         self._is_cleaning = False  # 初始化清理状态标志
         self.recognition_attempts = self.config.get("RECOGNITION_ATTEMPTS", 2)
         self.max_threads = 1
+        # JPEG按预处理尺寸缩小解码
+        self.decode_size = resolve_decode_size(self.config)
+        self.preprocess_version = PREPROCESS_VERSION
         self._initialize_ocr()
 
     def _initialize_ocr(self):
@@ -85,67 +88,21 @@ class PaddleClient(BaseClient):
 
     def optimized_preprocess_from_image(self, image: Image.Image, filename: str,
                                         max_size=800, enhance_attempt=0):
-        """
-        优化图像预处理
+        """优化图像预处理
 
-        对输入图像进行尺寸调整、格式转换和增强处理。
-        提高OCR识别准确率。
+        对输入图像进行尺寸调整、灰度化和增强处理，提高OCR识别准确率，
+        具体处理见clients.preprocessing.preprocess_image。
 
         参数:
-            image: PIL图像对象
+            image: PIL图像对象，不会被修改
             filename: 图像文件名用于日志记录
             max_size: 最大尺寸限制
             enhance_attempt: 增强尝试次数，控制处理强度
 
         返回:
-            numpy数组格式的预处理图像或None
+            numpy数组格式的预处理图像（H, W, 3）或None，PaddleOCR需要三通道输入
         """
-        try:
-            # 获取图像尺寸但不存储未使用的变量
-            if max(image.size) > max_size:
-                scale = max_size / max(image.size)
-                new_size = (int(image.size[0] * scale), int(image.size[1] * scale))
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-
-            if image.mode not in ['L', 'RGB', 'RGBA']:
-                log("WARNING", "不支持的图像格式，已自动转换")
-                log_print(f"[本地预处理] 图像模式转换: {image.mode}→RGB (文件: {filename})")
-                image = image.convert('RGB')
-
-            if enhance_attempt == 0:
-                gray_image = image.convert('L')
-                enhancer = ImageEnhance.Contrast(gray_image)
-                gray_image = enhancer.enhance(1.2)
-            elif enhance_attempt == 1:
-                gray_image = image.convert('L')
-                enhancer = ImageEnhance.Contrast(gray_image)
-                gray_image = enhancer.enhance(1.8)
-                gray_image = gray_image.filter(ImageFilter.SHARPEN)
-            elif enhance_attempt == 2:
-                gray_image = image.convert('L')
-                threshold = 128
-                gray_image = gray_image.point(lambda p: p > threshold and 255)
-
-            np_image = np.array(gray_image)
-
-            min_val = np.min(np_image)
-            max_val = np.max(np_image)
-            if max_val > min_val:
-                np_image = ((np_image - min_val) / (max_val - min_val) * 255).astype(np.uint8)
-
-            # 确保图像是3D数组（H, W, C），PaddleOCR需要RGB格式
-            if len(np_image.shape) == 2:
-                np_image = np.stack((np_image,) * 3, axis=-1)
-
-            return np_image
-        except (IOError, ValueError, TypeError) as e:
-            error_msg = f"图像预处理错误: {str(e)}"
-            log("ERROR", error_msg)
-            log_print(f"[ERROR] {error_msg}")
-            log("ERROR", f"图像预处理失败: {filename}")
-            return None
-
-
+        return preprocess_image(image, filename, max_size=max_size, enhance_attempt=enhance_attempt, channels=3)
 
     def _load_image_from_source(self, image_source, is_url, filename):
         """从源加载图像"""
@@ -154,16 +111,18 @@ class PaddleClient(BaseClient):
                 response = requests.get(image_source, timeout=10)
                 response.raise_for_status()
                 img_data = response.content
-                return Image.open(BytesIO(img_data))
+                return open_image(img_data, self.decode_size)
             except requests.exceptions.RequestException as e:
+                self.set_request_status(REQUEST_STATUS_ERROR)
                 log("ERROR", f"图像下载失败: {str(e)}")
                 log_print(f"[本地OCR] URL下载异常: {str(e)} "
                           f"(URL: {image_source[:50]}...)")
                 return None
         else:
             try:
-                return Image.open(BytesIO(image_source))
+                return open_image(image_source, self.decode_size)
             except (IOError, OSError) as e:
+                self.set_request_status(REQUEST_STATUS_UNREADABLE)
                 log("ERROR", f"无法打开图像文件: {str(e)}")
                 log_print(f"[ERROR] 文件不是有效的图像格式或已损坏: {filename}")
                 return None
@@ -237,7 +196,7 @@ class PaddleClient(BaseClient):
                 try:
                     max_size = 300 if attempt == 0 else 400
                     processed_image = self.optimized_preprocess_from_image(
-                        original_image.copy(),
+                        original_image,
                         filename,
                         max_size=max_size,
                         enhance_attempt=attempt
@@ -0,0 +1,137 @@
+"""
+图像预处理模块
+
+LocalClient和PaddleClient共用的识别前预处理：缩放、灰度化、增强对比度、拉伸到0~255。
+逐像素的运算都合并为一张256项的uint8查找表，查找表只根据灰度直方图计算，
+整幅图像只需一次查表，不再对每个像素做浮点运算。第三次尝试的二值化阈值由直方图按Otsu方法自动确定。
+"""
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from utils import log, log_print
+
+# 预处理版本，预处理的输出发生任何变化时都要加1，识别缓存的指纹包含该版本，旧版本的识别结果随之失效
+PREPROCESS_VERSION = 3
+
+# 前两次尝试的对比度增强系数
+_CONTRAST_FACTORS = (1.2, 1.8)
+
+_LEVELS = np.arange(256, dtype=np.float64)
+_LEVELS_F32 = _LEVELS.astype(np.float32)
+
+
+def _histogram(gray_image):
+    """灰度图的256级直方图"""
+    return np.asarray(gray_image.histogram()[:256], dtype=np.float64)
+
+
+def contrast_lut(histogram, factor):
+    """
+    对比度增强查找表，与PIL ImageEnhance.Contrast的结果逐像素一致：以平均灰度为中心按系数拉伸
+
+    PIL的Image.blend按单精度浮点计算并向零取整，这里使用相同的精度和取整方式，
+    双精度计算在取整边界上会相差一个灰度级，拉伸后差距会被放大。
+
+    Args:
+        histogram: 256级灰度直方图
+        factor: 增强系数，1.0表示不变
+
+    Returns:
+        numpy.ndarray: 256项uint8查找表
+    """
+    total = histogram.sum()
+    mean = int(np.dot(histogram, _LEVELS) / total + 0.5) if total else 0
+    blended = np.float32(mean) + np.float32(factor) * (_LEVELS_F32 - np.float32(mean))
+    return np.clip(blended, 0, 255).astype(np.uint8)
+
+
+def normalize_lut(histogram):
+    """
+    线性拉伸查找表，把直方图中的最小灰度映射为0、最大灰度映射为255
+
+    Returns:
+        numpy.ndarray: 256项uint8查找表，图像只有一种灰度时为恒等映射
+    """
+    present = np.flatnonzero(histogram)
+    if present.size == 0 or present[0] == present[-1]:
+        return np.arange(256, dtype=np.uint8)
+    low, high = present[0], present[-1]
+    return np.clip((_LEVELS - low) / (high - low) * 255, 0, 255).astype(np.uint8)
+
+
+def otsu_threshold(histogram):
+    """
+    按Otsu方法计算二值化阈值（类间方差最大）
+
+    Returns:
+        int: 阈值，灰度大于该值的像素为前景
+    """
+    total = histogram.sum()
+    weight_low = np.cumsum(histogram)
+    weight_high = total - weight_low
+    cumulative_mean = np.cumsum(histogram * _LEVELS)
+    valid = (weight_low > 0) & (weight_high > 0)
+    if not valid.any():
+        return 127
+    between = np.zeros(256)
+    between[valid] = ((cumulative_mean[-1] * weight_low[valid] - cumulative_mean[valid] * total) ** 2
+                      / (weight_low[valid] * weight_high[valid]))
+    return int(np.argmax(between))
+
+
+def preprocess_image(image, filename, max_size=800, enhance_attempt=0, resize=True, channels=1):
+    """
+    识别前预处理图像
+
+    第1次尝试: 对比度x1.2后线性拉伸；第2次尝试: 对比度x1.8、锐化后线性拉伸；
+    之后的尝试: 按Otsu阈值二值化。输入图像不会被修改。
+
+    Args:
+        image: PIL图像对象
+        filename: 图像文件名，用于日志记录
+        max_size: 缩放后的最大边长
+        enhance_attempt: 增强尝试序号，控制处理强度
+        resize: 是否缩放到max_size以内
+        channels: 输出通道数，1为灰度图(H, W)，3为三通道图(H, W, 3)
+
+    Returns:
+        numpy.ndarray: uint8图像，失败时返回None
+    """
+    try:
+        if resize and max(image.size) > max_size:
+            scale = max_size / max(image.size)
+            new_size = (int(image.size[0] * scale), int(image.size[1] * scale))
+            image = image.resize(new_size, Image.Resampling.LANCZOS)
+
+        if image.mode not in ['L', 'RGB', 'RGBA']:
+            log("WARNING", "不支持的图像格式，已自动转换")
+            log_print(f"[本地预处理] 图像模式转换: {image.mode}→RGB (文件: {filename})")
+            image = image.convert('RGB')
+        gray_image = image.convert('L')
+
+        if enhance_attempt < len(_CONTRAST_FACTORS):
+            histogram = _histogram(gray_image)
+            lut = contrast_lut(histogram, _CONTRAST_FACTORS[enhance_attempt])
+            if enhance_attempt == 1:
+                # 锐化不是逐像素运算，先应用对比度查找表，锐化后再按新的直方图拉伸
+                gray_image = gray_image.point(lut.tolist()).filter(ImageFilter.SHARPEN)
+                lut = normalize_lut(_histogram(gray_image))
+            else:
+                # 对比度查找表单调递增，拉伸后的直方图端点就是原端点经过查找表后的位置
+                lut = normalize_lut(np.bincount(lut, weights=histogram, minlength=256))[lut]
+        else:
+            threshold = otsu_threshold(_histogram(gray_image))
+            lut = np.where(_LEVELS > threshold, 255, 0).astype(np.uint8)
+
+        # 合并后的查找表由PIL在C层一次查表完成，比numpy按像素索引更快
+        np_image = np.array(gray_image.point(lut.tolist()))
+        if channels == 3:
+            np_image = np.stack((np_image,) * 3, axis=-1)
+        return np_image
+    except (IOError, ValueError, TypeError) as e:
+        error_msg = f"图像预处理错误: {str(e)}"
+        log("ERROR", error_msg)
+        log_print(f"[ERROR] {error_msg}")
+        log("ERROR", f"图像预处理失败: {filename}")
+        return None
@@ -0,0 +1,375 @@
+"""本地OCR多进程执行模块
+
+在多个子进程中各加载一份EasyOCR/PaddleOCR模型副本，每个副本只在进程启动时加载一次。
+图像字节通过multiprocessing.shared_memory缓冲区传递给子进程，避免对大块图像数据进行pickle。
+"""
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple, Union
+
+from utils import load_config, log, log_print
+from .base_client import BaseClient, REQUEST_STATUS_ERROR, REQUEST_STATUS_OK
+from .image_decode import resolve_decode_size
+from .preprocessing import PREPROCESS_VERSION
+
+# 未配置时估算的单个模型副本内存占用（MB）
+DEFAULT_REPLICA_MEMORY_MB = 1500
+
+# 子进程中的OCR客户端实例，由_init_worker创建
+_worker_client = None
+
+
+def _init_worker(client_type, client_kwargs, threads_per_replica):
+    """子进程初始化函数：限制推理线程数并加载模型"""
+    global _worker_client
+    # 多个副本同时运行时，每个副本只使用分到的CPU核心，避免线程过量争抢
+    threads = str(max(1, threads_per_replica))
+    os.environ.setdefault("OMP_NUM_THREADS", threads)
+    os.environ.setdefault("MKL_NUM_THREADS", threads)
+
+    if client_type == 'paddle':
+        from .paddle_client import PaddleClient
+        _worker_client = PaddleClient(**client_kwargs)
+    else:
+        from .local_client import LocalClient
+        _worker_client = LocalClient(**client_kwargs)
+
+
+def _warmup_worker():
+    """预热任务，返回子进程编号，用于确认模型已加载"""
+    return os.getpid()
+
+
+def _attach_shared_memory(name):
+    """打开父进程创建的共享内存
+
+    共享内存由父进程负责释放。spawn方式启动的子进程与父进程共用同一个资源跟踪进程，
+    重复登记不会产生影响；支持track参数的Python版本上直接跳过登记。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _recognize_in_worker(shm_name, size):
+    """子进程识别任务：从共享内存读取图像字节并识别
+
+    Returns:
+        tuple: (识别结果, 请求状态)
+    """
+    shm = _attach_shared_memory(shm_name)
+    try:
+        image_source = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    _worker_client.set_request_status(REQUEST_STATUS_OK)
+    result = _worker_client.recognize(image_source, is_url=False)
+    return result, _worker_client.get_request_status()
+
+
+def _recognize_batch_in_worker(shm_name, sizes):
+    """子进程批量识别任务：共享内存中按顺序存放多张图像的字节
+
+    Returns:
+        list: 与输入顺序一致的 (识别结果, 请求状态) 列表
+    """
+    shm = _attach_shared_memory(shm_name)
+    try:
+        image_sources = []
+        offset = 0
+        for size in sizes:
+            image_sources.append(bytes(shm.buf[offset:offset + size]))
+            offset += size
+    finally:
+        shm.close()
+
+    recognize_batch = getattr(_worker_client, 'recognize_batch', None)
+    if recognize_batch is not None:
+        return recognize_batch(image_sources)
+    outcomes = []
+    for image_source in image_sources:
+        _worker_client.set_request_status(REQUEST_STATUS_OK)
+        result = _worker_client.recognize(image_source, is_url=False)
+        outcomes.append((result, _worker_client.get_request_status()))
+    return outcomes
+
+
+def _recognize_url_in_worker(image_url):
+    """子进程识别任务：识别URL图像
+
+    Returns:
+        tuple: (识别结果, 请求状态)
+    """
+    _worker_client.set_request_status(REQUEST_STATUS_OK)
+    result = _worker_client.recognize(image_url, is_url=True)
+    return result, _worker_client.get_request_status()
+
+
+def _total_memory_bytes() -> Optional[int]:
+    """获取物理内存总量，无法获取时返回None"""
+    try:
+        if sys.platform == 'win32':
+            # pylint: disable=import-outside-toplevel
+            import ctypes
+
+            class _MemoryStatus(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+            status = _MemoryStatus()
+            status.dwLength = ctypes.sizeof(_MemoryStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullTotalPhys)
+            return None
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def resolve_replica_count(config) -> int:
+    """根据配置、CPU核心数和内存确定模型副本数量
+
+    LOCAL_REPLICAS大于0时直接使用；否则取 核心数/2 与 内存/单副本内存 的较小值。
+
+    Args:
+        config: 应用配置字典
+
+    Returns:
+        int: 模型副本数量，至少为1
+    """
+    configured = int(config.get("LOCAL_REPLICAS", 0) or 0)
+    if configured > 0:
+        return configured
+
+    cpu_count = os.cpu_count() or 2
+    replicas = max(1, cpu_count // 2)
+    total_memory = _total_memory_bytes()
+    if total_memory:
+        replica_memory = int(config.get("LOCAL_REPLICA_MEMORY_MB", DEFAULT_REPLICA_MEMORY_MB)) * 1024 * 1024
+        # 预留一份内存给主进程和系统
+        replicas = min(replicas, max(1, total_memory // replica_memory - 1))
+    return max(1, int(replicas))
+
+
+class _SharedBufferPool:
+    """可复用的共享内存缓冲区池
+
+    每个缓冲区在多次识别之间复用，图像大于缓冲区时按需重新分配。
+    """
+
+    def __init__(self, count, initial_size=4 * 1024 * 1024):
+        self._available = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+        for _ in range(max(1, count)):
+            self._available.put(self._create(initial_size))
+
+    def _create(self, size):
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        with self._lock:
+            self._all.append(shm)
+        return shm
+
+    def _destroy(self, shm):
+        with self._lock:
+            if shm in self._all:
+                self._all.remove(shm)
+        shm.close()
+        shm.unlink()
+
+    def acquire(self, size):
+        """获取一个至少能容纳size字节的缓冲区"""
+        shm = self._available.get()
+        if shm.size < size:
+            self._destroy(shm)
+            # 按两倍增长，减少图像尺寸波动引起的重复分配
+            shm = self._create(max(size, shm.size * 2))
+        return shm
+
+    def release(self, shm):
+        """归还缓冲区"""
+        self._available.put(shm)
+
+    def close(self):
+        """释放所有缓冲区"""
+        with self._lock:
+            buffers = list(self._all)
+            self._all.clear()
+        for shm in buffers:
+            try:
+                shm.close()
+                shm.unlink()
+            except (OSError, BufferError):
+                pass
+
+
+class ProcessPoolClient(BaseClient):
+    """多进程本地OCR客户端
+
+    对外接口与LocalClient/PaddleClient一致，内部把识别任务分发给多个预加载了模型的子进程。
+    replicas属性供ProcessingThread确定识别线程数。
+    """
+
+    def __init__(self, client_type='local', replicas=None, client_kwargs=None):
+        """初始化进程池并预加载所有模型副本
+
+        Args:
+            client_type: 'local'（EasyOCR）或 'paddle'（PaddleOCR）
+            replicas: 模型副本数量，为None时根据配置和硬件自动确定
+            client_kwargs: 传给子进程中客户端构造函数的参数
+        """
+        self.config = load_config()
+        self.client_type = client_type
+        self.replicas = replicas or resolve_replica_count(self.config)
+        self.client_kwargs = dict(client_kwargs or {'max_retries': 1})
+        # 与子进程中的客户端相同，用于识别缓存的指纹
+        self.decode_size = resolve_decode_size(
+            self.config, client_type == 'local' and self.client_kwargs.get('gpu', True))
+        self.preprocess_version = PREPROCESS_VERSION
+        self._executor = None
+        self._buffers = None
+        self._executor_lock = threading.Lock()
+        self._ensure_executor()
+
+    def _ensure_executor(self):
+        """创建进程池并等待所有副本加载完成，进程池已存在时直接返回"""
+        with self._executor_lock:
+            if self._executor is not None:
+                return self._executor
+
+            threads_per_replica = max(1, (os.cpu_count() or 1) // self.replicas)
+            log("INFO", f"正在启动 {self.replicas} 个本地OCR模型副本...")
+            executor = ProcessPoolExecutor(
+                max_workers=self.replicas,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.client_type, self.client_kwargs, threads_per_replica))
+            try:
+                # 每次提交都会在没有空闲进程时新建一个进程，从而启动全部副本并完成模型加载
+                warmups = [executor.submit(_warmup_worker) for _ in range(self.replicas)]
+                pids = {future.result() for future in warmups}
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise RuntimeError(f"本地OCR进程池启动失败: {str(e)}") from e
+
+            self._executor = executor
+            self._buffers = _SharedBufferPool(self.replicas * 2)
+            log_print(f"[进程池] {self.client_type} 模型副本已就绪: {len(pids)} 个进程, "
+                      f"每个副本 {threads_per_replica} 个计算线程")
+            return executor
+
+    def recognize(self, image_source: Union[str, bytes], is_url: bool = False) -> Optional[str]:
+        """在子进程中识别图像
+
+        Args:
+            image_source: 图像字节数据或URL
+            is_url: 是否为URL图像源
+
+        Returns:
+            Optional[str]: 识别结果，失败返回None
+        """
+        try:
+            self.validate_image_source(image_source, is_url)
+        except ValueError as e:
+            log("ERROR", f"参数校验失败: {str(e)}")
+            return None
+
+        try:
+            executor = self._ensure_executor()
+            if is_url:
+                result, status = executor.submit(_recognize_url_in_worker, image_source).result()
+            else:
+                buffers = self._buffers
+                size = len(image_source)
+                shm = buffers.acquire(size)
+                try:
+                    shm.buf[:size] = image_source
+                    result, status = executor.submit(_recognize_in_worker, shm.name, size).result()
+                finally:
+                    buffers.release(shm)
+            # 子进程中的请求状态不会自动同步，回传后记录到调用线程
+            self.set_request_status(status)
+            return result
+        except BrokenProcessPool as e:
+            log("ERROR", f"本地OCR子进程异常退出: {str(e)}")
+            self.set_request_status(REQUEST_STATUS_ERROR)
+            self.cleanup()
+            return None
+        except (RuntimeError, OSError, ValueError) as e:
+            log("ERROR", f"本地OCR进程池识别失败: {str(e)}")
+            self.set_request_status(REQUEST_STATUS_ERROR)
+            return None
+
+    def recognize_batch(self, image_sources: List[bytes]) -> List[Tuple[Optional[str], str]]:
+        """将一批图像交给同一个子进程批量识别
+
+        Args:
+            image_sources: 图像字节数据列表
+
+        Returns:
+            List[Tuple[Optional[str], str]]: 与输入顺序一致的 (识别结果, 请求状态) 列表
+        """
+        if not image_sources:
+            return []
+
+        try:
+            executor = self._ensure_executor()
+            buffers = self._buffers
+            sizes = [len(image_source) for image_source in image_sources]
+            shm = buffers.acquire(sum(sizes))
+            try:
+                offset = 0
+                for image_source, size in zip(image_sources, sizes):
+                    shm.buf[offset:offset + size] = image_source
+                    offset += size
+                return executor.submit(_recognize_batch_in_worker, shm.name, sizes).result()
+            finally:
+                buffers.release(shm)
+        except BrokenProcessPool as e:
+            log("ERROR", f"本地OCR子进程异常退出: {str(e)}")
+            self.cleanup()
+        except (RuntimeError, OSError, ValueError, TypeError) as e:
+            log("ERROR", f"本地OCR进程池批量识别失败: {str(e)}")
+        return [(None, REQUEST_STATUS_ERROR)] * len(image_sources)
+
+    def cleanup(self):
+        """关闭进程池并释放共享内存，下次识别时会重新启动"""
+        with self._executor_lock:
+            executor, buffers = self._executor, self._buffers
+            self._executor = None
+            self._buffers = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if buffers is not None:
+            buffers.close()
+
+
+def create_local_engine(client_type, config, **client_kwargs):
+    """按LOCAL_EXECUTOR配置创建本地OCR客户端
+
+    Args:
+        client_type: 'local'（EasyOCR）或 'paddle'（PaddleOCR）
+        config: 应用配置字典
+        **client_kwargs: 传给客户端构造函数的参数
+
+    Returns:
+        BaseClient: LOCAL_EXECUTOR为process时返回ProcessPoolClient，否则返回单实例客户端
+    """
+    if str(config.get("LOCAL_EXECUTOR", "thread")).lower() == "process":
+        return ProcessPoolClient(client_type, replicas=resolve_replica_count(config), client_kwargs=client_kwargs)
+
+    if client_type == 'paddle':
+        from .paddle_client import PaddleClient  # pylint: disable=import-outside-toplevel
+        return PaddleClient(**client_kwargs)
+    from .local_client import LocalClient  # pylint: disable=import-outside-toplevel
+    return LocalClient(**client_kwargs)
@@ -0,0 +1,181 @@
+"""
+自适应并发控制模块
+
+提供基于AIMD（加性增、乘性减）的并发控制器，用于云端OCR服务。
+延迟保持平稳时逐步增加同时进行的请求数，遇到限流（HTTP 429/QPS超限）或超时时按比例回退，
+并根据每分钟请求上限估算有效并发的上界，避免无意义地堆积请求。
+"""
+
+import math
+import threading
+import time
+
+from utils import log_print
+
+# 取消等待时的轮询间隔（秒）
+_CANCEL_POLL_INTERVAL = 0.5
+
+# 基线延迟的缓慢上浮系数，避免网络环境变化后基线长期偏低
+_BASELINE_DRIFT = 1.05
+
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD自适应并发控制器
+
+    每完成limit个请求视为一个观察窗口：窗口内没有拥塞信号且平均延迟不超过
+    基线延迟的latency_tolerance倍时，并发上限加increase_step；
+    出现限流或超时时并发上限乘以decrease_factor，同一窗口内最多回退一次。
+
+    属性:
+        limit: 当前允许同时进行的请求数
+        min_limit: 并发下限
+        max_limit: 并发上限
+    """
+
+    def __init__(self, initial_limit, min_limit=1, max_limit=32, rate_per_minute=None,
+                 increase_step=1, decrease_factor=0.5, latency_tolerance=1.5, name=""):
+        """
+        初始化并发控制器
+
+        Args:
+            initial_limit: 初始并发数，通常取CONCURRENCY配置
+            min_limit: 并发下限
+            max_limit: 并发上限，同时也是调用方需要准备的工作线程数
+            rate_per_minute: 每分钟请求上限，用于估算有效并发的上界
+            increase_step: 每个窗口增加的并发数
+            decrease_factor: 遇到限流或超时时的乘性回退系数
+            latency_tolerance: 平均延迟相对基线的容忍倍数
+            name: 日志中显示的名称
+        """
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = min(max(int(initial_limit), self.min_limit), self.max_limit)
+        self.rate_per_minute = rate_per_minute
+        self.increase_step = max(1, int(increase_step))
+        self.decrease_factor = min(max(float(decrease_factor), 0.1), 0.9)
+        self.latency_tolerance = max(float(latency_tolerance), 1.0)
+        self.name = name
+        self.in_flight = 0
+        self.baseline_latency = None
+        self.average_latency = None
+        self._condition = threading.Condition()
+        self._window_count = 0
+        self._window_latency = 0.0
+        self._window_congested = False
+        self._last_decrease_time = 0.0
+
+    def acquire(self, is_cancelled=None):
+        """
+        等待并占用一个并发名额
+
+        Args:
+            is_cancelled: 可选的无参回调，返回True时中止等待
+
+        Raises:
+            RuntimeError: 等待期间被取消时抛出
+        """
+        with self._condition:
+            while self.in_flight >= self.limit:
+                if is_cancelled is not None and is_cancelled():
+                    raise RuntimeError("等待并发名额时已取消")
+                self._condition.wait(_CANCEL_POLL_INTERVAL)
+            self.in_flight += 1
+
+    def try_acquire(self):
+        """
+        不等待地占用一个并发名额，供异步引擎在事件循环中使用
+
+        Returns:
+            bool: 是否占用成功
+        """
+        with self._condition:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def discard(self):
+        """释放并发名额但不反馈结果，用于请求被取消或未实际发出的情况"""
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._condition.notify_all()
+
+    def release(self, latency, throttled=False, timed_out=False):
+        """
+        释放并发名额并反馈本次请求的结果
+
+        Args:
+            latency: 本次请求耗时（秒）
+            throttled: 是否遇到限流（HTTP 429、QPS超限等）
+            timed_out: 是否请求超时
+        """
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            old_limit = self.limit
+
+            if throttled or timed_out:
+                self._on_congestion()
+            else:
+                self._on_success(latency)
+
+            if self.limit != old_limit:
+                reason = "限流" if throttled else "超时" if timed_out else "延迟平稳"
+                log_print(f"[自适应并发] {self.name} 并发数 {old_limit} -> {self.limit} ({reason})")
+            self._condition.notify_all()
+
+    def update_rate(self, rate_per_minute):
+        """更新每分钟请求上限"""
+        with self._condition:
+            self.rate_per_minute = rate_per_minute
+
+    def _on_success(self, latency):
+        """处理成功请求的延迟样本，窗口结束时决定是否加性增加"""
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency = 0.8 * self.average_latency + 0.2 * latency
+
+        self._window_count += 1
+        self._window_latency += latency
+        if self._window_count < self.limit:
+            return
+
+        window_average = self._window_latency / self._window_count
+        congested = self._window_congested
+        self._window_count = 0
+        self._window_latency = 0.0
+        self._window_congested = False
+
+        if self.baseline_latency is None or window_average < self.baseline_latency:
+            self.baseline_latency = window_average
+        else:
+            self.baseline_latency = min(self.baseline_latency * _BASELINE_DRIFT, window_average)
+
+        if congested or window_average > self.baseline_latency * self.latency_tolerance:
+            return
+        self.limit = min(self.limit + self.increase_step, self._effective_max_limit())
+
+    def _on_congestion(self):
+        """遇到限流或超时时乘性回退，同一个延迟周期内只回退一次"""
+        self._window_congested = True
+        now = time.monotonic()
+        cooldown = self.average_latency or 1.0
+        if now - self._last_decrease_time < cooldown:
+            return
+        self._last_decrease_time = now
+        self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+
+    def _effective_max_limit(self):
+        """
+        根据利特尔法则估算有效并发上界
+
+        超过每分钟请求上限所需的并发只会在限速器前排队，没有收益。
+
+        Returns:
+            int: 当前允许的最大并发数
+        """
+        if not self.rate_per_minute or self.average_latency is None:
+            return self.max_limit
+        needed = math.ceil(self.rate_per_minute / 60.0 * self.average_latency) + 1
+        return max(self.min_limit, min(self.max_limit, needed))
@@ -0,0 +1,213 @@
+"""
+任务日志模块
+
+为每个分类任务（源文件夹、目标文件夹、复制/移动模式）维护一份只追加的JSONL日志，
+记录每个文件的状态：queued（已排队）、recognized（已识别）、placed（已放置）。
+日志按批次fsync落盘，程序崩溃或手动停止后可以从日志恢复，
+只处理尚未完成的文件，重启代价与剩余工作量成正比。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils import log_print
+
+JOBS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_internal', 'jobs')
+
+STATE_QUEUED = "queued"
+STATE_RECOGNIZED = "recognized"
+STATE_PLACED = "placed"
+
+# 累积多少条记录或间隔多长时间（秒）写入并fsync一次
+FSYNC_BATCH = 256
+FSYNC_INTERVAL = 1.0
+
+
+class JobJournal:
+    """
+    分类任务日志
+
+    同一组源文件夹、目标文件夹和模式对应同一个日志文件，任务全部完成后日志被删除，
+    因此日志存在即表示有可以继续的未完成任务。
+
+    属性:
+        job_id: 任务标识
+        path: 日志文件路径
+        states: 文件路径到 (状态, 识别结果) 的映射
+    """
+
+    def __init__(self, source_dir, dest_dir, is_move_mode, jobs_dir=JOBS_DIR):
+        """
+        初始化任务日志
+
+        Args:
+            source_dir: 源文件夹
+            dest_dir: 目标文件夹
+            is_move_mode: 是否为移动模式
+            jobs_dir: 日志文件所在目录
+        """
+        self.source_dir = os.path.abspath(source_dir) if source_dir else ""
+        self.dest_dir = os.path.abspath(dest_dir) if dest_dir else ""
+        self.is_move_mode = bool(is_move_mode)
+        identity = f"{self.source_dir}\x1f{self.dest_dir}\x1f{int(self.is_move_mode)}"
+        self.job_id = hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()
+        self.path = os.path.join(jobs_dir, f"{self.job_id}.jsonl")
+        self.states = {}
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._file = None
+        self._stop_event = threading.Event()
+        self._flusher = None
+
+    def load(self):
+        """
+        读取已有的日志并重放每个文件的最终状态
+
+        日志末尾可能因崩溃留下不完整的行，解析失败的行会被忽略。
+
+        Returns:
+            bool: 是否存在未完成的任务
+        """
+        self.states = {}
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    file_path = record.get('f')
+                    if file_path:
+                        self.states[file_path] = (record.get('s'), record.get('r'))
+        except OSError as e:
+            log_print(f"[任务日志] 读取任务日志失败: {str(e)}", "WARNING")
+            self.states = {}
+            return False
+        return bool(self.states)
+
+    def summary(self):
+        """
+        统计日志中的任务进度
+
+        Returns:
+            tuple: (日志中的文件总数, 已放置的文件数)
+        """
+        placed = sum(1 for state, _ in self.states.values() if state == STATE_PLACED)
+        return len(self.states), placed
+
+    def open(self):
+        """
+        打开日志文件开始或继续任务，并启动后台落盘线程
+
+        Raises:
+            OSError: 无法创建或打开日志文件
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        is_new_job = not os.path.exists(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if is_new_job:
+            self._append({'job': self.job_id, 'source': self.source_dir, 'dest': self.dest_dir,
+                          'move': self.is_move_mode, 'created': time.time()})
+        self.flush()
+        # 识别较慢时追加间隔可能很长，由后台线程按时间落盘，崩溃时最多丢失FSYNC_INTERVAL内的记录
+        self._stop_event.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="JobJournalFlusher", daemon=True)
+        self._flusher.start()
+
+    def select(self, files):
+        """
+        从扫描到的文件中挑选尚未完成的文件，为尚未记录的文件写入queued状态
+
+        扫描过程中可以按批多次调用。
+
+        Args:
+            files: 本批扫描到的文件路径
+
+        Returns:
+            tuple: (需要识别的文件列表, 已识别但尚未放置的 (文件路径, 识别结果) 列表)
+        """
+        pending = []
+        replay = []
+        for file_path in files:
+            state, recognition = self.states.get(file_path, (None, None))
+            if state == STATE_PLACED:
+                continue
+            if state is not None and self.is_move_mode and not os.path.exists(file_path):
+                # 移动模式下源文件已不存在，说明放置已经完成但日志尚未落盘
+                continue
+            if state == STATE_RECOGNIZED and recognition:
+                replay.append((file_path, recognition))
+                continue
+            if state is None:
+                self._append({'f': file_path, 's': STATE_QUEUED})
+            pending.append(file_path)
+        return pending, replay
+
+    def record_recognized(self, file_path, recognition):
+        """记录文件已识别成功，继续任务时无需重新识别"""
+        self._append({'f': file_path, 's': STATE_RECOGNIZED, 'r': recognition})
+
+    def record_placed(self, file_path, target_path):
+        """记录文件已放置到分类文件夹"""
+        self._append({'f': file_path, 's': STATE_PLACED, 't': target_path})
+
+    def flush(self):
+        """将缓冲的记录写入日志文件并fsync"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """落盘并关闭日志文件，保留日志以便继续任务"""
+        self._stop_event.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=FSYNC_INTERVAL * 2)
+            self._flusher = None
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def complete(self):
+        """任务全部完成，删除日志"""
+        self.close()
+        self.discard()
+
+    def discard(self):
+        """删除日志文件，放弃未完成的任务"""
+        self.states = {}
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            log_print(f"[任务日志] 删除任务日志失败: {str(e)}", "WARNING")
+
+    def _flush_loop(self):
+        """后台定时落盘"""
+        while not self._stop_event.wait(FSYNC_INTERVAL):
+            self.flush()
+
+    def _append(self, record):
+        """缓冲一条记录，累积到一定数量后立即落盘，其余由后台线程定时落盘"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= FSYNC_BATCH:
+                self._sync()
+
+    def _sync(self):
+        """在持有锁的情况下写入缓冲的记录"""
+        if self._file is None or not self._buffer:
+            return
+        try:
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            log_print(f"[任务日志] 写入任务日志失败: {str(e)}", "ERROR")
+        self._buffer.clear()
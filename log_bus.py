@@ -0,0 +1,135 @@
+"""
+界面日志总线模块
+
+任意线程都可以提交日志，日志先进入有界的环形缓冲区，由界面线程中的定时器按固定帧率批量追加到日志控件，
+日志控件最多保留max_lines行，超出后最早的日志被移除。各日志级别可以设置每秒最多显示的条数，
+超出的日志只写入日志文件，界面上以一条汇总提示代替。
+"""
+
+import threading
+import time
+from collections import deque
+
+from PyQt6 import QtCore, QtGui
+
+# 界面刷新间隔（毫秒），约每秒10帧
+DEFAULT_FLUSH_INTERVAL_MS = 100
+
+
+class LogBus(QtCore.QObject):
+    """
+    界面日志总线
+
+    属性:
+        max_lines: 日志控件和缓冲区最多保留的行数
+        rate_limits: 各级别每秒最多显示的日志条数，例如 {"INFO": 50, "DEBUG": 10}
+    """
+
+    def __init__(self, text_edit, max_lines=3000, rate_limits=None, interval_ms=DEFAULT_FLUSH_INTERVAL_MS,
+                 parent=None):
+        """
+        初始化日志总线，必须在界面线程中创建
+
+        Args:
+            text_edit: 显示日志的QTextEdit
+            max_lines: 最多保留的日志行数
+            rate_limits: 各级别每秒最多显示的条数，未设置的级别不限制
+            interval_ms: 刷新间隔（毫秒）
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.max_lines = max(1, int(max_lines))
+        self.rate_limits = {}
+        self._pending = deque(maxlen=self.max_lines)
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._suppressed = {}
+        self.set_rate_limits(rate_limits)
+
+        self.text_edit.document().setMaximumBlockCount(self.max_lines)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(max(10, int(interval_ms)))
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def set_rate_limits(self, rate_limits):
+        """
+        设置各级别的显示速率上限
+
+        Args:
+            rate_limits: {级别: 每秒条数}，条数为0或负数表示不限制
+        """
+        limits = {}
+        for level, limit in (rate_limits or {}).items():
+            try:
+                limit = int(limit)
+            except (TypeError, ValueError):
+                continue
+            if limit > 0:
+                limits[str(level).upper()] = limit
+        with self._lock:
+            self.rate_limits = limits
+
+    def post(self, level, html):
+        """
+        提交一条日志，可以在任意线程中调用
+
+        Args:
+            level: 日志级别
+            html: 已格式化的日志HTML
+
+        Returns:
+            bool: 是否会显示；超出该级别速率上限时返回False，由调用方写入日志文件
+        """
+        with self._lock:
+            limit = self.rate_limits.get(level)
+            if limit is not None:
+                now = time.monotonic()
+                window_start, count = self._windows.get(level, (now, 0))
+                if now - window_start >= 1.0:
+                    window_start, count = now, 0
+                if count >= limit:
+                    self._suppressed[level] = self._suppressed.get(level, 0) + 1
+                    self._windows[level] = (window_start, count)
+                    return False
+                self._windows[level] = (window_start, count + 1)
+            # 缓冲区已满时deque自动丢弃最早的日志，这些日志反正会被控件的行数上限移除
+            self._pending.append(html)
+        return True
+
+    def flush(self):
+        """将缓冲的日志一次性追加到日志控件，由定时器在界面线程中调用"""
+        with self._lock:
+            if not self._pending and not self._suppressed:
+                return
+            lines = list(self._pending)
+            self._pending.clear()
+            suppressed = self._suppressed
+            self._suppressed = {}
+
+        for level, count in suppressed.items():
+            lines.append(f'<span style="color:#808080">[{time.strftime("%m-%d %H:%M:%S")}] '
+                         f'已省略{count}条{level}日志，完整内容见日志文件</span>')
+        # 只保留最后max_lines行，更早的日志追加后也会被立即移除
+        lines = lines[-self.max_lines:]
+
+        scroll_bar = self.text_edit.verticalScrollBar()
+        follow = scroll_bar.value() >= scroll_bar.maximum() - 4
+        document = self.text_edit.document()
+        cursor = QtGui.QTextCursor(document)
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+        # 一批日志作为一次编辑提交，文档只重新布局一次
+        cursor.beginEditBlock()
+        for line in lines:
+            if not document.isEmpty():
+                cursor.insertBlock()
+            cursor.insertHtml(line)
+        cursor.endEditBlock()
+        if follow:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def stop(self):
+        """停止定时器并输出剩余日志"""
+        self._timer.stop()
+        self.flush()
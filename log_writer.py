@@ -0,0 +1,206 @@
+"""
+日志文件写入模块
+
+日志行先放入内存队列，由后台线程按时间或字节数批量写入文件，调用日志的识别线程、输出线程不会等待磁盘IO。
+日志轮转根据内存中累计的写入字节数判断，不再为每一行日志检查文件是否存在和文件大小。
+"""
+
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+from queue import Queue, Empty, Full
+
+# 队列中最多缓存的日志行数，写入跟不上时丢弃新日志并在恢复后记录丢弃数量
+_MAX_PENDING_LINES = 100000
+
+_STOP = object()
+
+
+class AsyncLogWriter:
+    """
+    异步日志文件写入器
+
+    属性:
+        path: 日志文件路径
+        rotation_size: 日志文件达到该字节数后轮转
+        backup_count: 保留的历史日志文件数（log.1 ... log.N）
+        dropped: 因队列已满而丢弃的日志行数
+    """
+
+    def __init__(self, path, rotation_size=5 * 1024 * 1024, backup_count=3, flush_interval=0.5,
+                 flush_bytes=64 * 1024):
+        """
+        初始化写入器，写入线程在第一条日志到达时启动
+
+        Args:
+            path: 日志文件路径
+            rotation_size: 轮转大小（字节）
+            backup_count: 保留的历史日志文件数
+            flush_interval: 缓存的日志最长等待多久写入文件（秒）
+            flush_bytes: 缓存的日志达到该字节数时立即写入
+        """
+        self.path = path
+        self.rotation_size = rotation_size
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.dropped = 0
+        self._queue = Queue(maxsize=_MAX_PENDING_LINES)
+        self._handle = None
+        self._size = 0
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def configure(self, rotation_size=None, backup_count=None):
+        """更新轮转设置，下一批日志写入时生效"""
+        if rotation_size is not None:
+            self.rotation_size = rotation_size
+        if backup_count is not None:
+            self.backup_count = backup_count
+
+    def write(self, line):
+        """
+        提交一行日志，立即返回
+
+        Args:
+            line: 不含换行符的日志文本
+        """
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(line)
+        except Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """等待已提交的日志写入文件"""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except Full:
+            return
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """写入剩余日志并停止写入线程"""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except Full:
+            pass
+        thread.join(timeout)
+        self._thread = None
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="AsyncLogWriter", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        """写入线程：收集一批日志后一次写入"""
+        pending = []
+        pending_bytes = 0
+        waiters = []
+        deadline = None
+        running = True
+        while running:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                item = None
+
+            if item is _STOP:
+                running = False
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                pending.append(item)
+                pending_bytes += len(item) + 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            flush_due = (not running or waiters or pending_bytes >= self.flush_bytes
+                         or (deadline is not None and time.monotonic() >= deadline))
+            if flush_due:
+                if self.dropped:
+                    pending.append(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] [WARNING] 日志写入过慢，"
+                                   f"已丢弃{self.dropped}条日志")
+                    self.dropped = 0
+                if pending:
+                    self._write_batch(pending)
+                pending = []
+                pending_bytes = 0
+                deadline = None
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError:
+                pass
+            self._handle = None
+
+    def _write_batch(self, lines):
+        """写入一批日志，写入后超过轮转大小时轮转"""
+        data = "\n".join(lines) + "\n"
+        try:
+            handle = self._open()
+            handle.write(data)
+            handle.flush()
+            self._size += len(data.encode('utf-8'))
+            if self._size > self.rotation_size:
+                self._rotate()
+        except (OSError, ValueError):
+            # 日志写入失败不影响处理流程，下一批重新打开文件
+            self._close_handle()
+
+    def _open(self):
+        if self._handle is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # pylint: disable=consider-using-with
+            self._handle = open(self.path, 'a', encoding='utf-8')
+            self._size = os.fstat(self._handle.fileno()).st_size
+        return self._handle
+
+    def _close_handle(self):
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError:
+                pass
+            self._handle = None
+
+    def _rotate(self):
+        """轮转日志文件: log -> log.1 -> log.2 ...，超出保留数量的最旧文件被删除"""
+        try:
+            current = os.stat(self.path)
+            opened = os.fstat(self._handle.fileno())
+            if (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino) \
+                    or current.st_size <= self.rotation_size:
+                # 其他进程（例如本地OCR子进程）已经轮转过，改为写入新的日志文件
+                self._close_handle()
+                return
+        except OSError:
+            self._close_handle()
+            return
+
+        self._close_handle()
+        backup_count = max(1, int(self.backup_count))
+        for i in range(backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(f"# Log file created at {datetime.now()}\n")
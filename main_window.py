@@ -23,7 +23,13 @@ from Thread import ProcessingThread
 from client_loading_thread import ClientLoadingThread
 from Ui_MainWindow import Ui_MainWindow
 from clients import AliClient, BaiduClient, LocalClient
-from clients.paddle_client import PaddleClient
+from clients.http_session import close_sessions
+from clients.process_pool import create_local_engine
+from job_journal import JobJournal
+from log_bus import LogBus
+from recognition_cache import recognition_fingerprint
+from scan_index import ScanIndex
+from scanner import DEFAULT_IMAGE_EXTENSIONS
 from utils import MODE_ALI, MODE_LOCAL, MODE_BAIDU, MODE_PADDLE, get_resource_path, log, load_config
 
 
@@ -50,7 +56,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.processing = False
         self.processing_start_time = 0
         self.processing_thread = None
-        self.image_files = []
+        # 上一次处理的结果存储（result_store.ResultStore），处理完成时替换并释放旧的存储
+        self.last_results = None
 
         self.is_move_mode = False
         self.dragging = False
@@ -87,6 +94,9 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.pushButton_start.setText("开始分类")
 
         self.textEdit_log.setReadOnly(True)
+        # 日志经日志总线按帧批量显示，控件最多保留MAX_LINES行
+        self.log_bus = LogBus(self.textEdit_log, utils.MAX_LINES, self.config.get("GUI_LOG_RATE_LIMITS"), parent=self)
+        utils.LOG_BUS = self.log_bus
 
     def _initialize_ocr_client(self):
         """初始化OCR客户端实例，根据配置选择不同的OCR服务提供商"""
@@ -99,10 +109,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.client = BaiduClient()
                 log("WARNING", "已切换至百度OCR服务")
             elif mode_index == MODE_PADDLE:
-                self.client = PaddleClient()
+                self.client = create_local_engine('paddle', self.config)
                 log("WARNING", "已切换至飞桨OCR服务")
             else:
-                self.client = LocalClient(max_retries=1)
+                self.client = create_local_engine('local', self.config, max_retries=1)
                 log("WARNING", "已切换至本地OCR引擎")
         except (ConnectionError, ValueError, OSError) as e:
             log("ERROR", f"OCR服务启动失败: {str(e)}")
@@ -154,10 +164,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                     self.client = BaiduClient()
                     log("INFO", "同步初始化百度客户端")
                 elif mode_index == MODE_PADDLE:
-                    self.client = PaddleClient()
+                    self.client = create_local_engine('paddle', self.config)
                     log("INFO", "同步初始化飞桨客户端")
                 else:
-                    self.client = LocalClient(max_retries=1)
+                    self.client = create_local_engine('local', self.config, max_retries=1)
                     log("INFO", "同步初始化本地客户端")
             except Exception as e:
                 log("ERROR", f"同步初始化客户端失败: {str(e)}")
@@ -213,7 +223,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.dragging = False
 
     def browse_source_directory(self):
-        """打开文件对话框选择源文件夹并加载图像文件"""
+        """打开文件对话框选择源文件夹，图像文件在开始处理后边扫描边处理"""
         directory = QFileDialog.getExistingDirectory(self, "选择源文件夹")
 
         if directory:
@@ -222,7 +232,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             log("INFO", f"待分类文件夹已选择: {os.path.basename(directory)}")
 
             if not self._check_directory_conflict():
-                self._load_images()
+                self.total_files_label.setText("0")
 
     def browse_dest_directory(self):
         """打开文件对话框选择目标文件夹"""
@@ -233,33 +243,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             log("INFO", f"目标文件夹已选择: {os.path.basename(directory)}")
             self._check_directory_conflict()
 
-    def _load_images(self):
-        self.image_files = []
-        if not self.source_dir or not os.path.exists(self.source_dir):
-            log("ERROR", "源文件夹不存在或未设置")
-            return
-
-        try:
-            for root, _, files in os.walk(self.source_dir):
-                for file in files:
-                    try:
-                        if any(file.lower().endswith(ext) for ext in self.config["ALLOWED_EXTENSIONS"]):
-                            file_path = os.path.abspath(os.path.join(root, file))
-                            self.image_files.append(file_path)
-                    except (FileNotFoundError, PermissionError, OSError) as e:
-                        log("ERROR", f"处理文件 {file} 时出错: {str(e)}")
-                        continue
-        except (OSError, PermissionError) as e:
-            log("ERROR", f"访问文件夹 {self.source_dir} 时权限不足")
-            return
-        except (ValueError, TypeError) as e:
-            log("ERROR", f"扫描文件夹时出错: {str(e)}")
-            return
-
-        total_count = len(self.image_files)
-        self.total_files_label.setText(str(total_count))
-        log("DEBUG", f"扫描完成，发现 {total_count} 个图像文件")
-
     def _toggle_move_mode(self):
         """切换移动/复制模式"""
         self.is_move_mode = self.move_radio.isChecked()
@@ -288,7 +271,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.dest_dir = ""
                 self.lineEdit_src_folder.setText("待处理文件夹（默认包含子文件夹）")
                 self.lineEdit_dst_folder.setText("存放分类后的结果")
-                self.image_files = []
                 self.total_files_label.setText("0")
                 return True
 
@@ -342,11 +324,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if not self._validate_processing_conditions():
             return
 
-        total_files = len(self.image_files)
         mode = "移动" if self.is_move_mode else "复制"
+        watch_mode = self.config.get("WATCH_MODE", False)
+        watch_hint = "\n监视模式已开启，处理完现有图像后将持续处理新放入的图像，直到手动停止。" if watch_mode else ""
         reply = QMessageBox.question(
             self, "确认处理",
-            f"即将识别分类 {total_files} 个图像并 {mode} 。\n是否继续?",
+            f"即将识别分类源文件夹（包含子文件夹）中的图像并 {mode} 。{watch_hint}\n是否继续?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
@@ -354,10 +337,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             log("INFO", "用户取消处理操作")
             return
 
+        journal = self._prepare_job_journal()
+
         self.processing_start_time = time.time()
         self.processing = True
-        self.pushButton_start.setText("停止分类")
+        self.pushButton_start.setText("停止监视" if watch_mode else "停止分类")
         self.progressBar.setValue(0)
+        self.progressBar.setFormat("%p%")
 
         try:
             mode_index = self.config.get("MODE_INDEX", 0)
@@ -372,7 +358,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 client = self.client
             elif mode_index == MODE_LOCAL:
                 if not hasattr(self.client, 'client_type') or self.client.client_type != 'local':
-                    self.client = LocalClient(max_retries=1)
+                    self.client = create_local_engine('local', self.config, max_retries=1)
                 client = self.client
             elif mode_index == MODE_BAIDU:
                 api_key = self.config.get("BAIDU_API_KEY")
@@ -384,7 +370,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                     self.client = BaiduClient()
                 client = self.client
             elif mode_index == MODE_PADDLE:
-                self.client = PaddleClient(max_retries=1)
+                if not hasattr(self.client, 'client_type') or self.client.client_type != 'paddle':
+                    self.client = create_local_engine('paddle', self.config, max_retries=1)
                 client = self.client
             else:
                 log("ERROR", f"无效的模式索引: {mode_index}")
@@ -393,13 +380,25 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             if not hasattr(client, 'recognize') or not callable(client.recognize):
                 raise ValueError("OCR客户端必须实现recognize方法")
 
+            scan_index = None
+            if self.config.get("SCAN_INDEX", True) and not self.is_move_mode:
+                # 移动模式下已处理的文件不会留在源文件夹，无需索引；
+                # 指纹与识别缓存相同，更换识别引擎或影响识别的设置后已分类的文件会重新处理
+                scan_index = ScanIndex(self.source_dir, self.dest_dir, recognition_fingerprint(client, self.config))
+
             from PyQt6.QtCore import Qt
             self.processing_thread = ProcessingThread(
-                client, self.image_files, self.dest_dir, self.is_move_mode
+                client, None, self.dest_dir, self.is_move_mode,
+                journal=journal, scan_index=scan_index, source_dir=self.source_dir,
+                extensions=self.config.get("ALLOWED_EXTENSIONS", DEFAULT_IMAGE_EXTENSIONS)
             )
+            self.total_files_label.setText("0")
+            self.processing_thread.files_discovered.connect(self.on_files_discovered,
+                                                            Qt.ConnectionType.QueuedConnection)
             self.processing_thread.processing_finished.connect(self.on_processing_finished,
                                                                Qt.ConnectionType.QueuedConnection)
-            self.processing_thread.stats_updated.connect(self.on_stats_updated, Qt.ConnectionType.QueuedConnection)
+            self.processing_thread.progress_snapshot.connect(self.on_progress_snapshot,
+                                                             Qt.ConnectionType.QueuedConnection)
             self.processing_thread.progress_updated.connect(self.on_progress_updated,
                                                             Qt.ConnectionType.QueuedConnection)
             self.processing_thread.processing_stopped.connect(self.on_processing_stopped,
@@ -417,6 +416,31 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.processing = False
             self.pushButton_start.setText("开始分类")
 
+    def _prepare_job_journal(self):
+        """准备任务日志，存在未完成的相同任务时询问是否继续
+
+        Returns:
+            Optional[JobJournal]: 任务日志，未启用时返回None
+        """
+        if not self.config.get("JOB_JOURNAL", True):
+            return None
+
+        journal = JobJournal(self.source_dir, self.dest_dir, self.is_move_mode)
+        if journal.load():
+            total, placed = journal.summary()
+            reply = QMessageBox.question(
+                self, "继续任务",
+                f"发现上次未完成的相同任务，已完成 {placed}/{total} 个文件。\n"
+                f"是否继续上次的任务? 选择“否”将重新处理全部文件。",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                log("INFO", f"继续上次的任务，已完成 {placed}/{total} 个文件")
+            else:
+                journal.discard()
+                log("INFO", "已放弃上次未完成的任务，重新处理全部文件")
+        return journal
+
     def _validate_processing_conditions(self):
         """验证处理条件是否满足
         
@@ -433,9 +457,9 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             QMessageBox.warning(self, "参数缺失", "请先选择目标文件夹")
             return False
 
-        if not self.image_files:
-            log("WARNING", "源文件夹中没有图像文件")
-            QMessageBox.warning(self, "文件缺失", "源文件夹中未发现任何图像文件")
+        if not self.source_dir or not os.path.isdir(self.source_dir):
+            log("ERROR", "源文件夹不存在或未设置")
+            QMessageBox.warning(self, "文件缺失", "源文件夹不存在，请重新选择")
             return False
 
         mode_index = self.config.get("MODE_INDEX", 0)
@@ -451,9 +475,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def stop_processing(self):
         """停止处理过程，显示确认对话框"""
+        progress_hint = ("当前进度已保存，下次开始相同的任务时可以继续。" if self.config.get("JOB_JOURNAL", True)
+                         else "当前进度将会丢失。")
         reply = QMessageBox.question(
             self, "确认停止",
-            "确定要停止处理吗? 当前进度将会丢失。",
+            f"确定要停止处理吗? {progress_hint}",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
@@ -472,6 +498,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.pushButton_start.setEnabled(True)
         self.pushButton_start.setText("开始分类")
 
+    @QtCore.pyqtSlot(int, bool)
+    def on_files_discovered(self, total, finished):
+        """处理文件扫描进度信号，扫描过程中显示当前已发现的待处理文件数"""
+        self.total_files_label.setText(str(total) if finished else f"{total}+")
+
     @QtCore.pyqtSlot(int, str)
     def on_progress_updated(self, value, _):
         """处理进度更新信号，更新进度条显示"""
@@ -480,27 +511,39 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         except (RuntimeError, ValueError, TypeError) as e:
             log("ERROR", f"更新进度条失败: {str(e)}")
 
-    @QtCore.pyqtSlot(int, int, int)
-    def on_stats_updated(self, processed, success, failed):
-        """处理统计信息更新信号，更新处理结果统计"""
+    @QtCore.pyqtSlot(dict)
+    def on_progress_snapshot(self, snapshot):
+        """处理进度快照信号，一次更新统计数字、进度条、处理速度和预计剩余时间"""
         try:
-            self.processed_label.setText(str(processed))
-            self.success_label.setText(str(success))
-            self.failed_label.setText(str(failed))
-        except (RuntimeError, ValueError, TypeError) as e:
-            log("ERROR", f"更新统计信息失败: {str(e)}")
-
-    @QtCore.pyqtSlot(list)
-    def on_processing_finished(self, results):
-        """处理完成信号，显示最终处理结果统计"""
+            self.processed_label.setText(str(snapshot['processed']))
+            self.success_label.setText(str(snapshot['success']))
+            self.failed_label.setText(str(snapshot['failed']))
+            total = snapshot['total']
+            self.total_files_label.setText(str(total) if snapshot['discovery_finished'] else f"{total}+")
+            self.progressBar.setValue(snapshot['progress'])
+            progress_format = "%p%"
+            if snapshot['throughput'] > 0:
+                progress_format += f"  {snapshot['throughput']:.1f}张/秒"
+            if snapshot['eta'] is not None and snapshot['processed'] < total:
+                progress_format += f"  剩余{timedelta(seconds=int(snapshot['eta']))}"
+            self.progressBar.setFormat(progress_format)
+        except (RuntimeError, ValueError, TypeError, KeyError) as e:
+            log("ERROR", f"更新进度失败: {str(e)}")
+
+    @QtCore.pyqtSlot(dict, object)
+    def on_processing_finished(self, summary, results):
+        """处理完成信号，根据结果摘要显示最终处理结果统计，不再遍历每个文件的结果"""
         self.processing = False
         processing_end_time = time.time()
         total_seconds = int(processing_end_time - self.processing_start_time)
         total_time = str(timedelta(seconds=total_seconds))
 
-        total_count = len(results)
-        success_count = sum(1 for r in results if r['success'])
-        failed_count = total_count - success_count
+        total_count = summary.get('total', 0)
+        success_count = summary.get('success', 0)
+        failed_count = summary.get('failed', 0)
+        if self.last_results is not None:
+            self.last_results.close()
+        self.last_results = results
         success_rate = f"{(success_count / total_count * 100) if total_count > 0 else 0:.2f}%"
 
         log("DEBUG", "=" * 50)
@@ -516,7 +559,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 f"成功识别: {success_count}\n"
                 f"识别失败: {failed_count}\n"
                 f"识别率: {success_rate}\n"
-                f"总共耗时: {total_time}"
+                + (f"分类数: {summary['classes']}\n" if summary.get('classes') is not None else "")
+                + f"总共耗时: {total_time}"
             )
             QMessageBox.information(self, "处理完成", result_message)
         self.pushButton_start.setEnabled(True)
@@ -548,6 +592,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         """配置更新时的回调方法，重新加载配置并重新初始化OCR客户端"""
         try:
             self.config = load_config()
+            utils.reload_log_settings()
+            self.log_bus.set_rate_limits(self.config.get("GUI_LOG_RATE_LIMITS"))
             self._initialize_ocr_client()
             log("INFO", "配置已更新，OCR客户端已重新初始化")
         except (RuntimeError, ValueError, TypeError, ConnectionError) as e:
@@ -621,15 +667,17 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def _finalize_close(self):
         """最终关闭应用程序"""
-        if hasattr(self.client, 'cleanup') and hasattr(self.client,
-                                                       'client_type') and self.client.client_type == 'local':
+        if hasattr(self.client, 'cleanup') and getattr(self.client, 'client_type', None) in ('local', 'paddle'):
             try:
                 self.client.cleanup()
                 log("INFO", "本地OCR资源已在应用程序关闭前释放")
             except (RuntimeError, ValueError, TypeError) as e:
                 log("ERROR", f"清理本地OCR资源失败: {str(e)}")
 
+        close_sessions()
         log("INFO", "应用程序即将关闭")
+        self.log_bus.stop()
+        utils.close_log_file()
         QApplication.quit()
 
 
@@ -0,0 +1,1457 @@
+"""
+分类处理流水线模块
+
+该模块提供ClassificationPipeline类，用于多线程处理OCR图像识别任务，
+支持速率限制、重试机制和线程安全的文件操作。模块不依赖Qt，
+界面（Thread.ProcessingThread）和命令行通过事件回调获取处理进度。
+
+处理流程分为三个阶段，各阶段之间通过有界队列衔接：
+读取阶段预读图像字节 -> 识别阶段调用OCR引擎 -> 输出阶段复制/移动文件。
+"""
+
+import concurrent.futures
+import gc
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from queue import Queue, Empty, Full
+        
+
+import requests
+
+from clients.base_client import (REQUEST_STATUS_ERROR, REQUEST_STATUS_OK, REQUEST_STATUS_THROTTLED,
+                                 REQUEST_STATUS_TIMEOUT, REQUEST_STATUS_UNREADABLE)
+from concurrency import AdaptiveConcurrencyController
+from placement import DirectoryNameIndex, PlacementEngine, TargetDirectoryCache
+from rate_limiter import get_rate_limiter
+from recognition_cache import get_recognition_cache, recognition_fingerprint
+from report_writer import create_report_writer
+from result_store import DEFAULT_SPILL_THRESHOLD, ResultStore
+from scanner import DEFAULT_IMAGE_EXTENSIONS, DirectoryScanner, FolderWatcher
+from utils import load_config, log_print, log, MODE_LOCAL
+
+# 阶段结束标记，放入阶段队列后通知下游线程退出
+_STAGE_END = object()
+
+# 单次限速等待超过该秒数时提示用户，提示之间至少间隔RATE_LIMIT_WARNING_INTERVAL秒
+RATE_LIMIT_WARNING_SECONDS = 5
+RATE_LIMIT_WARNING_INTERVAL = 30
+
+# 使用自适应并发控制的云端客户端类型
+CLOUD_CLIENT_TYPES = ('ali', 'baidu')
+
+# 每个进度快照最多附带的最近结果数
+SNAPSHOT_RECENT_RESULTS = 20
+# 计算处理速度的时间窗口（秒）
+SNAPSHOT_RATE_WINDOW = 10.0
+
+
+class ClassificationPipeline:
+    """
+    分类处理流水线
+
+    负责管理OCR图像处理的多线程任务，包括速率限制、重试机制
+    和线程安全的文件复制/移动操作。
+
+    处理进度以事件形式交给listener(name, *args)，事件名称与参数：
+        file_processed(result), processing_finished(summary, results), processing_stopped(),
+        progress_snapshot(snapshot), rate_limit_warning(message),
+        progress_updated(percent, message), error_occurred(message),
+        files_discovered(total, finished)
+
+    识别和输出线程只更新计数，信号处理线程每隔PROGRESS_SNAPSHOT_INTERVAL秒汇总发出一次progress_snapshot，
+    事件数量与处理速度无关。file_processed逐个文件发出，只在per_file_events为True时启用。
+    """
+
+    def __init__(self, client, image_files, dest_dir, is_move_mode, journal=None, scan_index=None,
+                 source_dir=None, extensions=None, listener=None, config_overrides=None, keep_results=True,
+                 feed_batch_size=256, per_file_events=True, report_writer=None):
+        """
+        初始化处理流水线
+
+        Args:
+            client: OCR客户端实例
+            image_files: 要处理的图像文件，可以是列表或按需产生路径的迭代器，为None时在处理过程中扫描source_dir
+            dest_dir: 目标目录，为None时只识别不放置文件
+            is_move_mode: 是否为移动模式
+            journal: 可选的JobJournal，记录每个文件的进度并跳过上次已完成的文件
+            scan_index: 可选的ScanIndex，跳过上次已分类且未变化的文件
+            source_dir: 源文件夹，边扫描边处理，扫描到的文件立即进入流水线
+            extensions: 扫描源文件夹时允许的文件扩展名
+            listener: 事件回调函数，参数为(事件名称, *事件参数)
+            config_overrides: 覆盖配置文件的设置，例如命令行参数
+            keep_results: 是否在ResultStore中保留全部结果供processing_finished使用，逐个消费结果时可关闭
+            feed_batch_size: image_files每次取出多少个文件送入流水线
+            per_file_events: 是否为每个文件发出file_processed事件，界面只需要进度快照时关闭
+            report_writer: 运行报告写入器（report_writer.ReportWriter），为None时按REPORT_FORMAT配置创建
+        """
+        self.listener = listener
+        self.per_file_events = per_file_events
+        self.config_overrides = dict(config_overrides or {})
+        self.source_dir = source_dir
+        self.extensions = tuple(extensions) if extensions else DEFAULT_IMAGE_EXTENSIONS
+        self.scanner = None
+        self.journal = journal
+        self.scan_index = scan_index
+        self.client_config = client.config if hasattr(client, 'config') else {}
+        self.image_files = image_files
+        self.dest_dir = dest_dir
+        self.is_move_mode = is_move_mode
+        self.is_running = True
+        self.stopping = False  # 标记线程是否正在停止过程中
+        self.processed_count = 0
+        self.success_count = 0
+        self.failed_count = 0
+        self.counter_lock = threading.Lock()
+        # 分类文件夹中已占用的文件名，同名文件的编号在内存中分配
+        self.name_index = DirectoryNameIndex()
+        # 识别结果到已创建分类文件夹的映射，每个分类只创建一次文件夹
+        self.target_dirs = TargetDirectoryCache(self._sanitize_folder_name)
+        self.lock = threading.Lock()
+        cpu_count = os.cpu_count() or 4
+        
+        # 直接使用传入的client参数，不再重新创建客户端实例
+        self.shared_client = client
+        self.client_type = getattr(client, 'client_type', 'unknown')
+        
+        if self.client_type == 'local' or self.client_type == 'paddle':
+            # 多进程本地客户端每个模型副本对应一个识别线程
+            self.worker_count = getattr(client, 'replicas', 1)
+        else:
+            if cpu_count <= 4:
+                self.worker_count = 1
+            else:
+                self.worker_count = min(max(2, cpu_count // 4), 4)
+        
+        self.snapshot_interval = 0.25
+        self.recent_results = deque(maxlen=SNAPSHOT_RECENT_RESULTS)
+        self.discovery_finished = False
+        self.started_at = None
+        self.rate_samples = deque()
+        self.max_requests_per_minute = 60
+        self.backoff_factor = 2.0
+        self.request_interval = 0.5
+        self.max_backoff_time = 30
+        self.request_timeout = 60
+        self.reader_count = 2
+        self.read_queue_size = 0
+        self.output_count = 4
+        self.output_queue_size = 64
+        self.local_batch_size = 8
+        self.batch_max_wait = 0.05
+        self.scan_workers = 4
+        self.file_queue_size = 4096
+        self.watch_mode = False
+        self.watch_latency = 5.0
+        self.config = {}
+        self._load_config()
+        self.rate_limit_burst = max(1, int(self.config.get("RATE_LIMIT_BURST", 1)))
+        # 只有云端服务按提供商限速，本地引擎的吞吐量随模型副本数扩展
+        self.rate_limiter = None
+        if self.client_type in CLOUD_CLIENT_TYPES:
+            self.rate_limiter = get_rate_limiter(
+                self.client_type, self.max_requests_per_minute,
+                burst=self.rate_limit_burst, min_interval=self.request_interval)
+        self.rate_limit_wait_total = 0.0
+        self.rate_limit_wait_count = 0
+        self.last_rate_limit_warning_time = 0
+        self.ocr_thread_count = self.worker_count
+        self.concurrency_controller = None
+        if self.client_type in CLOUD_CLIENT_TYPES and self.config.get("ADAPTIVE_CONCURRENCY", True):
+            # 按并发上限准备识别线程，实际同时进行的请求数由控制器动态调整
+            max_concurrency = max(self.worker_count, int(self.config.get("MAX_CONCURRENCY", 16)))
+            self.concurrency_controller = AdaptiveConcurrencyController(
+                self.worker_count, min_limit=1, max_limit=max_concurrency,
+                rate_per_minute=self.max_requests_per_minute, name=self.client_type)
+            self.ocr_thread_count = max_concurrency
+        # 识别结果缓存，指纹包含影响识别结果的配置，配置变化后旧结果不会被误用
+        self.recognition_cache = None
+        self.cache_fingerprint = recognition_fingerprint(client, self.config)
+        if self.config.get("RECOGNITION_CACHE", True):
+            self.recognition_cache = get_recognition_cache(
+                int(self.config.get("RECOGNITION_CACHE_MB", 64)) * 1024 * 1024)
+        self.placement = PlacementEngine(self.config.get("PLACEMENT_STRATEGY", "auto"))
+        # 云端识别执行器: thread为每个请求占用一个线程，async为单事件循环的异步引擎
+        self.cloud_executor = str(self.config.get("CLOUD_EXECUTOR", "thread")).lower()
+        self.async_engine = None
+        self.pending_futures = None
+        self.collector_thread = None
+        self.total_files = 0
+        # 监视模式下只监视源文件夹，文件列表由调用方给出时没有可监视的目录
+        self.watch_mode = self.watch_mode and image_files is None and bool(source_dir)
+        self.watcher = None
+        self.deferred_count = 0
+        # 监视模式可能连续运行很长时间，只保留统计数字，避免结果列表无限增长
+        self.keep_results = keep_results and not self.watch_mode
+        self.feed_batch_size = max(1, int(feed_batch_size))
+        # 待读取队列有界，扫描或监视发现文件的速度超过处理速度时暂停送入
+        self.file_queue = Queue(maxsize=self.file_queue_size)
+        self.read_queue = None
+        self.output_queue = None
+        self.report_writer = report_writer
+        if self.report_writer is None and self.config.get("REPORT_FORMAT") and dest_dir is not None:
+            try:
+                # 报告默认写入REPORTS_DIR，不放在目标文件夹中，避免被当作分类文件夹的内容
+                self.report_writer = create_report_writer(
+                    fmt=self.config["REPORT_FORMAT"], directory=self.config.get("REPORT_DIR") or None)
+            except (ValueError, OSError) as e:
+                log("WARNING", f"无法创建运行报告: {str(e)}")
+        # 启用运行报告时记录每个文件的读取耗时和读取完成时间，识别完成时取出
+        self.stage_marks = {}
+        # 结果按列紧凑保存，超过RESULT_SPILL_THRESHOLD条后写入临时文件
+        self.results = ResultStore(self.config.get("RESULT_SPILL_THRESHOLD", DEFAULT_SPILL_THRESHOLD)) \
+            if self.keep_results else None
+        self.workers = []
+        self.reader_threads = []
+        self.output_threads = []
+        self.signal_queue = Queue()
+        self.signal_processor_running = True
+        self.signal_processor_thread = None
+        
+        log_print(f"[线程初始化] 使用{self.client_type} OCR客户端")
+
+    def _load_config(self):
+        """加载并应用配置文件设置"""
+        try:
+            new_config = dict(load_config())
+            new_config.update(self.config_overrides)
+            cpu_count = os.cpu_count() or 4
+            default_worker_count = min(max(1, cpu_count // 8), 1)
+            new_worker_count = new_config.get("CONCURRENCY", default_worker_count)
+            new_max_requests_per_minute = new_config.get("MAX_REQUESTS_PER_MINUTE", 60)
+            new_backoff_factor = new_config.get("BACKOFF_FACTOR", 2.0)
+            new_request_interval = new_config.get("REQUEST_INTERVAL", 0.5)
+            new_max_backoff_time = new_config.get("MAX_BACKOFF_TIME", 30)
+            new_request_timeout = new_config.get("REQUEST_TIMEOUT", 60)
+            self.reader_count = max(1, int(new_config.get("READER_WORKERS", 2)))
+            self.read_queue_size = max(0, int(new_config.get("READ_QUEUE_SIZE", 0)))
+            self.output_count = max(1, int(new_config.get("OUTPUT_WORKERS", 4)))
+            self.output_queue_size = max(1, int(new_config.get("OUTPUT_QUEUE_SIZE", 64)))
+            self.local_batch_size = max(1, int(new_config.get("LOCAL_BATCH_SIZE", 8)))
+            self.batch_max_wait = max(0, int(new_config.get("BATCH_MAX_WAIT_MS", 50))) / 1000.0
+            self.scan_workers = max(1, int(new_config.get("SCAN_WORKERS", 4)))
+            self.file_queue_size = max(1, int(new_config.get("FILE_QUEUE_SIZE", 4096)))
+            self.watch_mode = bool(new_config.get("WATCH_MODE", False))
+            self.watch_latency = max(1.0, float(new_config.get("WATCH_LATENCY_SECONDS", 5.0)))
+            self.snapshot_interval = max(0.05, float(new_config.get("PROGRESS_SNAPSHOT_INTERVAL", 0.25)))
+            config_changed = False
+            if self.client_type == 'local' or self.client_type == 'paddle':
+                local_worker_count = getattr(self.shared_client, 'replicas', 1)
+                if self.worker_count != local_worker_count:
+                    self.worker_count = local_worker_count
+                    config_changed = True
+            elif new_worker_count != self.worker_count:
+                self.worker_count = new_worker_count
+                config_changed = True
+            if new_max_requests_per_minute != self.max_requests_per_minute:
+                self.max_requests_per_minute = new_max_requests_per_minute
+                config_changed = True
+            if new_backoff_factor != self.backoff_factor:
+                self.backoff_factor = new_backoff_factor
+                config_changed = True
+            if new_request_interval != self.request_interval:
+                self.request_interval = new_request_interval
+                config_changed = True
+            if new_max_backoff_time != self.max_backoff_time:
+                self.max_backoff_time = new_max_backoff_time
+                config_changed = True
+            if new_request_timeout != self.request_timeout:
+                self.request_timeout = new_request_timeout
+                config_changed = True
+            self.config = new_config
+            if config_changed:
+                log("WARNING",
+                    f"配置: 工作线程数={self.worker_count}, 请求限制={self.max_requests_per_minute}次/分钟")
+        except (FileNotFoundError, PermissionError, OSError, ValueError, TypeError) as e:
+            self.max_requests_per_minute = 60
+            cpu_count = os.cpu_count() or 4
+            self.worker_count = min(max(1, cpu_count // 2), 8)
+            self.backoff_factor = 2.0
+            self.request_interval = 0.5
+            self.max_backoff_time = 30
+            self.request_timeout = 60
+            error_msg = f"配置加载失败: {str(e)}"
+            log("ERROR", f"配置文件加载失败: {str(e)}, 使用默认设置")
+            self._notify('error_occurred', error_msg)
+
+    def run(self):
+        try:
+            if self.image_files is None and not self.source_dir:
+                log("INFO", "没有需要处理的图像文件")
+                self._notify('processing_finished', self._run_summary(), None)
+                return
+
+            self.started_at = time.monotonic()
+            self._publish_snapshot()
+            self._notify('progress_updated', 0, "开始处理...")
+
+            if self.dest_dir is not None:
+                existing_dirs = self.target_dirs.warm(self.dest_dir)
+                log_print(f"[文件放置] 目标文件夹中已有{existing_dirs}个分类文件夹")
+
+            # 读取队列默认按识别线程数放大，保证识别线程始终有预读好的图像可用
+            read_queue_size = self.read_queue_size or max(4, self.worker_count * 4)
+            self.read_queue = Queue(maxsize=read_queue_size)
+            self.output_queue = Queue(maxsize=self.output_queue_size)
+            log_print(f"[流水线] 读取线程:{self.reader_count}(队列{read_queue_size}), "
+                      f"识别线程:{self.ocr_thread_count}(初始并发{self.worker_count}), "
+                      f"输出线程:{self.output_count}(队列{self.output_queue_size})")
+
+            use_async = self.cloud_executor == 'async' and self.client_type in CLOUD_CLIENT_TYPES
+            if use_async:
+                # 先启动异步引擎，凭据无效时在启动其他处理线程之前失败
+                self._start_async_stage()
+
+            self.signal_processor_thread = threading.Thread(target=self._signal_processor, daemon=True)
+            self.signal_processor_thread.start()
+
+            for i in range(self.output_count):
+                writer = threading.Thread(target=self._output_worker, args=(i,), daemon=True)
+                self.output_threads.append(writer)
+                writer.start()
+
+            if not use_async:
+                worker_target = self._batch_worker if self._use_batch_recognition() else self._worker
+                for i in range(self.ocr_thread_count):
+                    worker = threading.Thread(target=worker_target, args=(i,), daemon=True)
+                    self.workers.append(worker)
+                    worker.start()
+
+            for i in range(self.reader_count):
+                reader = threading.Thread(target=self._reader_worker, args=(i,), daemon=True)
+                self.reader_threads.append(reader)
+                reader.start()
+
+            # 各阶段已就绪，边扫描边把文件送入流水线，扫描结束后通知读取线程退出
+            self._feed_files()
+            if self.watch_mode:
+                self._watch_source()
+            for _ in self.reader_threads:
+                if not self._put_file(_STAGE_END):
+                    break
+
+            # 按阶段顺序等待结束：上游全部退出后再向下游发送结束标记
+            for reader in self.reader_threads:
+                reader.join()
+            for _ in self.workers:
+                self.read_queue.put(_STAGE_END)
+
+            for worker in self.workers:
+                worker.join()
+            if self.collector_thread is not None:
+                self.collector_thread.join()
+            for _ in self.output_threads:
+                self.output_queue.put(_STAGE_END)
+
+            for writer in self.output_threads:
+                writer.join()
+
+            # 输出线程全部结束后不会再有新信号，信号处理线程处理完剩余信号后退出；
+            # 停止处理时信号处理线程会提前退出，此时不能等待信号队列清空
+            self.signal_processor_running = False
+            self.signal_processor_thread.join()
+            self._publish_snapshot(force=True)
+
+            if self.scan_index is not None:
+                self.scan_index.close()
+            if self.journal is not None:
+                # 监视模式只能手动停止，停止时已发现的文件都已放置则视为任务完成
+                watch_done = self.watch_mode and not self.deferred_count and self.processed_count >= self.total_files
+                if self.is_running or watch_done:
+                    self.journal.complete()
+                else:
+                    self.journal.close()
+                    log("INFO", "任务进度已保存，下次开始相同的任务时可以继续")
+
+            self._notify('processing_finished', self._run_summary(), self.results)
+            self._notify('progress_updated', 100, "处理完成")
+            if self.total_files or not self.is_running:
+                log("INFO",
+                    f"处理完成: 共{self.processed_count}个文件，成功{self.success_count}个，失败{self.failed_count}个")
+            if self.recognition_cache is not None:
+                self.recognition_cache.flush()
+                stats = self.recognition_cache.get_stats()
+                log_print(f"[识别缓存] 命中{stats['hits']}次, 共享{stats['shared']}次, 未命中{stats['misses']}次, "
+                          f"占用{stats['bytes'] / 1024 / 1024:.1f}MB")
+            placement_stats = self.placement.get_stats()
+            if placement_stats:
+                log_print("[文件放置] " + ", ".join(f"{method}:{count}" for method, count in placement_stats.items()))
+            if self.rate_limit_wait_count:
+                log_print(f"[速率限制] 等待{self.rate_limit_wait_count}次, "
+                          f"累计{self.rate_limit_wait_total:.2f}秒")
+            log_print(
+                f"[处理统计] 总文件:{self.processed_count}, 成功:{self.success_count}, 失败:{self.failed_count}")
+            if self.report_writer is not None:
+                self.report_writer.close()
+                log("INFO", f"运行报告已保存: {self.report_writer.path}（{self.report_writer.count}条记录）")
+
+        except (ValueError, RuntimeError) as e:
+            error_msg = f"处理过程中发生致命错误: {str(e)}"
+            log_print(f"[工作线程] 处理文件出错: {str(e)}")
+            self._notify('error_occurred', error_msg)
+            self._notify('processing_finished', self._run_summary(), self.results)
+        finally:
+            self._cleanup_resources()
+
+    def _discover_files(self):
+        """
+        逐批产生要处理的文件，指定了源文件夹时在后台并行扫描
+
+        Yields:
+            list: 文件路径列表
+        """
+        if self.image_files is not None:
+            files = iter(self.image_files)
+            while True:
+                batch = list(itertools.islice(files, self.feed_batch_size))
+                if not batch:
+                    return
+                yield batch
+
+        self.scanner = DirectoryScanner(self.source_dir, self.extensions, workers=self.scan_workers)
+        self.scanner.start()
+        yield from self.scanner.batches()
+        log("DEBUG", f"扫描完成，发现 {self.scanner.found_count} 个图像文件"
+                     f"(共{self.scanner.dir_count}个文件夹)")
+
+    def _feed_files(self):
+        """
+        将扫描到的文件按扫描索引和任务日志筛选后送入流水线
+
+        待处理文件总数随扫描进度增长，扫描结束后才是最终值。
+        """
+        indexed = self.scan_index.load() if self.scan_index is not None else 0
+        if self.journal is not None:
+            try:
+                self.journal.open()
+            except OSError as e:
+                log("WARNING", f"任务日志不可用，本次处理无法断点续传: {str(e)}")
+                self.journal = None
+
+        self.unchanged_total = 0
+        self.skipped_total = 0
+        self.replay_total = 0
+        if self.watch_mode:
+            self.watcher = FolderWatcher(self.source_dir, self.extensions, workers=self.scan_workers)
+        for batch in self._discover_files():
+            if not self.is_running:
+                break
+            if self.watcher is not None:
+                self.watcher.mark_seen(batch)
+            self._submit_files(batch)
+
+        if self.scanner is not None and not self.is_running:
+            self.scanner.cancel()
+        if self.journal is not None:
+            self.journal.flush()
+        self.discovery_finished = not self.watch_mode and self.is_running
+        self._notify('files_discovered', self.total_files, not self.watch_mode)
+
+        if self.unchanged_total:
+            log("INFO", f"增量处理: 跳过{self.unchanged_total}个已分类且未变化的文件(索引{indexed}个)")
+        if self.skipped_total or self.replay_total:
+            log("INFO", f"继续上次的任务: 跳过已完成的{self.skipped_total}个文件, "
+                        f"{self.replay_total}个已识别的文件直接放置")
+        if not self.total_files and self.is_running and not self.watch_mode:
+            log("INFO", "没有新增或变化的文件需要处理" if self.unchanged_total or self.skipped_total
+                else "没有需要处理的图像文件")
+
+    def _submit_files(self, files):
+        """
+        按扫描索引和任务日志筛选一批文件并送入流水线
+
+        Args:
+            files: 文件路径列表
+        """
+        if self.scan_index is not None:
+            files, unchanged = self.scan_index.filter_changed(files)
+            self.unchanged_total += unchanged
+
+        pending_files, replay = files, []
+        if self.journal is not None:
+            pending_files, replay = self.journal.select(files)
+            self.skipped_total += len(files) - len(pending_files) - len(replay)
+            self.replay_total += len(replay)
+
+        with self.counter_lock:
+            self.total_files += len(pending_files) + len(replay)
+        self._notify('files_discovered', self.total_files, False)
+
+        for file_path in pending_files:
+            if not self._put_file(file_path):
+                return
+        # 上次已识别但尚未放置的文件直接进入输出阶段，不再重新识别
+        for file_path, recognition in replay:
+            if not self.is_running:
+                return
+            self.output_queue.put((file_path, {
+                'filename': os.path.basename(file_path),
+                'success': True,
+                'result': recognition,
+                'recognition': recognition,
+                'attempts': 0,
+                'resumed': True
+            }))
+
+    def _put_file(self, item):
+        """
+        将文件放入有界的待读取队列，队列已满时等待，停止处理后放弃
+
+        Returns:
+            bool: 是否已放入队列
+        """
+        while self.is_running:
+            try:
+                self.file_queue.put(item, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _watch_source(self):
+        """
+        监视模式：持续扫描源文件夹，新文件写入完成后立即送入流水线，直到手动停止
+
+        模型、识别线程和速率限制器在整个监视期间保持不变，限速按整个会话累计。
+        """
+        interval = self.watch_latency / 2
+        log("INFO", f"正在监视源文件夹，新文件约{self.watch_latency:g}秒内开始识别，点击停止结束监视")
+        self._notify('progress_updated', 0, "正在监视...")
+        while self.is_running:
+            deadline = time.time() + interval
+            while self.is_running and time.time() < deadline:
+                time.sleep(min(0.2, interval))
+            if not self.is_running:
+                break
+            try:
+                ready = self.watcher.poll()
+            except OSError as e:
+                log("WARNING", f"监视源文件夹失败: {str(e)}")
+                continue
+            if ready:
+                log("INFO", f"监视: 发现{len(ready)}个新文件")
+                self._submit_files(ready)
+                if self.journal is not None:
+                    self.journal.flush()
+
+    def _emit_result(self, file_path, result):
+        """将识别结果交给输出阶段，识别成功的结果先记入任务日志"""
+        marks = self.stage_marks.pop(file_path, None)
+        if marks is not None:
+            result['read_ms'] = marks[0]
+            result['recognize_ms'] = round((time.monotonic() - marks[1]) * 1000, 1)
+        if self.journal is not None and result.get('success'):
+            self.journal.record_recognized(file_path, result.get('recognition') or result.get('result'))
+        self.output_queue.put((file_path, result))
+
+    def _cleanup_resources(self):
+        self.is_running = False
+
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.join(timeout=1.0)
+
+        self.signal_processor_running = False
+        if self.signal_processor_thread and self.signal_processor_thread.is_alive():
+            self.signal_processor_thread.join(timeout=1.0)
+
+    def _reader_worker(self, reader_id):
+        """读取线程处理函数，预读图像字节并放入有界读取队列"""
+        while True:
+            try:
+                file_path = self.file_queue.get(timeout=0.5)
+            except Empty:
+                if not self.is_running:
+                    break
+                continue
+            if file_path is _STAGE_END:
+                self.file_queue.task_done()
+                break
+            if not self.is_running:
+                # 停止后丢弃扫描线程仍在送入的文件
+                self.file_queue.task_done()
+                continue
+
+            image_source = None
+            read_error = None
+            read_started = time.monotonic()
+            try:
+                with open(file_path, 'rb') as f:
+                    image_source = f.read()
+            except FileNotFoundError:
+                read_error = f"文件不存在: {file_path}"
+                log("ERROR", read_error)
+            except OSError as e:
+                read_error = f"读取文件失败: {str(e)}"
+                log("ERROR", f"{read_error} ({file_path})")
+            finally:
+                self.file_queue.task_done()
+            if self.report_writer is not None:
+                read_done = time.monotonic()
+                self.stage_marks[file_path] = (round((read_done - read_started) * 1000, 1), read_done)
+
+            # 队列已满时阻塞，限制预读占用的内存
+            self.read_queue.put((file_path, image_source, read_error))
+        log_print(f"读取线程 {reader_id + 1} 已结束")
+
+    def _worker(self, worker_id):
+        """识别线程处理函数，从读取队列中获取图像字节并执行OCR识别"""
+        client = self.shared_client
+
+        while True:
+            item = self.read_queue.get()
+            if item is _STAGE_END:
+                break
+
+            file_path, image_source, read_error = item
+            if not self.is_running:
+                # 停止后丢弃已预读但尚未开始识别的文件，与队列中未处理的文件一致
+                continue
+
+            try:
+                if read_error:
+                    result = {
+                        'filename': os.path.basename(file_path),
+                        'success': False,
+                        'error': read_error
+                    }
+                else:
+                    result = self.rate_limited_process(file_path, client, image_source)
+            except (requests.exceptions.RequestException, json.JSONDecodeError, RuntimeError, OSError) as e:
+                error_msg = f"工作线程 {worker_id + 1} 处理文件时出错: {str(e)}"
+                log_print(error_msg)
+                result = {
+                    'filename': os.path.basename(file_path),
+                    'success': False,
+                    'error': f'处理过程中发生异常: {str(e)}'
+                }
+                self.signal_queue.put(('error_occurred', error_msg))
+
+            self._emit_result(file_path, result)
+        log_print(f"工作线程 {worker_id + 1} 已结束")
+
+    def _use_batch_recognition(self):
+        """本地客户端提供recognize_batch且批量大小大于1时启用批量识别"""
+        return (self.client_type in ('local', 'paddle') and self.local_batch_size > 1
+                and callable(getattr(self.shared_client, 'recognize_batch', None)))
+
+    def _batch_worker(self, worker_id):
+        """批量识别线程处理函数
+
+        取到第一张图像后最多再等待batch_max_wait秒凑批，凑满local_batch_size或超时即提交，
+        队列中积压越多批次越大，文件稀疏时单张图像的额外延迟不超过batch_max_wait。
+        """
+        client = self.shared_client
+        stage_ended = False
+
+        while not stage_ended:
+            item = self.read_queue.get()
+            if item is _STAGE_END:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.batch_max_wait
+            while len(batch) < self.local_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.read_queue.get(timeout=remaining) if remaining > 0 else self.read_queue.get_nowait()
+                except Empty:
+                    break
+                if item is _STAGE_END:
+                    stage_ended = True
+                    break
+                batch.append(item)
+
+            if not self.is_running:
+                # 停止后丢弃已预读但尚未开始识别的文件，与队列中未处理的文件一致
+                continue
+
+            try:
+                for file_path, result in self._process_batch(batch, client):
+                    self._emit_result(file_path, result)
+            except (RuntimeError, OSError, ValueError, TypeError) as e:
+                if not self.is_running:
+                    continue
+                error_msg = f"工作线程 {worker_id + 1} 批量处理文件时出错: {str(e)}"
+                log_print(error_msg)
+                self.signal_queue.put(('error_occurred', error_msg))
+                for file_path, _, _ in batch:
+                    self._emit_result(file_path, {
+                        'filename': os.path.basename(file_path),
+                        'success': False,
+                        'error': f'处理过程中发生异常: {str(e)}'
+                    })
+        log_print(f"工作线程 {worker_id + 1} 已结束")
+
+    def _process_batch(self, batch, client):
+        """
+        批量识别一组预读的图像
+
+        Args:
+            batch: (文件路径, 图像字节, 读取错误) 列表
+            client: 提供recognize_batch的OCR客户端
+
+        Returns:
+            list: (文件路径, 结果字典) 列表，顺序与输入一致
+        """
+        cache = self.recognition_cache
+        outputs = []
+        pending = []
+        waiting = []
+        for file_path, image_source, read_error in batch:
+            if read_error:
+                outputs.append((file_path, {'filename': os.path.basename(file_path),
+                                            'success': False, 'error': read_error}))
+                continue
+
+            key = None
+            if cache is not None:
+                key = cache.make_key(image_source, self.cache_fingerprint)
+                state, value = cache.begin(key)
+                if state == "hit":
+                    outputs.append((file_path, self._result_from_outcome(file_path, value)))
+                    continue
+                if state == "wait":
+                    # 相同内容正在识别，本批识别完成后再等待，避免与本批内的同内容图像互相等待
+                    waiting.append((file_path, image_source, value))
+                    continue
+            # 每张图像仍各自获取一次许可，批量识别不改变限速语义
+            try:
+                waited = self._check_rate_limit()
+            except RuntimeError:
+                # 本批已登记的识别同样要放弃，否则缓存是进程共享的，之后的任务会一直等待这些识别
+                self._abandon_keys([key] + [pending_key for _, _, pending_key, _ in pending])
+                raise
+            pending.append((file_path, image_source, key, waited))
+
+        if pending:
+            try:
+                recognitions = list(client.recognize_batch([image_source for _, image_source, _, _ in pending]))
+            except BaseException:
+                self._abandon_keys([key for _, _, key, _ in pending])
+                raise
+            for index, (file_path, _, key, waited) in enumerate(pending):
+                # 每张图像使用各自的请求状态，缺少结果的图像视为识别出错
+                recognition, status = recognitions[index] if index < len(recognitions) \
+                    else (None, REQUEST_STATUS_ERROR)
+                recognition = recognition if isinstance(recognition, str) else None
+                outcome = {'result': recognition, 'status': status, 'attempts': 1,
+                           'error': None if recognition else '未识别到有效结果'}
+                if key is not None:
+                    cache.finish(key, outcome, store=self._should_cache(outcome))
+                result = self._result_from_outcome(file_path, outcome)
+                result['rate_limit_wait'] = round(waited, 3)
+                outputs.append((file_path, result))
+
+        for file_path, image_source, flight in waiting:
+            outcome = cache.wait(flight, is_cancelled=lambda: not self.is_running)
+            if outcome is not None:
+                outputs.append((file_path, self._result_from_outcome(file_path, outcome)))
+            else:
+                outputs.append((file_path, self.rate_limited_process(file_path, client, image_source)))
+        return outputs
+
+    def _abandon_keys(self, keys):
+        """放弃本线程登记的进行中识别，等待这些图像的线程各自重新识别"""
+        for key in keys:
+            if key is not None:
+                self.recognition_cache.abandon(key)
+
+    def _start_async_stage(self):
+        """启动异步识别阶段：一个分发线程提交请求，一个收集线程按提交顺序输出结果"""
+        # 延迟导入，只有启用异步执行器时才需要httpx
+        from clients.async_engine import AsyncCloudEngine
+
+        max_in_flight = max(1, int(self.config.get("ASYNC_MAX_IN_FLIGHT", 256)))
+        max_attempts = self.config.get("RETRY_TIMES", 3) if self.config else 3
+        self.async_engine = AsyncCloudEngine(
+            self.shared_client,
+            max_in_flight=max_in_flight,
+            request_timeout=self.request_timeout,
+            max_retries=max_attempts,
+            backoff_factor=self.backoff_factor,
+            max_backoff_time=self.max_backoff_time,
+            rate_limiter=self.rate_limiter,
+            max_connections=int(self.config.get("ASYNC_MAX_CONNECTIONS", 64)),
+            concurrency_controller=self.concurrency_controller)
+        self.async_engine.start()
+        self.pending_futures = Queue(maxsize=max_in_flight)
+
+        dispatcher = threading.Thread(target=self._async_dispatcher, daemon=True)
+        self.workers.append(dispatcher)
+        dispatcher.start()
+        self.collector_thread = threading.Thread(target=self._async_collector, daemon=True)
+        self.collector_thread.start()
+
+    def _async_dispatcher(self):
+        """异步分发线程：将预读的图像提交给异步引擎，相同内容的图像只提交一次"""
+        cache = self.recognition_cache
+        while True:
+            item = self.read_queue.get()
+            if item is _STAGE_END:
+                self.pending_futures.put(_STAGE_END)
+                break
+
+            file_path, image_source, read_error = item
+            if not self.is_running:
+                continue
+
+            if read_error:
+                future = concurrent.futures.Future()
+                future.set_result({'result': None, 'status': REQUEST_STATUS_ERROR, 'attempts': 0,
+                                   'error': read_error})
+                self.pending_futures.put((file_path, future, None))
+                continue
+
+            key = None
+            if cache is not None:
+                key = cache.make_key(image_source, self.cache_fingerprint)
+                state, value = cache.begin(key)
+                if state == "hit":
+                    future = concurrent.futures.Future()
+                    future.set_result(value)
+                    self.pending_futures.put((file_path, future, None))
+                    continue
+                if state == "wait":
+                    # 相同内容的请求已经提交，由收集线程等待其结果，不再重复发送
+                    self.pending_futures.put((file_path, None, (value, image_source)))
+                    continue
+            try:
+                future = self._submit_async(image_source, key)
+            except RuntimeError as e:
+                if key is not None:
+                    cache.abandon(key)
+                log_print(f"[异步引擎] 提交识别请求失败: {str(e)}")
+                continue
+            self.pending_futures.put((file_path, future, None))
+        log_print("异步分发线程已结束")
+
+    def _submit_async(self, image_source, key=None):
+        """
+        向异步引擎提交一张图像，请求结束时结束缓存中登记的进行中识别
+
+        Args:
+            image_source: 图像字节数据
+            key: begin返回owner的缓存键，为None时不写入缓存
+
+        Returns:
+            concurrent.futures.Future: 识别结果字典
+        """
+        future = self.async_engine.submit(image_source, is_cancelled=lambda: not self.is_running)
+        if key is not None:
+            future.add_done_callback(lambda done: self._finish_async_key(key, done))
+        return future
+
+    def _finish_async_key(self, key, future):
+        """在请求结束时（事件循环线程中）写入缓存并唤醒等待相同图像的线程"""
+        if future.cancelled() or future.exception() is not None:
+            self.recognition_cache.abandon(key)
+            return
+        outcome = future.result()
+        self.recognition_cache.finish(key, outcome, store=self._should_cache(outcome))
+
+    def _async_collector(self):
+        """异步收集线程：按提交顺序等待识别结果并交给输出阶段"""
+        while True:
+            item = self.pending_futures.get()
+            if item is _STAGE_END:
+                break
+
+            file_path, future, shared = item
+            try:
+                outcome = future.result() if shared is None else self._await_shared(*shared)
+            except concurrent.futures.CancelledError:
+                outcome = None
+            if outcome is None:
+                # 停止处理时取消的请求不再输出，与未开始处理的文件一致
+                continue
+            result = self._result_from_outcome(file_path, outcome)
+            waited = outcome.get('rate_limit_wait')
+            if waited is not None and not outcome.get('cached'):
+                result['rate_limit_wait'] = round(waited, 3)
+                if waited > 0:
+                    with self.counter_lock:
+                        self.rate_limit_wait_total += waited
+                        self.rate_limit_wait_count += 1
+            self._emit_result(file_path, result)
+        log_print("异步收集线程已结束")
+
+    def _await_shared(self, flight, image_source):
+        """
+        等待相同内容的请求结束并共享其结果；该请求失败或被放弃时重新提交
+
+        Returns:
+            Optional[dict]: 识别结果字典，停止处理时返回None
+        """
+        outcome = self.recognition_cache.wait(flight, is_cancelled=lambda: not self.is_running)
+        if outcome is not None or not self.is_running:
+            return outcome
+        try:
+            return self._submit_async(image_source).result()
+        except RuntimeError as e:
+            log_print(f"[异步引擎] 提交识别请求失败: {str(e)}")
+            return None
+
+    def _result_from_outcome(self, file_path, outcome):
+        """将识别结果（result/status/attempts/error）转换为输出阶段使用的结果字典"""
+        filename = os.path.basename(file_path)
+        recognition = outcome.get('result')
+        cached = outcome.get('cached', False)
+        source = "(缓存)" if cached else ""
+        if recognition:
+            log("DEBUG", f"{self.client_type} OCR识别成功{source}: {filename}, 结果: {recognition}")
+            log_print(f"OCR识别成功{source}: {filename}, 结果: {recognition}")
+            return {
+                'filename': filename,
+                'success': True,
+                'result': recognition,
+                'recognition': recognition,
+                'attempts': outcome.get('attempts', 0),
+                'cached': cached
+            }
+
+        error_msg = outcome.get('error') or '未识别到有效结果'
+        log("ERROR", f"文件 {filename} 识别失败{source}: {error_msg}")
+        log_print(f"文件 {filename} 识别失败{source}: {error_msg}")
+        return {'filename': filename, 'success': False, 'error': error_msg,
+                'attempts': outcome.get('attempts', 0), 'cached': cached}
+
+    def _output_worker(self, writer_id):
+        """输出线程处理函数，更新统计并将文件复制/移动到分类文件夹"""
+        while True:
+            item = self.output_queue.get()
+            if item is _STAGE_END:
+                break
+
+            file_path, result = item
+            try:
+                self._finalize_result(file_path, result)
+            except (OSError, RuntimeError, ValueError, TypeError) as e:
+                log_print(f"输出线程 {writer_id + 1} 处理文件时出错: {str(e)}")
+        log_print(f"输出线程 {writer_id + 1} 已结束")
+
+    def _finalize_result(self, file_path, result):
+        """记录单个文件的处理结果，并放置到对应的分类文件夹"""
+        with self.lock:
+            self.processed_count += 1
+            if result['success']:
+                with self.counter_lock:
+                    self.success_count += 1
+            else:
+                with self.counter_lock:
+                    self.failed_count += 1
+
+        # 文件复制不占用共享锁，识别线程可以同时继续工作
+        place_started = time.monotonic()
+        if self.dest_dir is None:
+            target_path = None
+        elif result['success']:
+            recognition = result.get('recognition') or result.get('result')
+            target_path = self.copy_to_classified_folder(file_path, recognition, self.dest_dir, self.is_move_mode)
+        elif self.is_running or self.journal is None:
+            target_path = self.copy_to_classified_folder(file_path, '识别失败', self.dest_dir, self.is_move_mode)
+        else:
+            # 停止处理后的失败多为取消导致，不放入失败文件夹，继续任务时重新识别
+            target_path = None
+            with self.counter_lock:
+                self.deferred_count += 1
+        if target_path and self.journal is not None:
+            self.journal.record_placed(file_path, target_path)
+        if target_path and result['success'] and self.scan_index is not None:
+            self.scan_index.record(file_path, recognition)
+
+        result['file_path'] = file_path
+        result['target_path'] = target_path
+        if self.results is not None:
+            self.results.append(result)
+        if self.report_writer is not None:
+            self._write_report(file_path, result, round((time.monotonic() - place_started) * 1000, 1))
+        # 只记录到最近结果中，由信号处理线程随下一个进度快照发出
+        self.recent_results.append(result)
+        if self.per_file_events:
+            self.signal_queue.put(('file_processed', result))
+
+    def _write_report(self, file_path, result, place_ms):
+        """为一个文件追加运行报告记录"""
+        wait = result.get('rate_limit_wait')
+        self.report_writer.write({
+            'source_path': file_path,
+            'recognition': result.get('recognition') or result.get('result'),
+            'success': bool(result.get('success')),
+            'error': result.get('error'),
+            'engine': self.client_type,
+            'attempts': result.get('attempts', 0),
+            'cached': bool(result.get('cached')),
+            'read_ms': result.get('read_ms'),
+            'recognize_ms': result.get('recognize_ms'),
+            'rate_limit_wait_ms': None if wait is None else round(wait * 1000, 1),
+            'place_ms': place_ms if result.get('target_path') else None,
+            'target_path': result.get('target_path'),
+            'finished_at': datetime.now().isoformat(timespec='milliseconds'),
+        })
+
+    def _notify(self, name, *args):
+        """将事件交给listener，回调出错不影响处理流程"""
+        if self.listener is None:
+            return
+        try:
+            self.listener(name, *args)
+        except Exception as e:
+            log_print(f"处理事件{name}时出错: {str(e)}", "ERROR")
+
+    def _run_summary(self):
+        """
+        本次运行的统计摘要，随processing_finished发出
+
+        Returns:
+            dict: total、success、failed、classes（不同识别结果数，未保留结果时为None）、elapsed
+        """
+        return {
+            'total': self.processed_count,
+            'success': self.success_count,
+            'failed': self.failed_count,
+            'classes': self.results.summary()['classes'] if self.results is not None else None,
+            'elapsed': round(time.monotonic() - self.started_at, 1) if self.started_at else 0.0,
+        }
+
+    def _publish_snapshot(self, force=False):
+        """
+        汇总当前进度并发出progress_snapshot事件，只在信号处理线程或流水线主线程中调用
+
+        Args:
+            force: 进度没有变化时是否仍然发出
+        """
+        recent = []
+        while True:
+            try:
+                recent.append(self.recent_results.popleft())
+            except IndexError:
+                break
+        processed = self.processed_count
+        total = self.total_files
+        now = time.monotonic()
+        samples = self.rate_samples
+        changed = not samples or samples[-1][1] != processed or bool(recent)
+        if not changed and not force:
+            return
+
+        samples.append((now, processed))
+        while len(samples) > 2 and now - samples[0][0] > SNAPSHOT_RATE_WINDOW:
+            samples.popleft()
+        elapsed_window = now - samples[0][0]
+        throughput = (processed - samples[0][1]) / elapsed_window if elapsed_window > 0 else 0.0
+        eta = None
+        if self.discovery_finished and throughput > 0:
+            eta = max(0.0, (total - processed) / throughput)
+
+        self._notify('progress_snapshot', {
+            'total': total,
+            'processed': processed,
+            'success': self.success_count,
+            'failed': self.failed_count,
+            'progress': int(processed * 100 / total) if total else 0,
+            'discovery_finished': self.discovery_finished,
+            'throughput': round(throughput, 2),
+            'eta': None if eta is None else round(eta, 1),
+            'elapsed': round(now - self.started_at, 1) if self.started_at else 0.0,
+            'recent': recent,
+        })
+
+    def _signal_processor(self):
+        """信号处理器线程函数，转发来自工作线程的信号，并按固定间隔发出进度快照"""
+        next_snapshot = time.monotonic() + self.snapshot_interval
+        while self.signal_processor_running or not self.signal_queue.empty():
+            now = time.monotonic()
+            if now >= next_snapshot:
+                self._publish_snapshot()
+                next_snapshot = now + self.snapshot_interval
+            try:
+                signal = self.signal_queue.get(timeout=max(0.01, min(0.1, next_snapshot - now)))
+            except Empty:
+                continue
+
+            try:
+                if not isinstance(signal, tuple) or len(signal) < 1:
+                    log_print("收到无效信号格式")
+                    continue
+
+                signal_name = signal[0]
+                args = signal[1:]
+
+                if signal_name == 'file_processed':
+                    if len(args) >= 1 and isinstance(args[0], dict):
+                        self._notify('file_processed', args[0])
+                    else:
+                        log_print("file_processed信号参数错误")
+                elif signal_name == 'progress_updated':
+                    if len(args) >= 2 and isinstance(args[0], int) and isinstance(args[1], str):
+                        self._notify('progress_updated', args[0], args[1])
+                    else:
+                        log_print("progress_updated信号参数错误")
+                elif signal_name == 'error_occurred':
+                    if len(args) >= 1 and isinstance(args[0], str):
+                        self._notify('error_occurred', args[0])
+                    else:
+                        log_print("error_occurred信号参数错误")
+                elif signal_name == 'stop_signal':
+                    break
+                else:
+                    log_print(f"未知信号类型: {signal_name}")
+            except (TypeError, AttributeError, ValueError) as e:
+                log_print(f"处理信号时出错: {str(e)}")
+            finally:
+                self.signal_queue.task_done()
+
+    def rate_limited_process(self, file_path, client, image_source=None):
+        """
+        带速率限制的文件处理函数
+        
+        Args:
+            file_path: 要处理的文件路径
+            client: OCR客户端实例
+            image_source: 已预读的图像字节，为None时从磁盘读取
+            
+        Returns:
+            dict: 处理结果字典
+        """
+        if not self.is_running:
+            return {'filename': os.path.basename(file_path), 'success': False, 'error': '处理已取消'}
+
+        try:
+            waited = self._check_rate_limit()
+
+            if not self.is_running:
+                raise RuntimeError("处理已取消")
+
+            result = self.process_image_file(file_path, client, image_source)
+            result['rate_limit_wait'] = round(waited, 3)
+            return result
+        except (RuntimeError, ValueError, IOError) as e:
+            error_msg = f"速率限制处理失败: {str(e)}"
+            log("ERROR", error_msg)
+            return {'filename': os.path.basename(file_path), 'success': False, 'error': error_msg}
+
+    def _check_rate_limit(self):
+        """
+        从提供商共享的限速器获取许可，等待在共享锁之外进行；本地引擎不限速
+
+        Returns:
+            float: 本次请求等待许可的秒数
+        """
+        if self.rate_limiter is None:
+            return 0.0
+        waited = self.rate_limiter.acquire(
+            is_cancelled=lambda: not self.is_running,
+            on_wait=self._on_rate_limit_wait)
+
+        if waited > 0:
+            with self.counter_lock:
+                self.rate_limit_wait_total += waited
+                self.rate_limit_wait_count += 1
+        return waited
+
+    def _on_rate_limit_wait(self, wait_time):
+        """限速等待较长时发出警告，同一时段内只提示一次"""
+        if wait_time < RATE_LIMIT_WARNING_SECONDS:
+            return
+
+        with self.counter_lock:
+            now = time.time()
+            if now - self.last_rate_limit_warning_time < RATE_LIMIT_WARNING_INTERVAL:
+                return
+            self.last_rate_limit_warning_time = now
+
+        warning_msg = f"请求频率过高，已达到每分钟{self.max_requests_per_minute}次的限制，需等待{wait_time:.2f}秒"
+        log("WARNING", warning_msg)
+        self._notify('rate_limit_warning', warning_msg)
+        log_print(warning_msg)
+
+    def stop(self):
+        """停止线程，支持超时处理和资源清理"""
+        with self.lock:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self.stopping = True  # 标记线程正在停止过程中
+
+        while not self.file_queue.empty():
+            try:
+                self.file_queue.get_nowait()
+                self.file_queue.task_done()
+            except Empty:
+                break
+
+        if self.async_engine is not None:
+            self.async_engine.cancel_pending()
+
+        self.signal_processor_running = False
+        self.signal_queue.put(('stop_signal',))
+
+        # 立即返回，不阻塞UI线程
+        # 线程会在后台自行终止，通过processing_stopped信号通知主线程
+        self._notify('processing_stopped')
+        log("INFO", "已发送停止信号，线程将在后台安全终止")
+        log_print("已发送停止信号，线程将在后台安全终止")
+    
+    def _cleanup_resources(self):
+        """清理线程使用的资源"""
+        try:
+            if self.async_engine is not None:
+                self.async_engine.close()
+                self.async_engine = None
+            if self.report_writer is not None:
+                self.report_writer.close()
+            self.stage_marks.clear()
+
+            # 清空信号队列
+            while not self.signal_queue.empty():
+                try:
+                    self.signal_queue.get_nowait()
+                except:
+                    break
+            
+            # 清空工作队列
+            while not self.file_queue.empty():
+                try:
+                    self.file_queue.get_nowait()
+                except:
+                    break
+            
+            # 清理OCR客户端资源
+            if hasattr(self, 'clients') and self.clients:
+                for client in self.clients:
+                    try:
+                        if hasattr(client, 'close') and callable(client.close):
+                            client.close()
+                    except Exception as e:
+                        log("WARNING", f"客户端资源清理失败: {str(e)}")
+            
+            log("INFO", "线程资源清理完成")
+            
+            # 重置停止状态
+            with self.lock:
+                self.stopping = False
+            
+        except Exception as e:
+            log("ERROR", f"资源清理过程中发生错误: {str(e)}")
+
+    def process_image_file(self, local_file_path, client, image_source=None):
+        """
+        处理单个图像文件，先查询识别缓存，未命中时执行带重试的识别
+        
+        Args:
+            local_file_path: 图像文件路径
+            client: OCR客户端实例
+            image_source: 已预读的图像字节，为None时从磁盘读取
+            
+        Returns:
+            dict: 处理结果字典
+        """
+        filename = os.path.basename(local_file_path)
+        try:
+            if image_source is None:
+                if not os.path.exists(local_file_path):
+                    error_msg = f"文件不存在: {local_file_path}"
+                    log("ERROR", error_msg)
+                    return {'filename': filename, 'success': False, 'error': error_msg}
+
+                with open(local_file_path, 'rb') as f:
+                    image_source = f.read()
+
+            if self.recognition_cache is None:
+                outcome = self._recognize_with_retries(filename, client, image_source)
+            else:
+                key = self.recognition_cache.make_key(image_source, self.cache_fingerprint)
+                outcome = self.recognition_cache.get_or_compute(
+                    key,
+                    lambda: self._recognize_with_retries(filename, client, image_source),
+                    self._should_cache,
+                    is_cancelled=lambda: not self.is_running)
+            return self._result_from_outcome(local_file_path, outcome)
+        except (RuntimeError, TypeError, OSError) as e:
+            error_msg = f'处理图像文件时发生致命错误: {str(e)}'
+            log("ERROR", error_msg)
+            log_print(error_msg)
+            return {'filename': filename, 'success': False, 'error': error_msg}
+
+    def _recognize_with_retries(self, filename, client, image_source):
+        """
+        调用OCR客户端识别图像，包含重试逻辑
+
+        Args:
+            filename: 文件名，用于日志
+            client: OCR客户端实例
+            image_source: 图像字节数据
+
+        Returns:
+            dict: 包含 result/status/attempts/error 的识别结果，与异步引擎的结果格式一致
+        """
+        max_attempts = 1 if self.config and self.config.get("MODE_INDEX") == MODE_LOCAL else (
+            self.config.get("RETRY_TIMES") if self.config else 3)
+        outcome = {'result': None, 'status': REQUEST_STATUS_ERROR, 'attempts': 0, 'error': '达到最大重试次数'}
+        for attempt in range(max_attempts):
+            if attempt > 0:
+                backoff_time = min(self.backoff_factor ** attempt, self.max_backoff_time)
+                log_print(f"第 {attempt + 1} 次尝试，等待 {backoff_time:.2f} 秒后重试")
+                time.sleep(backoff_time)
+                # 重试请求同样需要获取许可，避免绕过限速
+                self._check_rate_limit()
+
+            outcome['attempts'] = attempt + 1
+            try:
+                ocr_result = self._recognize(client, image_source)
+                outcome['status'] = client.get_request_status()
+            except requests.exceptions.RequestException as e:
+                error_msg = f'网络请求异常: {str(e)}'
+            except json.JSONDecodeError as e:
+                error_msg = f'JSON解析异常: {str(e)}'
+            except (IOError, OSError) as e:
+                error_msg = f'识别异常: {str(e)}'
+            else:
+                if ocr_result is not None and not isinstance(ocr_result, str):
+                    log("ERROR", f"OCR返回非字符串结果: {type(ocr_result).__name__}")
+                    outcome.update(status=REQUEST_STATUS_ERROR, error='OCR识别结果格式错误')
+                    return outcome
+                if ocr_result:
+                    outcome.update(result=ocr_result, error=None)
+                    return outcome
+                if outcome['status'] == REQUEST_STATUS_UNREADABLE:
+                    # 图像本身无法解码，重试不会改变结果
+                    outcome['error'] = '图像无法解码'
+                    return outcome
+
+                outcome['error'] = '未识别到有效结果'
+                log("WARNING",
+                    f"OCR识别失败 (尝试 {attempt + 1}/{max_attempts}): {filename}, 错误: {outcome['error']}")
+                log_print(f"OCR识别失败 (尝试 {attempt + 1}/{max_attempts}): {filename}, 错误: {outcome['error']}")
+                continue
+
+            outcome.update(status=REQUEST_STATUS_ERROR, error=error_msg)
+            log("ERROR", f"OCR识别异常 (尝试 {attempt + 1}/{max_attempts}): {filename}, {error_msg}")
+            log_print(f"OCR识别异常 (尝试 {attempt + 1}/{max_attempts}): {filename}, 错误: {error_msg}")
+        return outcome
+
+    @staticmethod
+    def _should_cache(outcome):
+        """
+        判断识别结果是否可以写入缓存
+
+        成功结果、正常返回但未匹配的结果以及无法解码的图像结果是确定的；
+        限流、超时、网络错误等临时失败下次可能成功，不写入缓存。
+        """
+        return outcome.get('status') in (REQUEST_STATUS_OK, REQUEST_STATUS_UNREADABLE)
+
+    def _recognize(self, client, image_source):
+        """
+        调用OCR客户端识别图像，并将耗时和限流情况反馈给并发控制器
+
+        Args:
+            client: OCR客户端实例
+            image_source: 图像字节数据
+
+        Returns:
+            Optional[str]: 识别结果
+        """
+        client.set_request_status(REQUEST_STATUS_OK)
+        controller = self.concurrency_controller
+        if controller is None:
+            return client.recognize(image_source, is_url=False)
+
+        controller.acquire(is_cancelled=lambda: not self.is_running)
+        status = REQUEST_STATUS_OK
+        start_time = time.monotonic()
+        try:
+            result = client.recognize(image_source, is_url=False)
+            status = client.get_request_status()
+            return result
+        except TimeoutError:
+            status = REQUEST_STATUS_TIMEOUT
+            raise
+        finally:
+            controller.release(time.monotonic() - start_time,
+                               throttled=status == REQUEST_STATUS_THROTTLED,
+                               timed_out=status == REQUEST_STATUS_TIMEOUT)
+
+    def copy_to_classified_folder(self, local_file_path, recognition, output_dir, is_move=False):
+        """
+        将文件复制或移动到分类文件夹，包含重试机制和错误处理
+
+        目标文件名由文件夹名称索引原子预留，放置过程不持有锁，多个输出线程可以同时向同一分类文件夹放置文件。
+        
+        Args:
+            local_file_path: 源文件路径
+            recognition: 识别结果（用于创建目标子文件夹）
+            output_dir: 输出目录
+            is_move: 是否为移动操作（True=移动，False=复制）
+
+        Returns:
+            Optional[str]: 成功时返回目标文件路径，失败时返回None
+        """
+        filename = os.path.basename(local_file_path)
+        target_subdir = None
+        max_retries = 3
+        retry_delay = 1.0  # 初始重试延迟1秒
+
+        for attempt in range(max_retries):
+            try:
+                if not os.path.exists(local_file_path):
+                    log("ERROR", f"源文件不存在: {local_file_path}")
+                    return None
+
+                # 分类文件夹按识别结果缓存，只在第一次遇到该分类时创建
+                target_subdir = self.target_dirs.resolve(output_dir, recognition)
+                target_path = self.name_index.reserve(target_subdir, filename)
+                try:
+                    # 由放置引擎选择重命名、链接、克隆或复制中代价最低的方式
+                    self.placement.place(local_file_path, target_path, is_move)
+                except FileExistsError:
+                    # 其他程序刚好占用了预留的名称，该名称保持占用，重试时预留下一个
+                    raise
+                except BaseException:
+                    self.name_index.release(target_path)
+                    raise
+                log("INFO", f"文件{'移动' if is_move else '复制'}成功: {filename} -> {os.path.basename(target_subdir)}")
+                return target_path
+
+            except (OSError, shutil.Error) as e:
+                if isinstance(e, FileNotFoundError) and target_subdir and not os.path.isdir(target_subdir):
+                    # 分类文件夹在运行期间被删除，重试时重新创建
+                    self.target_dirs.invalidate(target_subdir)
+                if attempt < max_retries - 1:
+                    log("WARNING", f"文件操作失败 (尝试 {attempt + 1}/{max_retries}): {filename}, 错误: {str(e)}")
+                    # 退避等待不持有任何锁，不影响其他输出线程
+                    time.sleep(retry_delay)
+                    retry_delay *= 2  # 指数退避
+                else:
+                    log("ERROR", f"文件{'移动' if is_move else '复制'}最终失败: {filename}, 错误: {str(e)}")
+        return None
+
+    def _sanitize_folder_name(self, name):
+        """清理文件夹名称，移除非法字符"""
+        if not name or not isinstance(name, str):
+            return "未知分类"
+        
+        # 移除非法文件名字符
+        invalid_chars = '<>:"/\\|?*'
+        for char in invalid_chars:
+            name = name.replace(char, '_')
+        
+        # 移除首尾空格和点
+        name = name.strip().strip('.')
+        
+        # 限制长度
+        if len(name) > 100:
+            name = name[:100]
+        
+        # 如果名称为空，使用默认名称
+        if not name:
+            name = "未知分类"
+            
+        return name
+
+
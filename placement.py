@@ -0,0 +1,405 @@
+"""
+文件放置模块
+
+为每对源文件和目标文件夹选择代价最低的放置方式：
+    移动: 同一设备上直接重命名，跨设备时复制后删除源文件
+    复制: 支持时使用reflink（写时复制克隆，不复制数据）或copy_file_range（内核内复制），其余情况流式复制。
+         硬链接与源文件共享数据，修改分类后的文件会同时修改源文件，与复制的语义不同，
+         因此auto策略不会使用硬链接，只有配置为hardlink时才在同一设备上创建硬链接
+复制总是先写入临时文件，校验大小后再重命名为目标文件，目标文件不会出现不完整的内容。
+重命名不会覆盖已存在的文件：目标文件名由DirectoryNameIndex预留，同名文件的编号在内存中分配，
+预留之后其他程序创建的同名文件会使放置失败（FileExistsError），由调用方预留下一个名称。
+"""
+
+import errno
+import os
+import shutil
+import threading
+
+from utils import log_print
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+STRATEGY_AUTO = "auto"
+STRATEGY_HARDLINK = "hardlink"
+STRATEGY_COPY = "copy"
+STRATEGIES = (STRATEGY_AUTO, STRATEGY_HARDLINK, STRATEGY_COPY)
+
+METHOD_RENAME = "rename"
+METHOD_HARDLINK = "hardlink"
+METHOD_REFLINK = "reflink"
+METHOD_COPY_RANGE = "copy_file_range"
+METHOD_COPY = "copy"
+
+# 不覆盖目标的重命名方式，只用于记录文件系统是否支持硬链接，不计入放置统计
+_LINK_RENAME = "link_rename"
+
+# Linux FICLONE ioctl，btrfs、XFS等文件系统上克隆整个文件而不复制数据
+_FICLONE = 0x40049409
+
+# 表示文件系统不支持该放置方式的错误码，出现后同一设备组合不再尝试
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS, errno.EBADF, errno.EPERM,
+                       errno.EMLINK, getattr(errno, 'EOPNOTSUPP', errno.EINVAL),
+                       getattr(errno, 'ENOTSUP', errno.EINVAL)}
+
+
+class PlacementEngine:
+    """
+    文件放置引擎
+
+    不支持的放置方式按(源设备, 目标设备)记录，之后直接跳过，避免每个文件都重复失败一次。
+
+    属性:
+        strategy: auto、hardlink或copy
+        counts: 各放置方式的使用次数
+    """
+
+    def __init__(self, strategy=STRATEGY_AUTO):
+        """
+        初始化放置引擎
+
+        Args:
+            strategy: auto自动选择，复制时只使用reflink和copy_file_range，不使用硬链接；
+                hardlink在复制时优先创建硬链接（源文件和目标文件共享数据，修改其中一个会影响另一个）；
+                copy始终流式复制，移动也先复制再删除
+        """
+        strategy = str(strategy or STRATEGY_AUTO).lower()
+        if strategy not in STRATEGIES:
+            log_print(f"[文件放置] 未知的放置策略{strategy}，使用auto", "WARNING")
+            strategy = STRATEGY_AUTO
+        self.strategy = strategy
+        self.counts = {}
+        self._unsupported = set()
+        self._dir_devices = {}
+        self._lock = threading.Lock()
+
+    def place(self, source, target, is_move=False):
+        """
+        将源文件放置到目标路径
+
+        Args:
+            source: 源文件路径
+            target: 目标文件路径，所在文件夹必须已存在
+            is_move: 是否为移动操作
+
+        Returns:
+            str: 实际使用的放置方式
+
+        Raises:
+            FileExistsError: 目标路径已被其他文件占用，已有文件不会被覆盖
+            OSError: 放置失败，目标路径不会留下临时文件
+        """
+        source_stat = os.stat(source)
+        target_dev = self._device_of(os.path.dirname(target))
+        devices = (source_stat.st_dev, target_dev)
+        same_device = source_stat.st_dev == target_dev
+
+        if is_move and same_device and self.strategy != STRATEGY_COPY:
+            self._rename_no_replace(source, target, devices)
+            return self._count(METHOD_RENAME)
+
+        if (not is_move and same_device and self.strategy == STRATEGY_HARDLINK
+                and not self._is_unsupported(METHOD_HARDLINK, devices)):
+            try:
+                os.link(source, target)
+                return self._count(METHOD_HARDLINK)
+            except FileExistsError:
+                raise
+            except OSError as e:
+                self._mark_unsupported(METHOD_HARDLINK, devices, e)
+
+        method = self._copy_via_temp(source, target, source_stat, devices)
+        if is_move:
+            os.remove(source)
+        return self._count(method)
+
+    def get_stats(self):
+        """返回各放置方式的使用次数"""
+        with self._lock:
+            return dict(self.counts)
+
+    def _copy_via_temp(self, source, target, source_stat, devices):
+        """复制到临时文件，校验大小并保留时间戳后重命名为目标文件"""
+        temp_path = target + '.tmp'
+        try:
+            method = self._copy_data(source, temp_path, devices)
+            shutil.copystat(source, temp_path)
+            if os.path.getsize(temp_path) != source_stat.st_size:
+                raise OSError(errno.EIO, "文件复制后大小不匹配", source)
+            self._rename_no_replace(temp_path, target, (devices[1], devices[1]))
+            return method
+        except BaseException:
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def _rename_no_replace(self, source, target, devices):
+        """
+        重命名文件，目标已存在时抛出FileExistsError而不是覆盖
+
+        Windows上的os.rename本身不会覆盖已有文件；POSIX上的rename会静默覆盖，
+        因此先创建硬链接（目标已存在时失败）再删除原路径。文件系统不支持硬链接时，
+        先以独占方式创建目标占位文件，再用rename替换这个占位文件。
+
+        Args:
+            source: 原路径
+            target: 新路径
+            devices: (原路径所在设备, 新路径所在设备)
+        """
+        if os.name == 'nt':
+            os.rename(source, target)
+            return
+
+        if not self._is_unsupported(_LINK_RENAME, devices):
+            try:
+                os.link(source, target)
+            except FileExistsError:
+                raise
+            except OSError as e:
+                self._mark_unsupported(_LINK_RENAME, devices, e)
+            else:
+                try:
+                    os.unlink(source)
+                except OSError:
+                    _remove_quietly(target)
+                    raise
+                return
+
+        os.close(os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+        try:
+            os.rename(source, target)
+        except BaseException:
+            _remove_quietly(target)
+            raise
+
+    def _copy_data(self, source, dest, devices):
+        """依次尝试reflink、copy_file_range，都不可用时流式复制"""
+        if self.strategy != STRATEGY_COPY:
+            with open(source, 'rb') as fsrc, open(dest, 'wb') as fdst:
+                if (fcntl is not None and devices[0] == devices[1]
+                        and not self._is_unsupported(METHOD_REFLINK, devices)):
+                    try:
+                        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                        return METHOD_REFLINK
+                    except OSError as e:
+                        self._mark_unsupported(METHOD_REFLINK, devices, e)
+
+                if hasattr(os, 'copy_file_range') and not self._is_unsupported(METHOD_COPY_RANGE, devices):
+                    try:
+                        if self._copy_range(fsrc.fileno(), fdst.fileno()):
+                            return METHOD_COPY_RANGE
+                    except OSError as e:
+                        self._mark_unsupported(METHOD_COPY_RANGE, devices, e)
+
+        # shutil.copyfile在各平台使用sendfile、fcopyfile等系统快速路径
+        shutil.copyfile(source, dest)
+        return METHOD_COPY
+
+    @staticmethod
+    def _copy_range(src_fd, dst_fd):
+        """
+        使用copy_file_range在内核中复制整个文件
+
+        Returns:
+            bool: 是否复制完整，返回False时调用方改用流式复制
+        """
+        remaining = os.fstat(src_fd).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src_fd, dst_fd, min(remaining, 1 << 30))
+            if copied == 0:
+                return False
+            remaining -= copied
+        return True
+
+    def _device_of(self, directory):
+        """获取目标文件夹所在设备，结果按文件夹缓存"""
+        device = self._dir_devices.get(directory)
+        if device is None:
+            device = os.stat(directory).st_dev
+            self._dir_devices[directory] = device
+        return device
+
+    def _is_unsupported(self, method, devices):
+        return (method, devices) in self._unsupported
+
+    def _mark_unsupported(self, method, devices, error):
+        """记录不支持的放置方式；其他错误（如磁盘已满）继续抛出"""
+        if error.errno not in _UNSUPPORTED_ERRNOS and not isinstance(error, NotImplementedError):
+            raise error
+        with self._lock:
+            if (method, devices) not in self._unsupported:
+                self._unsupported.add((method, devices))
+                log_print(f"[文件放置] 当前文件系统不支持{method}，改用其他方式: {str(error)}", "DEBUG")
+
+    def _count(self, method):
+        with self._lock:
+            self.counts[method] = self.counts.get(method, 0) + 1
+        return method
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class _DirectoryNames:
+    """单个文件夹中已占用的文件名"""
+
+    __slots__ = ('lock', 'names', 'next_suffix', 'loaded')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = set()
+        self.next_suffix = {}
+        self.loaded = False
+
+
+class DirectoryNameIndex:
+    """
+    目标文件夹文件名索引
+
+    每个文件夹首次使用时读取一次目录列表，之后在内存中记录已占用的文件名和每个文件名下一个可用的序号，
+    同名文件的编号无需逐个探测 _1、_2……是否存在。文件名在放置之前即被预留，
+    多个输出线程可以同时向同一文件夹放置文件而不会选中相同的名称。
+    """
+
+    def __init__(self):
+        self._directories = {}
+        self._guard = threading.Lock()
+
+    def reserve(self, directory, filename):
+        """
+        为文件预留一个不冲突的目标路径
+
+        Args:
+            directory: 目标文件夹，必须已存在
+            filename: 原文件名
+
+        Returns:
+            str: 预留的目标文件路径，冲突时为 原名_序号.扩展名
+        """
+        entry = self._entry(directory)
+        with entry.lock:
+            if not entry.loaded:
+                entry.names.update(os.path.normcase(name) for name in os.listdir(directory))
+                entry.loaded = True
+
+            candidate = filename
+            base_name, ext = os.path.splitext(filename)
+            key = os.path.normcase(filename)
+            counter = entry.next_suffix.get(key, 1)
+            while True:
+                normalized = os.path.normcase(candidate)
+                if normalized not in entry.names:
+                    path = os.path.join(directory, candidate)
+                    # 只检查预留的这一个名称，防止其他程序在运行期间放入的同名文件被覆盖
+                    if not os.path.lexists(path):
+                        break
+                    entry.names.add(normalized)
+                candidate = f"{base_name}_{counter}{ext}"
+                counter += 1
+            entry.names.add(normalized)
+            if candidate != filename:
+                entry.next_suffix[key] = counter
+            return path
+
+    def release(self, path):
+        """放置失败时释放预留的文件名"""
+        directory, name = os.path.split(path)
+        entry = self._entry(directory)
+        with entry.lock:
+            entry.names.discard(os.path.normcase(name))
+
+    def _entry(self, directory):
+        with self._guard:
+            entry = self._directories.get(directory)
+            if entry is None:
+                entry = self._directories[directory] = _DirectoryNames()
+            return entry
+
+
+class TargetDirectoryCache:
+    """
+    分类文件夹缓存
+
+    记录识别结果到已创建的分类文件夹路径的映射，一次运行中通常只有几百个不同的车号，
+    每个分类只需清理一次名称、创建一次文件夹，之后的文件直接查表，不再重复执行makedirs。
+    """
+
+    def __init__(self, sanitize):
+        """
+        初始化缓存
+
+        Args:
+            sanitize: 将识别结果转换为合法文件夹名称的函数
+        """
+        self._sanitize = sanitize
+        self._paths = {}
+        self._existing = {}
+        self._lock = threading.Lock()
+
+    def warm(self, output_dir):
+        """
+        读取输出目录中已存在的分类文件夹，这些分类之后无需再创建
+
+        Returns:
+            int: 已存在的分类文件夹数
+        """
+        existing = set()
+        try:
+            with os.scandir(output_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            existing.add(os.path.normcase(entry.name))
+                    except OSError:
+                        continue
+        except OSError:
+            # 输出目录尚未创建，第一次放置文件时随分类文件夹一起创建
+            pass
+        with self._lock:
+            self._existing.setdefault(output_dir, set()).update(existing)
+        return len(existing)
+
+    def resolve(self, output_dir, recognition):
+        """
+        获取识别结果对应的分类文件夹，首次使用时创建
+
+        Args:
+            output_dir: 输出目录
+            recognition: 识别结果
+
+        Returns:
+            str: 已存在的分类文件夹路径
+        """
+        key = (output_dir, recognition)
+        path = self._paths.get(key)
+        if path is not None:
+            return path
+
+        folder_name = self._sanitize(recognition)
+        path = os.path.join(output_dir, folder_name)
+        normalized = os.path.normcase(folder_name)
+        with self._lock:
+            existing = self._existing.setdefault(output_dir, set())
+            if normalized not in existing:
+                os.makedirs(path, exist_ok=True)
+                existing.add(normalized)
+            self._paths[key] = path
+        return path
+
+    def invalidate(self, path):
+        """分类文件夹在运行期间被删除时调用，之后重新创建"""
+        output_dir, folder_name = os.path.split(path)
+        with self._lock:
+            self._existing.get(output_dir, set()).discard(os.path.normcase(folder_name))
+            for key in [key for key, value in self._paths.items() if value == path]:
+                del self._paths[key]
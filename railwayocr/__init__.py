@@ -0,0 +1,5 @@
+"""RailwayOCR命令行入口包
+
+用法: python -m railwayocr classify SRC DST --engine local --workers N
+命令行运行不依赖PyQt6，可用于无界面的服务器和定时任务。
+"""
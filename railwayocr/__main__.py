@@ -0,0 +1,7 @@
+"""python -m railwayocr 入口"""
+import sys
+
+from .cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
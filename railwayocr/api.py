@@ -0,0 +1,193 @@
+"""
+Python编程接口模块
+
+在其他程序中直接调用分类流水线，结果逐个返回，无需等待全部处理完成:
+
+    from railwayocr.api import classify_iter
+
+    for record in classify_iter(paths, engine="local", dest="/data/classified", max_in_flight=32):
+        print(record["file_path"], record["success"], record.get("recognition"))
+
+每条结果与界面中file_processed信号的结果相同，主要字段:
+    file_path, filename, success, recognition/result, target_path, attempts, cached, error
+"""
+
+import os
+import threading
+from queue import Queue
+
+ENGINES = ('local', 'paddle', 'baidu', 'ali')
+
+_END = object()
+
+
+def config_overrides_for(engine, workers):
+    """
+    将并发数转换为对应引擎的配置项
+
+    Args:
+        engine: 引擎名称
+        workers: 并发数，为None时使用配置文件中的设置
+
+    Returns:
+        dict: 覆盖配置文件的设置
+    """
+    if not workers:
+        return {}
+    if engine in ('local', 'paddle'):
+        # 本地引擎每个并发对应一个独立进程中的模型副本
+        return {"LOCAL_EXECUTOR": "process" if workers > 1 else "thread", "LOCAL_REPLICAS": workers}
+    return {"CONCURRENCY": workers, "MAX_CONCURRENCY": workers}
+
+
+def is_inside(directory, path):
+    """
+    判断path是否为directory本身或其子文件夹
+
+    Windows上位于不同盘符的两个路径没有公共路径，视为不在文件夹内。
+
+    Args:
+        directory: 文件夹路径
+        path: 要判断的路径
+
+    Returns:
+        bool: path是否位于directory内
+    """
+    directory = os.path.normcase(os.path.abspath(directory))
+    path = os.path.normcase(os.path.abspath(path))
+    try:
+        return os.path.commonpath([directory, path]) == directory
+    except ValueError:
+        return False
+
+
+def create_client(engine, config):
+    """
+    创建OCR客户端
+
+    Args:
+        engine: 'local'、'paddle'、'baidu' 或 'ali'
+        config: 应用配置字典
+
+    Returns:
+        BaseClient: OCR客户端实例
+    """
+    # pylint: disable=import-outside-toplevel
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的OCR引擎: {engine}，可选 {', '.join(ENGINES)}")
+    if engine == 'ali':
+        from clients.ali_client import AliClient
+        return AliClient()
+    if engine == 'baidu':
+        from clients.baidu_client import BaiduClient
+        return BaiduClient()
+    from clients.process_pool import create_local_engine
+    return create_local_engine(engine, config, max_retries=1)
+
+
+def _iter_directory(root, extensions):
+    """逐个产生目录中的图像文件"""
+    from scanner import DirectoryScanner  # pylint: disable=import-outside-toplevel
+
+    scanner = DirectoryScanner(root, extensions)
+    scanner.start()
+    try:
+        for batch in scanner.batches():
+            yield from batch
+    finally:
+        scanner.cancel()
+
+
+def _admit(paths, slots, stop_event):
+    """每个文件取得一个在途名额后才交给流水线，调用方未取走的结果过多时暂停送入"""
+    for path in paths:
+        while not slots.acquire(timeout=0.5):
+            if stop_event.is_set():
+                return
+        if stop_event.is_set():
+            return
+        yield path
+
+
+def classify_iter(paths, engine="local", dest=None, move=False, workers=None, max_in_flight=None,
+                  config_overrides=None):
+    """
+    识别并分类图像，按完成顺序逐个返回结果
+
+    Args:
+        paths: 图像文件路径的可迭代对象（可以是生成器），或一个源文件夹路径
+        engine: 引擎名称（'local'、'paddle'、'baidu'、'ali'）或已创建的OCR客户端实例
+        dest: 目标文件夹，为None时只识别不放置文件
+        move: 是否移动文件（默认复制）
+        workers: 并发数：本地引擎为模型副本数，云端引擎为请求并发数
+        max_in_flight: 已送入流水线但调用方尚未取走的文件数上限，为None时不限制。
+            调用方处理结果较慢时流水线暂停读取新文件，内存占用与该值成正比
+        config_overrides: 其他覆盖配置文件的设置
+
+    Yields:
+        dict: 单个文件的处理结果
+
+    Raises:
+        ValueError: 引擎名称无效或目标文件夹位于源文件夹内
+    """
+    # pylint: disable=import-outside-toplevel
+    from pipeline import ClassificationPipeline
+    from scanner import DEFAULT_IMAGE_EXTENSIONS
+    from utils import load_config
+
+    config = dict(load_config())
+    owns_client = isinstance(engine, str)
+    overrides = dict(config_overrides or {})
+    if owns_client:
+        overrides.update(config_overrides_for(engine, workers))
+    elif workers:
+        overrides.update({"CONCURRENCY": workers, "MAX_CONCURRENCY": workers})
+    config.update(overrides)
+
+    if isinstance(paths, (str, os.PathLike)):
+        source_dir = os.path.abspath(paths)
+        if dest is not None and is_inside(source_dir, dest):
+            raise ValueError("目标文件夹不能是源文件夹或其子文件夹")
+        paths = _iter_directory(source_dir, config.get("ALLOWED_EXTENSIONS", DEFAULT_IMAGE_EXTENSIONS))
+    else:
+        paths = (os.path.abspath(path) for path in paths)
+
+    client = create_client(engine, config) if owns_client else engine
+    results = Queue()
+    stop_event = threading.Event()
+    slots = None
+    if max_in_flight:
+        slots = threading.BoundedSemaphore(max(1, int(max_in_flight)))
+        paths = _admit(paths, slots, stop_event)
+
+    def on_event(name, *args):
+        if name == 'file_processed':
+            results.put(args[0])
+
+    pipeline = ClassificationPipeline(
+        client, paths, dest, move, listener=on_event, config_overrides=overrides, keep_results=False,
+        feed_batch_size=1 if slots is not None else 256)
+
+    def run():
+        try:
+            pipeline.run()
+        finally:
+            results.put(_END)
+
+    runner = threading.Thread(target=run, name="ClassificationPipeline", daemon=True)
+    runner.start()
+    try:
+        while True:
+            record = results.get()
+            if record is _END:
+                break
+            if slots is not None:
+                slots.release()
+            yield record
+    finally:
+        # 调用方提前结束迭代时停止流水线，已识别的结果不再返回
+        stop_event.set()
+        pipeline.stop()
+        runner.join()
+        if owns_client and hasattr(client, 'cleanup'):
+            client.cleanup()
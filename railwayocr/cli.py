@@ -0,0 +1,292 @@
+"""
+命令行批处理模块
+
+classify: 在无界面环境中运行与图形界面相同的分类流水线。
+serve: 启动本地HTTP识别服务（见railwayocr.server）。
+
+处理进度以JSON Lines格式逐行输出到标准输出，每行一个事件，便于其他程序解析；
+可读的日志输出到标准错误。
+
+退出码:
+    0  全部文件识别成功
+    1  部分文件识别失败
+    2  参数或文件夹错误
+    3  OCR引擎初始化失败
+    130  被用户中断，任务进度已保存
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+
+from .api import ENGINES, config_overrides_for, create_client, is_inside
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+EXIT_ENGINE = 3
+EXIT_INTERRUPTED = 130
+
+
+class _CommandError(Exception):
+    """命令无法继续执行，错误已输出为error事件"""
+
+    def __init__(self, exit_code):
+        super().__init__(exit_code)
+        self.exit_code = exit_code
+
+
+def _default_engine(config):
+    """根据界面中选择的识别模式确定默认引擎"""
+    from utils import MODE_ALI, MODE_BAIDU, MODE_PADDLE  # pylint: disable=import-outside-toplevel
+    mode_index = config.get("MODE_INDEX", 0)
+    return {MODE_PADDLE: 'paddle', MODE_BAIDU: 'baidu', MODE_ALI: 'ali'}.get(mode_index, 'local')
+
+
+class JsonLinesReporter:
+    """将流水线事件转换为JSON Lines输出"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def write(self, event, **fields):
+        """输出一个事件"""
+        record = {'event': event, 'time': round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def on_pipeline_event(self, name, *args):
+        """流水线事件回调"""
+        if name == 'file_processed':
+            result = args[0]
+            self.write('file', file=result.get('file_path'), success=bool(result.get('success')),
+                       result=result.get('recognition') or result.get('result'),
+                       target=result.get('target_path'), attempts=result.get('attempts', 0),
+                       cached=bool(result.get('cached')), error=result.get('error'))
+        elif name == 'progress_snapshot':
+            snapshot = args[0]
+            self.write('progress', total=snapshot['total'], processed=snapshot['processed'],
+                       success=snapshot['success'], failed=snapshot['failed'],
+                       throughput=snapshot['throughput'], eta=snapshot['eta'])
+        elif name == 'files_discovered':
+            total, finished = args
+            self.write('discovered', total=total, finished=finished)
+        elif name == 'rate_limit_warning':
+            self.write('warning', message=args[0])
+        elif name == 'error_occurred':
+            self.write('error', message=args[0])
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog="railwayocr", description="RailwayOCR 铁路图像识别分类命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    classify = subparsers.add_parser("classify", help="识别源文件夹中的图像并按识别结果分类到目标文件夹")
+    classify.add_argument("source", help="源文件夹（包含子文件夹）")
+    classify.add_argument("dest", help="目标文件夹")
+    classify.add_argument("--engine", choices=ENGINES, help="OCR引擎，默认使用界面中选择的识别模式")
+    classify.add_argument("--workers", type=int, help="并发数：本地引擎为模型副本数，云端引擎为请求并发数")
+    classify.add_argument("--move", action="store_true", help="移动文件（默认复制）")
+    classify.add_argument("--restart", action="store_true", help="放弃上次未完成的相同任务，重新处理全部文件")
+    classify.add_argument("--no-index", action="store_true", help="不使用增量索引，处理全部文件")
+    classify.add_argument("--watch", action="store_true", help="处理完现有文件后持续监视源文件夹，直到中断")
+    classify.add_argument("--report", metavar="PATH",
+                          help="逐个文件写入运行报告，格式由扩展名决定（.csv、.jsonl、.parquet）")
+    classify.add_argument("--quiet", action="store_true", help="不在标准错误输出日志")
+
+    serve = subparsers.add_parser("serve", help="启动本地HTTP识别服务，多个程序共享同一份已加载的模型")
+    serve.add_argument("--host", default="127.0.0.1", help="监听地址，默认只允许本机访问")
+    serve.add_argument("--port", type=int, default=8765, help="监听端口，默认8765")
+    serve.add_argument("--engine", choices=ENGINES, help="OCR引擎，默认使用界面中选择的识别模式")
+    serve.add_argument("--workers", type=int, help="并发数：本地引擎为模型副本数，云端引擎为请求并发数")
+    serve.add_argument("--max-batch", type=int, help="每批最多合并的图像数，默认LOCAL_BATCH_SIZE")
+    serve.add_argument("--max-wait-ms", type=int, help="凑批的最长等待时间（毫秒），默认SERVER_BATCH_MAX_WAIT_MS")
+    serve.add_argument("--max-pending", type=int, help="同时等待识别的图像数上限，超过后返回503")
+    serve.add_argument("--quiet", action="store_true", help="不在标准错误输出日志")
+    return parser
+
+
+def _prepare_engine(args, reporter):
+    """
+    按命令行参数加载配置并创建OCR客户端
+
+    Returns:
+        tuple: (客户端, 引擎名称, 配置, 覆盖配置)
+
+    Raises:
+        _CommandError: 参数错误或OCR引擎初始化失败，附带退出码
+    """
+    import utils  # pylint: disable=import-outside-toplevel
+
+    if args.workers is not None and args.workers < 1:
+        reporter.write('error', message="--workers 必须大于0")
+        raise _CommandError(EXIT_USAGE)
+    if not args.quiet:
+        utils.LOG_SINK = lambda level, message: sys.stderr.write(f"[{level}] {message}\n")
+
+    config = dict(utils.load_config())
+    engine = args.engine or _default_engine(config)
+    overrides = config_overrides_for(engine, args.workers)
+    if getattr(args, 'watch', False):
+        overrides["WATCH_MODE"] = True
+    config.update(overrides)
+    try:
+        client = create_client(engine, config)
+    except Exception as e:  # pylint: disable=broad-except
+        reporter.write('error', message=f"OCR引擎初始化失败: {str(e)}")
+        raise _CommandError(EXIT_ENGINE) from e
+    return client, engine, config, overrides
+
+
+def _run_classify(args):
+    # pylint: disable=import-outside-toplevel
+    from job_journal import JobJournal
+    from pipeline import ClassificationPipeline
+    from recognition_cache import recognition_fingerprint
+    from report_writer import create_report_writer
+    from scan_index import ScanIndex
+    from scanner import DEFAULT_IMAGE_EXTENSIONS
+
+    reporter = JsonLinesReporter()
+    source_dir = os.path.abspath(args.source)
+    dest_dir = os.path.abspath(args.dest)
+    if not os.path.isdir(source_dir):
+        reporter.write('error', message=f"源文件夹不存在: {source_dir}")
+        return EXIT_USAGE
+    if is_inside(source_dir, dest_dir):
+        reporter.write('error', message="目标文件夹不能是源文件夹或其子文件夹")
+        return EXIT_USAGE
+    try:
+        client, engine, config, overrides = _prepare_engine(args, reporter)
+    except _CommandError as e:
+        return e.exit_code
+    reporter.write('start', source=source_dir, dest=dest_dir, engine=engine, move=args.move)
+
+    journal = None
+    if config.get("JOB_JOURNAL", True):
+        journal = JobJournal(source_dir, dest_dir, args.move)
+        if journal.load():
+            if args.restart:
+                journal.discard()
+            else:
+                total, placed = journal.summary()
+                reporter.write('resume', total=total, placed=placed)
+    scan_index = None
+    if config.get("SCAN_INDEX", True) and not args.move and not args.no_index:
+        scan_index = ScanIndex(source_dir, dest_dir, recognition_fingerprint(client, config))
+
+    report_writer = None
+    if args.report:
+        try:
+            report_writer = create_report_writer(os.path.abspath(args.report))
+        except (ValueError, OSError) as e:
+            reporter.write('error', message=f"无法创建运行报告: {str(e)}")
+            if hasattr(client, 'cleanup'):
+                client.cleanup()
+            return EXIT_USAGE
+
+    # 结果已逐个输出，不需要在内存中保留全部结果
+    pipeline = ClassificationPipeline(
+        client, None, dest_dir, args.move, journal=journal, scan_index=scan_index, source_dir=source_dir,
+        extensions=config.get("ALLOWED_EXTENSIONS", DEFAULT_IMAGE_EXTENSIONS),
+        listener=reporter.on_pipeline_event, config_overrides=overrides, keep_results=False,
+        report_writer=report_writer)
+
+    start_time = time.time()
+    runner = threading.Thread(target=pipeline.run, name="ClassificationPipeline")
+    runner.start()
+    interrupted = False
+    try:
+        while runner.is_alive():
+            runner.join(timeout=0.5)
+    except KeyboardInterrupt:
+        interrupted = True
+        pipeline.stop()
+        runner.join()
+    finally:
+        if hasattr(client, 'cleanup'):
+            client.cleanup()
+
+    reporter.write('done', processed=pipeline.processed_count, success=pipeline.success_count,
+                   failed=pipeline.failed_count, total=pipeline.total_files,
+                   elapsed=round(time.time() - start_time, 3), interrupted=interrupted,
+                   report=pipeline.report_writer.path if pipeline.report_writer is not None else None)
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILURES if pipeline.failed_count else EXIT_OK
+
+
+def _run_serve(args):
+    from railwayocr.server import RecognitionService, create_server  # pylint: disable=import-outside-toplevel
+
+    reporter = JsonLinesReporter()
+    try:
+        client, engine, config, _ = _prepare_engine(args, reporter)
+    except _CommandError as e:
+        return e.exit_code
+
+    if engine in ('local', 'paddle'):
+        workers = getattr(client, 'replicas', 1)
+    else:
+        workers = int(config.get("CONCURRENCY", 1))
+    service = RecognitionService(
+        client, workers=workers,
+        max_batch=args.max_batch or config.get("LOCAL_BATCH_SIZE", 8),
+        max_wait=(args.max_wait_ms if args.max_wait_ms is not None
+                  else config.get("SERVER_BATCH_MAX_WAIT_MS", 20)) / 1000.0,
+        max_pending=args.max_pending or config.get("SERVER_MAX_PENDING", 64),
+        config=config)
+    try:
+        server = create_server(service, args.host, args.port,
+                               request_timeout=config.get("REQUEST_TIMEOUT", 60),
+                               max_body_mb=config.get("SERVER_MAX_BODY_MB", 32))
+    except OSError as e:
+        reporter.write('error', message=f"无法监听 {args.host}:{args.port}: {str(e)}")
+        if hasattr(client, 'cleanup'):
+            client.cleanup()
+        return EXIT_USAGE
+
+    # 服务管理器通过SIGTERM停止服务时与Ctrl+C一样正常退出
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    service.start()
+    host, port = server.server_address[:2]
+    reporter.write('listening', host=host, port=port, engine=engine, workers=service.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        if hasattr(client, 'cleanup'):
+            client.cleanup()
+    reporter.write('stopped')
+    return EXIT_OK
+
+
+def main(argv=None):
+    """
+    命令行入口
+
+    Args:
+        argv: 命令行参数，为None时使用sys.argv
+
+    Returns:
+        int: 退出码
+    """
+    multiprocessing.freeze_support()
+    args = _build_parser().parse_args(argv)
+    if args.command == "classify":
+        return _run_classify(args)
+    if args.command == "serve":
+        return _run_serve(args)
+    return EXIT_USAGE
@@ -0,0 +1,402 @@
+"""
+本地HTTP识别服务模块
+
+在一个常驻进程中加载OCR引擎，通过本地HTTP接口为其他程序提供识别服务，
+各调用方共享同一份模型，无需各自加载EasyOCR/PaddleOCR。
+
+接口:
+    POST /recognize        请求体为图像字节，或JSON {"image": base64} / {"url": 图像URL}
+    POST /recognize/batch  JSON {"images": [base64, ...]}
+    GET  /healthz          进程存活检查
+    GET  /readyz           引擎已加载且未过载时返回200，否则返回503
+
+并发请求中的单张图像会在最长max_wait时间内合并为一批识别（本地引擎支持批量识别时），
+等待中的图像数超过上限时直接返回503，响应头中附带排队和识别耗时。
+"""
+
+import base64
+import binascii
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue, Empty
+
+from clients.base_client import REQUEST_STATUS_ERROR, REQUEST_STATUS_OK
+from pipeline import CLOUD_CLIENT_TYPES
+from rate_limiter import get_rate_limiter
+from utils import log, log_print
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class ServiceOverloaded(Exception):
+    """等待识别的图像数已达到上限"""
+
+
+class _Job:
+    """一张待识别的图像"""
+
+    __slots__ = ('source', 'is_url', 'done', 'result', 'status', 'enqueued_at', 'started_at', 'finished_at',
+                 'abandoned')
+
+    def __init__(self, source, is_url=False):
+        self.source = source
+        self.is_url = is_url
+        self.done = threading.Event()
+        self.result = None
+        self.status = REQUEST_STATUS_OK
+        self.enqueued_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        # 请求已超时返回，尚未开始识别时不再识别
+        self.abandoned = False
+
+
+class RecognitionService:
+    """
+    识别服务
+
+    识别线程从共享队列中取出图像，第一张图像到达后最多再等待max_wait秒凑满一批，
+    再交给客户端的recognize_batch（没有时逐张调用recognize）。
+
+    属性:
+        pending: 已接收但尚未完成的图像数
+        ready: 识别线程是否已启动
+    """
+
+    def __init__(self, client, workers=1, max_batch=8, max_wait=0.02, max_pending=64, config=None):
+        """
+        初始化识别服务
+
+        Args:
+            client: 已加载的OCR客户端
+            workers: 识别线程数
+            max_batch: 每批最多合并的图像数
+            max_wait: 凑批的最长等待时间（秒）
+            max_pending: 同时等待识别的图像数上限，超过后拒绝新请求
+            config: 应用配置，云端引擎据此设置速率限制
+        """
+        config = config or {}
+        self.client = client
+        self.client_type = getattr(client, 'client_type', 'unknown')
+        self.workers = max(1, int(workers))
+        self.max_batch = max(1, int(max_batch)) if hasattr(client, 'recognize_batch') else 1
+        self.max_wait = max(0.0, float(max_wait))
+        self.max_pending = max(1, int(max_pending))
+        self.pending = 0
+        self.ready = False
+        self.rate_limiter = None
+        if self.client_type in CLOUD_CLIENT_TYPES:
+            self.rate_limiter = get_rate_limiter(
+                self.client_type, config.get("MAX_REQUESTS_PER_MINUTE", 60),
+                burst=max(1, int(config.get("RATE_LIMIT_BURST", 1))),
+                min_interval=config.get("REQUEST_INTERVAL", 0.5))
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        """启动识别线程"""
+        self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(i,), name=f"RecognitionService-{i}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        self.ready = True
+        log_print(f"[识别服务] 识别线程:{self.workers}, 每批最多{self.max_batch}张, "
+                  f"凑批等待{self.max_wait * 1000:.0f}ms, 排队上限{self.max_pending}")
+
+    def stop(self):
+        """停止识别线程，未完成的请求返回错误"""
+        self.ready = False
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=5)
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except Empty:
+                break
+            self._finish(job, None, REQUEST_STATUS_ERROR)
+
+    def submit(self, jobs):
+        """
+        提交一组图像
+
+        Args:
+            jobs: _Job列表
+
+        Raises:
+            ServiceOverloaded: 等待识别的图像数将超过上限
+        """
+        with self._lock:
+            if not self.ready or self.pending + len(jobs) > self.max_pending:
+                raise ServiceOverloaded()
+            self.pending += len(jobs)
+        for job in jobs:
+            self._queue.put(job)
+
+    def abandon(self, jobs):
+        """
+        放弃一组图像，请求等待超时后调用
+
+        仍在队列中的图像取出时直接结束，不再识别，也不再占用排队名额。
+
+        Args:
+            jobs: _Job列表
+        """
+        for job in jobs:
+            job.abandoned = True
+
+    def _finish(self, job, result, status):
+        """记录识别结果并唤醒等待的请求"""
+        job.result = result
+        job.status = status
+        job.finished_at = time.perf_counter()
+        with self._lock:
+            self.pending -= 1
+        job.done.set()
+
+    def _collect_batch(self):
+        """取出一批图像，第一张到达后最多等待max_wait秒"""
+        first = self._take(0.5)
+        if first is None:
+            return []
+        batch = [first]
+        if first.is_url:
+            return batch
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            job = self._take(remaining)
+            if job is None:
+                break
+            if job.is_url:
+                # URL需要单独下载识别，放回队列交给下一批
+                self._queue.put(job)
+                break
+            batch.append(job)
+        return batch
+
+    def _take(self, timeout):
+        """
+        取出下一张图像，跳过请求已超时返回的图像
+
+        Returns:
+            _Job: 下一张需要识别的图像，超时时为None
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                job = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except Empty:
+                return None
+            if not job.abandoned:
+                return job
+            self._finish(job, None, REQUEST_STATUS_ERROR)
+
+    def _worker(self, worker_id):
+        """识别线程处理函数"""
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            started_at = time.perf_counter()
+            for job in batch:
+                job.started_at = started_at
+            try:
+                self._recognize(batch)
+            except Exception as e:  # pylint: disable=broad-except
+                log("ERROR", f"识别服务线程 {worker_id + 1} 识别出错: {str(e)}")
+                for job in batch:
+                    if not job.done.is_set():
+                        self._finish(job, None, REQUEST_STATUS_ERROR)
+
+    def _recognize(self, batch):
+        """识别一批图像"""
+        client = self.client
+        if len(batch) > 1:
+            results = list(client.recognize_batch([job.source for job in batch]) or [])
+            if len(results) != len(batch):
+                log_print(f"[识别服务] 批量识别返回{len(results)}个结果，提交了{len(batch)}张图像", "WARNING")
+            for index, job in enumerate(batch):
+                if index < len(results):
+                    # 每张图像带有各自的请求状态
+                    result, status = results[index]
+                    self._finish(job, result, status)
+                else:
+                    # 没有对应结果的图像同样要结束，否则请求一直等待且排队名额不会释放
+                    self._finish(job, None, REQUEST_STATUS_ERROR)
+            return
+
+        job = batch[0]
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(is_cancelled=lambda: not self._running)
+        # 状态按线程记录，识别前先复位，避免沿用上一次请求的失败状态
+        client.set_request_status(REQUEST_STATUS_OK)
+        result = client.recognize(job.source, is_url=job.is_url)
+        self._finish(job, result, client.get_request_status())
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理"""
+
+    server_version = "RailwayOCR"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        log_print(f"[识别服务] {self.address_string()} {format % args}", "DEBUG")
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        service = self.server.service
+        if self.path == "/healthz":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/readyz":
+            ready = service.ready and service.pending < service.max_pending
+            self._send_json(200 if ready else 503, {
+                "status": "ready" if ready else "unavailable",
+                "engine": service.client_type,
+                "pending": service.pending,
+                "max_pending": service.max_pending,
+            })
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        received_at = time.perf_counter()
+        try:
+            body = self._read_body()
+            if self.path == "/recognize":
+                jobs = [self._parse_single(body)]
+            elif self.path == "/recognize/batch":
+                jobs = self._parse_batch(body)
+            else:
+                self._send_json(404, {"error": "not found"})
+                return
+        except _HttpError as e:
+            self._send_json(e.code, {"error": e.message})
+            return
+
+        service = self.server.service
+        if len(jobs) > service.max_pending:
+            self._send_json(413, {"error": f"单次请求最多{service.max_pending}张图像"})
+            return
+        try:
+            service.submit(jobs)
+        except ServiceOverloaded:
+            self._send_json(503, {"error": "服务繁忙，请稍后重试"}, {"Retry-After": "1"})
+            return
+
+        deadline = time.perf_counter() + self.server.request_timeout
+        for job in jobs:
+            if not job.done.wait(max(0.0, deadline - time.perf_counter())):
+                service.abandon(jobs)
+                self._send_json(504, {"error": "识别超时"})
+                return
+
+        items = [{"result": job.result, "success": job.result is not None, "status": job.status} for job in jobs]
+        payload = items[0] if self.path == "/recognize" else {"results": items}
+        self._send_json(200, payload, self._timing_headers(jobs, received_at))
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError as e:
+            raise _HttpError(400, "Content-Length格式错误") from e
+        if length <= 0:
+            raise _HttpError(400, "请求体为空")
+        if length > self.server.max_body_bytes:
+            raise _HttpError(413, "请求体过大")
+        return self.rfile.read(length)
+
+    def _parse_single(self, body):
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            return _Job(body)
+        data = self._load_json(body)
+        if data.get("url"):
+            return _Job(str(data["url"]), is_url=True)
+        if "image" in data:
+            return _Job(_decode_image(data["image"]))
+        raise _HttpError(400, "缺少image或url字段")
+
+    def _parse_batch(self, body):
+        images = self._load_json(body).get("images")
+        if not isinstance(images, list) or not images:
+            raise _HttpError(400, "images必须是非空的base64字符串列表")
+        return [_Job(_decode_image(image)) for image in images]
+
+    @staticmethod
+    def _load_json(body):
+        try:
+            data = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise _HttpError(400, f"JSON格式错误: {str(e)}") from e
+        if not isinstance(data, dict):
+            raise _HttpError(400, "请求体必须是JSON对象")
+        return data
+
+    @staticmethod
+    def _timing_headers(jobs, received_at):
+        queue_ms = max((job.started_at or job.finished_at) - job.enqueued_at for job in jobs) * 1000
+        process_ms = max(job.finished_at - (job.started_at or job.finished_at) for job in jobs) * 1000
+        total_ms = (time.perf_counter() - received_at) * 1000
+        return {
+            "X-Queue-Time-Ms": f"{queue_ms:.1f}",
+            "X-Process-Time-Ms": f"{process_ms:.1f}",
+            "X-Total-Time-Ms": f"{total_ms:.1f}",
+            "Server-Timing": f"queue;dur={queue_ms:.1f}, ocr;dur={process_ms:.1f}, total;dur={total_ms:.1f}",
+        }
+
+    def _send_json(self, code, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _HttpError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _decode_image(value):
+    if not isinstance(value, str) or not value:
+        raise _HttpError(400, "图像必须是base64字符串")
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise _HttpError(400, f"base64解码失败: {str(e)}") from e
+
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, request_timeout=60, max_body_mb=32):
+    """
+    创建HTTP服务器
+
+    Args:
+        service: 已启动的RecognitionService
+        host: 监听地址，默认只监听本机
+        port: 监听端口，0表示自动分配
+        request_timeout: 单个请求等待识别结果的最长时间（秒）
+        max_body_mb: 请求体大小上限（MB）
+
+    Returns:
+        ThreadingHTTPServer: 调用serve_forever()开始服务
+    """
+    server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.request_timeout = request_timeout
+    server.max_body_bytes = int(max_body_mb * 1024 * 1024)
+    return server
@@ -0,0 +1,165 @@
+"""
+请求速率限制模块
+
+提供基于GCRA（通用信元速率算法）的令牌桶限速器，每个OCR服务提供商共享一个实例。
+限速器只在计算预约时间时短暂持有内部锁，等待过程在锁外进行，
+因此一个线程被限速时不会阻塞其他线程更新计数或复制文件。
+"""
+
+import threading
+import time
+
+# 取消等待时的轮询间隔（秒）
+_CANCEL_POLL_INTERVAL = 0.5
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucketRateLimiter:
+    """
+    GCRA令牌桶限速器
+
+    将每分钟请求数换算为固定的发放间隔，请求按间隔平滑分布在整个时间窗口内，
+    不会在窗口边界集中突发。burst控制允许的最大突发请求数。
+
+    属性:
+        emission_interval: 相邻两次许可之间的最小间隔（秒）
+        burst: 允许的突发请求数
+    """
+
+    def __init__(self, rate_per_minute, burst=1, min_interval=0.0):
+        """
+        初始化限速器
+
+        Args:
+            rate_per_minute: 每分钟允许的请求数
+            burst: 允许的突发请求数，1表示完全平滑
+            min_interval: 相邻请求的最小间隔（秒），用于兼容REQUEST_INTERVAL配置
+        """
+        self._lock = threading.Lock()
+        self._tat = 0.0  # 理论到达时间
+        self.emission_interval = 0.0
+        self.burst = 1
+        self._tolerance = 0.0
+        self.acquired_count = 0
+        self.waited_count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.configure(rate_per_minute, burst, min_interval)
+
+    def configure(self, rate_per_minute, burst=1, min_interval=0.0):
+        """
+        更新限速参数，已发放的预约保持不变
+
+        Args:
+            rate_per_minute: 每分钟允许的请求数
+            burst: 允许的突发请求数
+            min_interval: 相邻请求的最小间隔（秒）
+        """
+        rate_per_minute = max(float(rate_per_minute), 1e-6)
+        burst = max(int(burst), 1)
+        with self._lock:
+            self.emission_interval = max(60.0 / rate_per_minute, float(min_interval or 0.0))
+            self.burst = burst
+            self._tolerance = self.emission_interval * (burst - 1)
+
+    def reserve(self):
+        """
+        预约一个许可，立即返回需要等待的时间，不会阻塞
+
+        Returns:
+            float: 调用方在发送请求前需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            wait = max(0.0, tat - self._tolerance - now)
+            self._tat = tat + self.emission_interval
+
+            self.acquired_count += 1
+            if wait > 0:
+                self.waited_count += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+        return wait
+
+    def refund(self):
+        """
+        归还一个已预约但没有使用的许可，例如等待期间请求被取消
+
+        理论到达时间回退一个发放间隔，之后的请求可以提前使用这个名额。
+        """
+        with self._lock:
+            self._tat = max(self._tat - self.emission_interval, 0.0)
+            self.acquired_count = max(0, self.acquired_count - 1)
+
+    def acquire(self, is_cancelled=None, on_wait=None):
+        """
+        获取一个许可，必要时在锁外等待
+
+        Args:
+            is_cancelled: 可选的无参回调，返回True时中止等待
+            on_wait: 可选回调，需要等待时以等待秒数调用一次
+
+        Returns:
+            float: 实际需要等待的秒数
+
+        Raises:
+            RuntimeError: 等待期间被取消时抛出
+        """
+        wait = self.reserve()
+        if wait <= 0:
+            return 0.0
+
+        if on_wait is not None:
+            on_wait(wait)
+
+        deadline = time.monotonic() + wait
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if is_cancelled is not None and is_cancelled():
+                self.refund()
+                raise RuntimeError("等待速率限制许可时已取消")
+            time.sleep(min(_CANCEL_POLL_INTERVAL, remaining))
+        return wait
+
+    def get_stats(self):
+        """
+        获取限速统计信息
+
+        Returns:
+            dict: 包含许可总数、等待次数、累计等待时间和最长等待时间
+        """
+        with self._lock:
+            return {
+                'acquired': self.acquired_count,
+                'waited': self.waited_count,
+                'total_wait': self.total_wait,
+                'max_wait': self.max_wait,
+            }
+
+
+def get_rate_limiter(provider, rate_per_minute, burst=1, min_interval=0.0):
+    """
+    获取指定服务提供商共享的限速器，参数变化时就地更新
+
+    Args:
+        provider: 服务提供商标识，例如客户端的client_type
+        rate_per_minute: 每分钟允许的请求数
+        burst: 允许的突发请求数
+        min_interval: 相邻请求的最小间隔（秒）
+
+    Returns:
+        TokenBucketRateLimiter: 该提供商的限速器实例
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = TokenBucketRateLimiter(rate_per_minute, burst, min_interval)
+            _limiters[provider] = limiter
+        else:
+            limiter.configure(rate_per_minute, burst, min_interval)
+        return limiter
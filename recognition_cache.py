@@ -0,0 +1,433 @@
+"""
+识别结果缓存模块
+
+按图像内容哈希持久化缓存OCR识别结果，键中包含识别引擎、RE正则等配置指纹，
+配置变化后旧结果自然失效。缓存存放在SQLite中，按占用空间做LRU淘汰；
+无法解码、未匹配等负面结果同样会被记录，重复出现的坏图可以直接跳过。
+同一内容的并发识别只执行一次，其余线程等待并共享结果。
+"""
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from utils import log_print
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_internal', 'recognition_cache.db')
+
+# 默认缓存空间上限（字节）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 每条记录除文本外的估算固定开销（字节），包括键、索引和SQLite页内开销
+_ENTRY_OVERHEAD = 128
+
+# 累积多少次写入或多长时间（秒）后提交一次事务
+_COMMIT_BATCH = 64
+_COMMIT_INTERVAL = 2.0
+
+# 超出空间上限时淘汰到上限的比例，避免每次写入都触发淘汰
+_EVICT_TARGET_RATIO = 0.9
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def make_fingerprint(*parts):
+    """
+    根据影响识别结果的配置生成指纹
+
+    Args:
+        *parts: 识别引擎、正则表达式、识别尝试次数等
+
+    Returns:
+        str: 16位十六进制指纹
+    """
+    text = "\x1f".join(str(part) for part in parts)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def recognition_fingerprint(client, config):
+    """
+    OCR客户端和配置的识别指纹，识别缓存和扫描索引共用
+
+    包含识别引擎、RE正则、识别尝试次数，以及本地OCR的预处理版本和缩小解码尺寸，
+    任何一项变化都会使旧的识别结果失效。
+
+    Args:
+        client: OCR客户端实例
+        config: 应用配置字典
+
+    Returns:
+        str: 16位十六进制指纹
+    """
+    return make_fingerprint(
+        getattr(client, 'client_type', 'unknown'), config.get("RE", r'.*'), config.get("RECOGNITION_ATTEMPTS", 2),
+        getattr(client, 'preprocess_version', None), getattr(client, 'decode_size', None))
+
+
+class _InFlight:
+    """一次进行中的识别，等待者共享其结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.outcome = None
+
+
+class RecognitionCache:
+    """
+    持久化识别结果缓存
+
+    所有线程共用一个SQLite连接，由内部锁保护；写入和访问时间的更新先累积在当前事务中，
+    按批次提交，识别线程不会因为每次写入都落盘而阻塞。
+    数据库不可用时缓存自动停用，识别流程不受影响。
+
+    属性:
+        max_bytes: 缓存空间上限（字节）
+        hits: 命中次数
+        misses: 未命中次数
+        shared: 等待其他线程的同内容识别而直接复用结果的次数
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        打开或创建缓存数据库
+
+        Args:
+            path: SQLite数据库文件路径
+            max_bytes: 缓存空间上限（字节）
+        """
+        self.path = path
+        self.max_bytes = max(1024 * 1024, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._touched = {}
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+        self._total_bytes = 0
+        self._conn = None
+        self._open()
+
+    def _open(self):
+        """打开数据库并统计当前占用空间"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, result TEXT, status TEXT NOT NULL, error TEXT, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used)")
+            conn.commit()
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self._conn = conn
+        except (sqlite3.Error, OSError) as e:
+            log_print(f"[识别缓存] 无法打开缓存数据库，已停用缓存: {str(e)}", "WARNING")
+            self._conn = None
+
+    @staticmethod
+    def make_key(image_source, fingerprint):
+        """
+        生成缓存键
+
+        Args:
+            image_source: 图像字节数据
+            fingerprint: make_fingerprint生成的配置指纹
+
+        Returns:
+            str: 缓存键
+        """
+        digest = hashlib.blake2b(image_source, digest_size=16).hexdigest()
+        return f"{fingerprint}:{digest}"
+
+    def get(self, key):
+        """
+        查询缓存
+
+        Args:
+            key: make_key生成的缓存键
+
+        Returns:
+            Optional[dict]: 命中时返回包含 result/status/attempts/error/cached 的结果字典
+        """
+        with self._lock:
+            outcome = self._lookup(key)
+            if outcome is not None:
+                self.hits += 1
+            return outcome
+
+    def begin(self, key):
+        """
+        查询缓存，未命中时登记为进行中的识别
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            tuple: ("hit", 结果字典)、("wait", 进行中的识别) 或 ("owner", None)；
+                   返回owner时调用方必须在识别结束后调用finish或abandon
+        """
+        with self._lock:
+            outcome = self._lookup(key)
+            if outcome is not None:
+                self.hits += 1
+                return "hit", outcome
+            flight = self._inflight.get(key)
+            if flight is not None:
+                return "wait", flight
+            self.misses += 1
+            self._inflight[key] = _InFlight()
+            return "owner", None
+
+    def wait(self, flight, is_cancelled=None):
+        """
+        等待其他线程的同内容识别结束
+
+        Args:
+            flight: begin返回的进行中识别
+            is_cancelled: 可选的无参回调，返回True时停止等待
+
+        Returns:
+            Optional[dict]: 共享的结果字典；识别失败或被取消时返回None，调用方应自行识别
+        """
+        while not flight.event.wait(0.5):
+            if is_cancelled is not None and is_cancelled():
+                return None
+        if flight.outcome is not None:
+            with self._lock:
+                self.shared += 1
+            return dict(flight.outcome, cached=True)
+        return None
+
+    def finish(self, key, outcome, store=True):
+        """
+        结束进行中的识别并唤醒等待者
+
+        Args:
+            key: 缓存键
+            outcome: 包含 result/status/error 的识别结果字典
+            store: 是否持久化；限流、超时等临时失败不应写入缓存，等待者会各自重新识别
+        """
+        with self._lock:
+            flight = self._inflight.pop(key, None)
+            if store:
+                self._store(key, outcome)
+        if flight is not None:
+            flight.outcome = outcome if store else None
+            flight.event.set()
+
+    def abandon(self, key):
+        """放弃进行中的识别，等待者各自重新识别"""
+        self.finish(key, None, store=False)
+
+    def put(self, key, outcome):
+        """
+        直接写入缓存
+
+        Args:
+            key: 缓存键
+            outcome: 包含 result/status/error 的识别结果字典
+        """
+        with self._lock:
+            self._store(key, outcome)
+
+    def get_or_compute(self, key, compute, should_store, is_cancelled=None):
+        """
+        查询缓存，未命中时执行识别；同一内容的并发识别只执行一次
+
+        Args:
+            key: 缓存键
+            compute: 无参回调，返回识别结果字典
+            should_store: 接收识别结果字典，返回是否写入缓存
+            is_cancelled: 可选的无参回调，等待其他线程时返回True则停止等待
+
+        Returns:
+            dict: 识别结果字典，来自缓存时包含 cached=True
+
+        Raises:
+            RuntimeError: 等待期间被取消
+        """
+        while True:
+            state, value = self.begin(key)
+            if state == "hit":
+                return value
+            if state == "wait":
+                outcome = self.wait(value, is_cancelled)
+                if outcome is not None:
+                    return outcome
+                if is_cancelled is not None and is_cancelled():
+                    raise RuntimeError("等待相同图像的识别结果时已取消")
+                continue
+
+            try:
+                outcome = compute()
+            except BaseException:
+                self.abandon(key)
+                raise
+            self.finish(key, outcome, store=should_store(outcome))
+            return outcome
+
+    def flush(self):
+        """提交所有未提交的写入"""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        """提交写入并关闭数据库"""
+        with self._lock:
+            self._commit()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self):
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 命中、未命中、共享次数及当前占用空间
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _lookup(self, key):
+        """在持有锁的情况下查询缓存"""
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT result, status, error FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        self._maybe_commit()
+        return {'result': row[0], 'status': row[1], 'attempts': 0, 'error': row[2], 'cached': True}
+
+    def _store(self, key, outcome):
+        """在持有锁的情况下写入一条记录"""
+        if self._conn is None or outcome is None:
+            return
+        result = outcome.get('result')
+        error = outcome.get('error')
+        size = _ENTRY_OVERHEAD + len(key) + len(result or "") * 3 + len(error or "") * 3
+        try:
+            row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, result, status, error, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, result, outcome.get('status'), error, size, time.time()))
+        except sqlite3.Error as e:
+            self._disable(e)
+            return
+        self._total_bytes += size - (row[0] if row else 0)
+        self._touched.pop(key, None)
+        self._pending_writes += 1
+        if self._total_bytes > self.max_bytes:
+            try:
+                self._evict()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return
+        self._maybe_commit()
+
+    def _evict(self):
+        """按最近使用时间淘汰记录，直到占用空间降到上限的一定比例"""
+        target = self.max_bytes * _EVICT_TARGET_RATIO
+        # 先落盘待更新的访问时间，保证淘汰顺序准确
+        self._apply_touched()
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_used LIMIT 256").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            # 只删除降到目标所需的最旧记录，而不是整批删除
+            evicted = []
+            for key, size in rows:
+                evicted.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        log_print(f"[识别缓存] 已按LRU淘汰旧记录，当前占用 {self._total_bytes / 1024 / 1024:.1f}MB")
+
+    def _apply_touched(self):
+        """写入累积的访问时间更新"""
+        if self._touched:
+            self._conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _maybe_commit(self):
+        """写入累积到一定数量或距上次提交超过一定时间时提交"""
+        if (self._pending_writes + len(self._touched) >= _COMMIT_BATCH
+                or time.monotonic() - self._last_commit >= _COMMIT_INTERVAL):
+            self._commit()
+
+    def _commit(self):
+        """在持有锁的情况下提交事务"""
+        if self._conn is None:
+            return
+        try:
+            self._apply_touched()
+            self._conn.commit()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+
+    def _disable(self, error):
+        """数据库出错时停用缓存"""
+        log_print(f"[识别缓存] 缓存数据库操作失败，已停用缓存: {str(error)}", "WARNING")
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+        self._conn = None
+
+
+def get_recognition_cache(max_bytes=DEFAULT_MAX_BYTES, path=DEFAULT_CACHE_PATH):
+    """
+    获取共享的识别结果缓存，同一路径只打开一次数据库
+
+    Args:
+        max_bytes: 缓存空间上限（字节），已存在的实例会更新为该值
+        path: SQLite数据库文件路径
+
+    Returns:
+        RecognitionCache: 缓存实例
+    """
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = RecognitionCache(path, max_bytes)
+            _caches[path] = cache
+        else:
+            cache.max_bytes = max(1024 * 1024, int(max_bytes))
+        return cache
+
+
+@atexit.register
+def _close_caches():
+    """程序退出时提交所有缓存的未提交写入"""
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.close()
+        _caches.clear()
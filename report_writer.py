@@ -0,0 +1,233 @@
+"""
+运行报告模块
+
+处理过程中为每个文件追加一条报告记录（源文件、识别结果、引擎、尝试次数、各阶段耗时、目标文件），
+下游统计无需重新遍历目标文件夹。记录先缓存在内存中，达到批量大小或间隔时间后一次写入，
+报告占用的内存与文件总数无关。
+
+支持的格式:
+    csv      UTF-8（带BOM，可直接用Excel打开）
+    jsonl    每行一个JSON对象
+    parquet  列式存储，适合大规模运行，需要安装pyarrow
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from utils import log_print
+
+REPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+# 未指定REPORT_DIR时报告所在的文件夹，与日志放在一起，不写入分类输出文件夹
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_internal', 'reports')
+
+# 报告字段，顺序即CSV列顺序
+REPORT_FIELDS = ('source_path', 'recognition', 'success', 'error', 'engine', 'attempts', 'cached',
+                 'read_ms', 'recognize_ms', 'rate_limit_wait_ms', 'place_ms', 'target_path', 'finished_at')
+
+# 缓存的记录最长多久写入一次（秒），监视模式长时间运行时报告也能及时更新
+_FLUSH_INTERVAL = 5.0
+
+
+class ReportWriter(ABC):
+    """
+    报告写入器基类
+
+    write可以在多个输出线程中同时调用，缓存满或超过间隔时间后由当前调用线程写入。
+
+    属性:
+        path: 报告文件路径
+        count: 已提交的记录数
+    """
+
+    format = None
+
+    def __init__(self, path, batch_size=1024):
+        """
+        初始化写入器
+
+        Args:
+            path: 报告文件路径
+            batch_size: 累积多少条记录后写入一次
+        """
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.count = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._closed = False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, record):
+        """
+        追加一条记录
+
+        Args:
+            record: 以REPORT_FIELDS为键的字典，缺少的字段记为空
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer.append(record)
+            self.count += 1
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= _FLUSH_INTERVAL:
+                self._flush_locked()
+
+    def flush(self):
+        """写入缓存中的记录"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """写入剩余记录并关闭文件"""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            self._close_file()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            self._write_rows(rows)
+        except (OSError, ValueError) as e:
+            log_print(f"[运行报告] 写入报告失败，丢弃{len(rows)}条记录: {str(e)}", "ERROR")
+
+    @abstractmethod
+    def _write_rows(self, rows):
+        """
+        写入一批记录，在持有锁时调用
+
+        Args:
+            rows: 记录字典列表
+        """
+
+    @abstractmethod
+    def _close_file(self):
+        """关闭报告文件，在持有锁时调用"""
+
+
+class CsvReportWriter(ReportWriter):
+    """CSV报告"""
+
+    format = 'csv'
+
+    def __init__(self, path, batch_size=1024):
+        super().__init__(path, batch_size)
+        # pylint: disable=consider-using-with
+        self._file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write_rows(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def _close_file(self):
+        self._file.close()
+
+
+class JsonlReportWriter(ReportWriter):
+    """JSON Lines报告"""
+
+    format = 'jsonl'
+
+    def __init__(self, path, batch_size=1024):
+        super().__init__(path, batch_size)
+        # pylint: disable=consider-using-with
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def _write_rows(self, rows):
+        self._file.write("".join(
+            json.dumps({field: row.get(field) for field in REPORT_FIELDS}, ensure_ascii=False) + "\n"
+            for row in rows))
+        self._file.flush()
+
+    def _close_file(self):
+        self._file.close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """Parquet报告，每批记录写为一个行组"""
+
+    format = 'parquet'
+
+    def __init__(self, path, batch_size=65536):
+        # pylint: disable=import-outside-toplevel
+        import pyarrow
+        import pyarrow.parquet
+
+        super().__init__(path, batch_size)
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ('source_path', pyarrow.string()),
+            ('recognition', pyarrow.string()),
+            ('success', pyarrow.bool_()),
+            ('error', pyarrow.string()),
+            ('engine', pyarrow.string()),
+            ('attempts', pyarrow.int32()),
+            ('cached', pyarrow.bool_()),
+            ('read_ms', pyarrow.float64()),
+            ('recognize_ms', pyarrow.float64()),
+            ('rate_limit_wait_ms', pyarrow.float64()),
+            ('place_ms', pyarrow.float64()),
+            ('target_path', pyarrow.string()),
+            ('finished_at', pyarrow.string()),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression='zstd')
+
+    def _write_rows(self, rows):
+        columns = {field: [row.get(field) for row in rows] for field in REPORT_FIELDS}
+        self._writer.write_table(self._pa.table(columns, schema=self._schema))
+
+    def _close_file(self):
+        self._writer.close()
+
+
+_WRITERS = {'csv': CsvReportWriter, 'jsonl': JsonlReportWriter, 'parquet': ParquetReportWriter}
+
+
+def create_report_writer(path=None, fmt=None, directory=None):
+    """
+    创建报告写入器
+
+    Args:
+        path: 报告文件路径，为None时在directory中按时间生成文件名
+        fmt: 报告格式，为None时根据path的扩展名判断，默认csv
+        directory: 未指定path时报告所在的文件夹，默认为REPORTS_DIR
+
+    Returns:
+        ReportWriter: 报告写入器；parquet格式缺少pyarrow时改用csv
+
+    Raises:
+        ValueError: 不支持的报告格式
+        OSError: 无法创建报告文件
+    """
+    if fmt is None and path:
+        fmt = os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+    fmt = str(fmt or 'csv').lower()
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"不支持的报告格式: {fmt}，可选 {', '.join(REPORT_FORMATS)}")
+    if not path:
+        path = os.path.join(directory or REPORTS_DIR,
+                            f"railwayocr_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}")
+
+    if fmt == 'parquet':
+        try:
+            return ParquetReportWriter(path)
+        except ImportError:
+            path = os.path.splitext(path)[0] + '.csv'
+            log_print(f"[运行报告] 未安装pyarrow，无法写入Parquet报告，改用CSV: {path}", "WARNING")
+            fmt = 'csv'
+    return _WRITERS[fmt](path)
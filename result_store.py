@@ -0,0 +1,234 @@
+"""
+处理结果存储模块
+
+按列保存每个文件的处理结果：路径和目标路径各占一个字符串列表，识别结果和错误信息在字符串表中去重后
+只保存编号，成功、缓存等标记和尝试次数保存在紧凑数组中。内存中的记录超过阈值后整块写入临时SQLite文件，
+百万级文件的结果也只占用固定的内存，处理结束时只需交出统计摘要和本存储对象。
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+from array import array
+
+from utils import log_print
+
+# 内存中最多保留的记录数，超过后写入临时文件
+DEFAULT_SPILL_THRESHOLD = 100000
+
+_FLAG_SUCCESS = 1
+_FLAG_CACHED = 2
+_FLAG_RESUMED = 4
+
+_NO_STRING = -1
+
+
+class ResultRecord:
+    """单个文件的处理结果"""
+
+    __slots__ = ('file_path', 'target_path', 'recognition', 'error', 'success', 'cached', 'resumed', 'attempts')
+
+    def __init__(self, file_path, target_path, recognition, error, flags, attempts):
+        self.file_path = file_path
+        self.target_path = target_path
+        self.recognition = recognition
+        self.error = error
+        self.success = bool(flags & _FLAG_SUCCESS)
+        self.cached = bool(flags & _FLAG_CACHED)
+        self.resumed = bool(flags & _FLAG_RESUMED)
+        self.attempts = attempts
+
+    @property
+    def filename(self):
+        return os.path.basename(self.file_path) if self.file_path else ""
+
+    def to_dict(self):
+        """转换为与file_processed事件相同格式的结果字典"""
+        result = {'filename': self.filename, 'success': self.success, 'attempts': self.attempts,
+                  'cached': self.cached, 'file_path': self.file_path, 'target_path': self.target_path}
+        if self.success:
+            result['result'] = self.recognition
+            result['recognition'] = self.recognition
+        else:
+            result['error'] = self.error
+        if self.resumed:
+            result['resumed'] = True
+        return result
+
+
+class ResultStore:
+    """
+    紧凑的处理结果存储
+
+    可以在多个输出线程中同时追加；遍历时先返回已写入临时文件的记录，再返回内存中的记录。
+
+    属性:
+        spill_threshold: 内存中最多保留的记录数
+        spilled: 已写入临时文件的记录数
+    """
+
+    def __init__(self, spill_threshold=DEFAULT_SPILL_THRESHOLD, spill_dir=None):
+        """
+        初始化结果存储
+
+        Args:
+            spill_threshold: 内存中最多保留的记录数
+            spill_dir: 临时文件所在文件夹，默认使用系统临时文件夹
+        """
+        self.spill_threshold = max(1, int(spill_threshold))
+        self.spill_dir = spill_dir
+        self.spilled = 0
+        self.success_count = 0
+        self.failed_count = 0
+        self._lock = threading.Lock()
+        self._strings = []
+        self._string_ids = {}
+        self._label_counts = {}
+        self._reset_columns()
+        self._conn = None
+        self._spill_path = None
+        self._finalizer = None
+
+    def _reset_columns(self):
+        self._paths = []
+        self._targets = []
+        self._labels = array('i')
+        self._errors = array('i')
+        self._flags = array('B')
+        self._attempts = array('H')
+
+    def append(self, result):
+        """
+        追加一个文件的处理结果
+
+        Args:
+            result: 结果字典（file_path、target_path、success、recognition/result、error、attempts、cached）
+        """
+        success = bool(result.get('success'))
+        flags = ((_FLAG_SUCCESS if success else 0)
+                 | (_FLAG_CACHED if result.get('cached') else 0)
+                 | (_FLAG_RESUMED if result.get('resumed') else 0))
+        with self._lock:
+            if success:
+                label = self._intern(result.get('recognition') or result.get('result'))
+                error = _NO_STRING
+                self.success_count += 1
+                self._label_counts[label] = self._label_counts.get(label, 0) + 1
+            else:
+                label = _NO_STRING
+                error = self._intern(result.get('error'))
+                self.failed_count += 1
+            self._paths.append(result.get('file_path'))
+            self._targets.append(result.get('target_path'))
+            self._labels.append(label)
+            self._errors.append(error)
+            self._flags.append(flags)
+            self._attempts.append(min(max(0, int(result.get('attempts') or 0)), 0xFFFF))
+            if len(self._paths) >= self.spill_threshold:
+                self._spill()
+
+    def __len__(self):
+        return self.success_count + self.failed_count
+
+    def __iter__(self):
+        """逐条返回ResultRecord，遍历期间不应继续追加"""
+        if self._conn is not None:
+            # 分块读取，避免一次把临时文件中的记录全部载入内存
+            last_rowid = 0
+            while True:
+                with self._lock:
+                    chunk = self._conn.execute(
+                        "SELECT rowid, path, target, label, error, flags, attempts FROM results "
+                        "WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, self.spill_threshold)).fetchall()
+                if not chunk:
+                    break
+                last_rowid = chunk[-1][0]
+                for row in chunk:
+                    yield self._record(*row[1:])
+        for i in range(len(self._paths)):
+            yield self._record(self._paths[i], self._targets[i], self._labels[i], self._errors[i],
+                               self._flags[i], self._attempts[i])
+
+    def label_counts(self):
+        """
+        各识别结果的文件数
+
+        Returns:
+            dict: {识别结果: 文件数}
+        """
+        with self._lock:
+            return {self._strings[label]: count for label, count in self._label_counts.items()}
+
+    def summary(self):
+        """
+        结果摘要
+
+        Returns:
+            dict: total、success、failed、classes（不同识别结果数）、spilled（已写入临时文件的记录数）
+        """
+        with self._lock:
+            return {'total': self.success_count + self.failed_count, 'success': self.success_count,
+                    'failed': self.failed_count, 'classes': len(self._label_counts), 'spilled': self.spilled}
+
+    def close(self):
+        """释放内存中的记录并删除临时文件"""
+        with self._lock:
+            self._reset_columns()
+            self._conn = None
+            if self._finalizer is not None:
+                self._finalizer()
+                self._finalizer = None
+
+    def _intern(self, text):
+        if text is None:
+            return _NO_STRING
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self._strings)
+            self._strings.append(text)
+        return string_id
+
+    def _string(self, string_id):
+        return None if string_id == _NO_STRING else self._strings[string_id]
+
+    def _record(self, path, target, label, error, flags, attempts):
+        return ResultRecord(path, target, self._string(label), self._string(error), flags, attempts)
+
+    def _spill(self):
+        """将内存中的记录整块写入临时文件，调用方需持有锁"""
+        try:
+            if self._conn is None:
+                fd, self._spill_path = tempfile.mkstemp(prefix="railwayocr-results-", suffix=".db",
+                                                        dir=self.spill_dir)
+                os.close(fd)
+                conn = sqlite3.connect(self._spill_path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=OFF")
+                conn.execute("PRAGMA synchronous=OFF")
+                conn.execute("CREATE TABLE results (path TEXT, target TEXT, label INTEGER, error INTEGER, "
+                             "flags INTEGER, attempts INTEGER)")
+                self._conn = conn
+                # 存储对象被回收或程序退出时删除临时文件
+                self._finalizer = weakref.finalize(self, _remove_spill_file, conn, self._spill_path)
+            self._conn.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                zip(self._paths, self._targets, self._labels, self._errors, self._flags, self._attempts))
+            self._conn.commit()
+            self.spilled += len(self._paths)
+            self._reset_columns()
+        except (sqlite3.Error, OSError) as e:
+            # 无法写入临时文件时继续保留在内存中，下次达到阈值时重试
+            log_print(f"[结果存储] 写入临时文件失败: {str(e)}", "WARNING")
+            self.spill_threshold *= 2
+
+
+def _remove_spill_file(conn, path):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+    try:
+        os.remove(path)
+    except OSError:
+        pass
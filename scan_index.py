@@ -0,0 +1,171 @@
+"""
+源文件夹增量索引模块
+
+为每组源文件夹、目标文件夹和识别配置持久化一份扫描索引，记录已成功分类文件的
+(路径, 大小, 修改时间, inode) 及识别结果。再次处理同一文件夹时只处理新增或有变化的文件。
+已知文件的签名以排序后的64位整数数组保存在内存中，百万级文件也能批量快速判断。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from utils import log_print
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_internal', 'scan_index')
+
+# 累积多少条记录后写入一次数据库
+_WRITE_BATCH = 512
+
+
+def file_signature(path, stat_result):
+    """
+    计算文件签名
+
+    Args:
+        path: 文件路径
+        stat_result: os.stat的结果
+
+    Returns:
+        int: 有符号64位整数签名，可直接存入SQLite和numpy.int64数组
+    """
+    text = f"{path}\x00{stat_result.st_size}\x00{stat_result.st_mtime_ns}\x00{stat_result.st_ino}"
+    digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+class ScanIndex:
+    """
+    源文件夹扫描索引
+
+    只记录识别成功并已放置的文件，识别失败的文件下次仍会重新处理。
+    识别引擎或识别配置（如RE正则、本地预处理版本）变化时使用不同的索引，已分类的文件会按新配置重新处理。
+
+    属性:
+        path: 索引数据库路径
+    """
+
+    def __init__(self, source_dir, dest_dir, fingerprint="", index_dir=INDEX_DIR):
+        """
+        初始化扫描索引
+
+        Args:
+            source_dir: 源文件夹
+            dest_dir: 目标文件夹
+            fingerprint: 识别配置指纹
+            index_dir: 索引文件所在目录
+        """
+        identity = f"{os.path.abspath(source_dir)}\x1f{os.path.abspath(dest_dir)}\x1f{fingerprint}"
+        index_id = hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()
+        self.path = os.path.join(index_dir, f"{index_id}.db")
+        self._lock = threading.Lock()
+        self._pending = []
+        self._known = np.empty(0, dtype=np.int64)
+        self._conn = None
+
+    def load(self):
+        """
+        打开索引数据库并加载已知文件的签名
+
+        Returns:
+            int: 已索引的文件数
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, "
+                "signature INTEGER NOT NULL, result TEXT)")
+            conn.commit()
+            signatures = np.fromiter((row[0] for row in conn.execute("SELECT signature FROM files")),
+                                     dtype=np.int64)
+        except (sqlite3.Error, OSError) as e:
+            log_print(f"[扫描索引] 无法打开扫描索引，本次处理全部文件: {str(e)}", "WARNING")
+            return 0
+
+        signatures.sort()
+        with self._lock:
+            self._conn = conn
+            self._known = signatures
+        return len(signatures)
+
+    def filter_changed(self, paths):
+        """
+        过滤出新增或有变化的文件
+
+        Args:
+            paths: 本次扫描到的文件路径列表
+
+        Returns:
+            tuple: (需要处理的文件列表, 跳过的未变化文件数)
+        """
+        if not len(self._known) or not paths:
+            return list(paths), 0
+
+        signatures = np.empty(len(paths), dtype=np.int64)
+        valid = np.ones(len(paths), dtype=bool)
+        for i, path in enumerate(paths):
+            try:
+                signatures[i] = file_signature(path, os.stat(path))
+            except OSError:
+                # 无法读取状态的文件交给读取线程报告错误
+                valid[i] = False
+                signatures[i] = 0
+
+        positions = np.searchsorted(self._known, signatures)
+        positions[positions >= len(self._known)] = 0
+        unchanged = valid & (self._known[positions] == signatures)
+        changed = [path for path, skip in zip(paths, unchanged) if not skip]
+        return changed, int(unchanged.sum())
+
+    def record(self, path, result):
+        """
+        记录已成功分类的文件，移动模式下源文件已不存在时忽略
+
+        Args:
+            path: 源文件路径
+            result: 识别结果
+        """
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return
+        row = (path, stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino,
+               file_signature(path, stat_result), result)
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= _WRITE_BATCH:
+                self._write()
+
+    def flush(self):
+        """写入缓冲的记录"""
+        with self._lock:
+            self._write()
+
+    def close(self):
+        """写入缓冲的记录并关闭数据库"""
+        with self._lock:
+            self._write()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _write(self):
+        """在持有锁的情况下批量写入"""
+        if self._conn is None or not self._pending:
+            self._pending.clear()
+            return
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, signature, result) "
+                "VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            log_print(f"[扫描索引] 写入扫描索引失败: {str(e)}", "WARNING")
+        self._pending.clear()
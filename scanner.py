@@ -0,0 +1,305 @@
+"""
+目录扫描模块
+
+在后台线程中基于os.scandir并行遍历源文件夹，发现的图像文件按批次流式输出，
+处理线程无需等待整个目录树扫描完成即可开始识别。网络共享等高延迟文件系统上，
+多个子目录同时遍历可以显著缩短扫描时间。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty, Full
+
+from utils import log_print
+
+DEFAULT_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+# 输出队列中最多缓存的批次数，处理跟不上时扫描线程暂停
+_MAX_PENDING_BATCHES = 256
+
+_SCAN_END = object()
+
+# 目录修改时间距今不足该值（纳秒）时下次轮询仍重新扫描，覆盖FAT/SMB等文件系统较粗的时间精度
+_MTIME_SETTLE_NS = 2 * 1000 * 1000 * 1000
+
+
+class DirectoryScanner:
+    """
+    并行目录扫描器
+
+    待扫描的目录放在共享队列中，多个扫描线程各自取出一个目录执行scandir，
+    子目录放回队列，匹配扩展名的文件按目录或按batch_size分批输出。
+
+    属性:
+        found_count: 已发现的图像文件数
+        dir_count: 已扫描的目录数
+        error_count: 无法访问的目录数
+    """
+
+    def __init__(self, root, extensions=DEFAULT_IMAGE_EXTENSIONS, workers=4, batch_size=256):
+        """
+        初始化扫描器
+
+        Args:
+            root: 要扫描的根目录
+            extensions: 允许的文件扩展名（不区分大小写）
+            workers: 并行扫描的线程数
+            batch_size: 每批输出的最大文件数
+        """
+        self.root = os.path.abspath(root)
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.found_count = 0
+        self.dir_count = 0
+        self.error_count = 0
+        self._dirs = Queue()
+        self._batches = Queue(maxsize=_MAX_PENDING_BATCHES)
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """启动扫描线程"""
+        self._outstanding = 1
+        self._dirs.put(self.root)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._scan_worker, name=f"DirectoryScanner-{i}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def batches(self):
+        """
+        逐批获取扫描结果，扫描结束或被取消后停止
+
+        Yields:
+            list: 图像文件的绝对路径列表
+        """
+        while True:
+            batch = self._batches.get()
+            if batch is _SCAN_END:
+                return
+            yield batch
+
+    def cancel(self):
+        """取消扫描"""
+        self._cancelled.set()
+        self._finish()
+        # 扫描线程可能阻塞在已满的输出队列上，丢弃未取走的批次让其退出
+        while True:
+            try:
+                self._batches.get_nowait()
+            except Empty:
+                break
+        self._batches.put(_SCAN_END)
+
+    def _scan_worker(self):
+        """扫描线程：逐个目录执行scandir，直到所有目录扫描完成"""
+        while not self._done.is_set():
+            try:
+                directory = self._dirs.get(timeout=0.1)
+            except Empty:
+                continue
+            try:
+                self._scan_directory(directory)
+            finally:
+                with self._lock:
+                    self._outstanding -= 1
+                    finished = self._outstanding == 0
+                if finished and not self._cancelled.is_set():
+                    self._finish()
+                    self._batches.put(_SCAN_END)
+
+    def _scan_directory(self, directory):
+        """扫描单个目录，子目录放回待扫描队列，图像文件按批输出"""
+        batch = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if self._cancelled.is_set():
+                        return
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            with self._lock:
+                                self._outstanding += 1
+                            self._dirs.put(entry.path)
+                        elif entry.name.lower().endswith(self.extensions) and entry.is_file():
+                            batch.append(entry.path)
+                            if len(batch) >= self.batch_size:
+                                self._emit(batch)
+                                batch = []
+                    except OSError as e:
+                        log_print(f"[目录扫描] 无法读取 {entry.path}: {str(e)}", "WARNING")
+        except OSError as e:
+            with self._lock:
+                self.error_count += 1
+            log_print(f"[目录扫描] 无法访问文件夹 {directory}: {str(e)}", "WARNING")
+        finally:
+            with self._lock:
+                self.dir_count += 1
+        if batch:
+            self._emit(batch)
+
+    def _emit(self, batch):
+        """输出一批文件"""
+        with self._lock:
+            self.found_count += len(batch)
+        while not self._cancelled.is_set():
+            try:
+                self._batches.put(batch, timeout=0.5)
+                return
+            except Full:
+                continue
+
+    def _finish(self):
+        """标记扫描结束"""
+        self._done.set()
+
+
+class _WatchedDir:
+    """监视器记录的单个目录状态"""
+
+    __slots__ = ('mtime_ns', 'subdirs', 'files', 'pending')
+
+    def __init__(self, mtime_ns, subdirs, files, pending):
+        self.mtime_ns = mtime_ns
+        self.subdirs = subdirs
+        self.files = files
+        self.pending = pending
+
+
+class FolderWatcher:
+    """
+    源文件夹监视器
+
+    记录每个目录的修改时间、子目录和已处理的文件名。目录中增删文件会改变目录的修改时间，
+    每次轮询只对目录执行stat，修改时间变化的目录才重新scandir，目录树没有变化时不会逐个stat文件。
+    拷贝中的文件大小和修改时间仍在变化，只有连续两次轮询状态一致的文件才视为写入完成，
+    因此新文件最迟约2个轮询间隔后被发现；只有这些尚未写入完成的文件每次轮询都要stat。
+    """
+
+    def __init__(self, root, extensions=DEFAULT_IMAGE_EXTENSIONS, workers=4):
+        """
+        初始化监视器
+
+        Args:
+            root: 要监视的根目录
+            extensions: 允许的文件扩展名
+            workers: 并行检查目录的线程数
+        """
+        self.root = os.path.abspath(root)
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.workers = max(1, int(workers))
+        # 第一次轮询之前由初始扫描标记的文件，第一次轮询时并入各目录的状态后清空
+        self._seen = set()
+        self._dirs = {}
+
+    def mark_seen(self, paths):
+        """将初始扫描已经交给处理流程的文件标记为已处理"""
+        self._seen.update(os.path.abspath(path) for path in paths)
+
+    def poll(self):
+        """
+        检查一次源文件夹
+
+        Returns:
+            list: 已写入完成且尚未处理过的新文件
+        """
+        visited = set()
+        level = [self.root]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="FolderWatcher") as executor:
+            while level:
+                next_level = []
+                for directory, state in zip(level, executor.map(self._refresh, level)):
+                    visited.add(directory)
+                    if state is None:
+                        self._dirs.pop(directory, None)
+                        continue
+                    self._dirs[directory] = state
+                    next_level.extend(os.path.join(directory, name) for name in state.subdirs)
+                level = next_level
+
+        # 已删除的目录不再记录，之后出现同名目录时重新扫描
+        for directory in self._dirs.keys() - visited:
+            del self._dirs[directory]
+        self._seen.clear()
+
+        ready = []
+        for directory, state in self._dirs.items():
+            if state.pending:
+                ready.extend(self._check_pending(directory, state))
+        return ready
+
+    def _refresh(self, directory):
+        """
+        检查单个目录，修改时间变化时重新扫描
+
+        Returns:
+            _WatchedDir: 目录的最新状态，目录无法访问时为None
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        state = self._dirs.get(directory)
+        if state is not None and state.mtime_ns == mtime_ns:
+            return state
+
+        subdirs = []
+        names = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.name.lower().endswith(self.extensions) and entry.is_file():
+                            names.add(entry.name)
+                    except OSError as e:
+                        log_print(f"[文件夹监视] 无法读取 {entry.path}: {str(e)}", "WARNING")
+        except OSError as e:
+            log_print(f"[文件夹监视] 无法访问文件夹 {directory}: {str(e)}", "WARNING")
+            return None
+
+        if state is None:
+            files = {name for name in names if os.path.join(directory, name) in self._seen}
+            pending = {}
+        else:
+            # 已移走的文件不再记录，之后出现同名文件时作为新文件处理
+            files = state.files & names
+            pending = state.pending
+        pending = {name: pending.get(name) for name in names - files}
+        if time.time_ns() - mtime_ns < _MTIME_SETTLE_NS:
+            # 修改时间精度较粗的文件系统上，同一时间刻度内稍后写入的文件不会再改变修改时间，下次轮询仍重新扫描
+            mtime_ns = None
+        return _WatchedDir(mtime_ns, tuple(subdirs), files, pending)
+
+    @staticmethod
+    def _check_pending(directory, state):
+        """
+        检查目录中尚未写入完成的文件
+
+        Returns:
+            list: 大小和修改时间与上次轮询一致、可以处理的文件
+        """
+        ready = []
+        for name, previous in list(state.pending.items()):
+            path = os.path.join(directory, name)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                # 文件已被移走，目录修改时间随之变化，下次轮询重新扫描
+                del state.pending[name]
+                continue
+            current = (stat_result.st_size, stat_result.st_mtime_ns)
+            if stat_result.st_size > 0 and previous == current:
+                del state.pending[name]
+                state.files.add(name)
+                ready.append(path)
+            else:
+                state.pending[name] = current
+        return ready
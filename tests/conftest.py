@@ -0,0 +1,33 @@
+"""
+测试公共设置
+
+把仓库根目录加入导入路径；日志写入临时文件，测试不会修改_internal/log，
+导入utils时自动创建的默认配置文件在测试结束后删除。
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+_CONFIG_PATH = os.path.join(ROOT_DIR, '_internal', 'Config.json')
+_CONFIG_EXISTED = os.path.exists(_CONFIG_PATH)
+
+# pylint: disable=wrong-import-position,protected-access
+import utils
+from log_writer import AsyncLogWriter
+
+_LOG_DIR = tempfile.mkdtemp(prefix="railwayocr-test-log-")
+utils._LOG_WRITER.close()
+utils._LOG_WRITER = AsyncLogWriter(os.path.join(_LOG_DIR, 'log'))
+
+
+def pytest_sessionfinish(session, exitstatus):  # pylint: disable=unused-argument
+    utils.close_log_file()
+    shutil.rmtree(_LOG_DIR, ignore_errors=True)
+    if not _CONFIG_EXISTED and os.path.exists(_CONFIG_PATH):
+        os.remove(_CONFIG_PATH)
@@ -0,0 +1,137 @@
+"""clients.async_engine 异步云端识别引擎及其流水线阶段测试"""
+
+import asyncio
+import json
+import os
+import threading
+
+import httpx
+import pytest
+
+import pipeline as pipeline_module
+from clients import async_engine
+from clients.async_engine import AsyncCloudEngine
+from clients.base_client import (REQUEST_STATUS_ERROR, REQUEST_STATUS_OK, REQUEST_STATUS_THROTTLED,
+                                 BaseClient)
+from pipeline import ClassificationPipeline
+from rate_limiter import TokenBucketRateLimiter
+from recognition_cache import RecognitionCache
+from report_writer import JsonlReportWriter
+
+
+class _FakeCloudClient(BaseClient):
+    """请求体即图像字节，响应正文即识别结果的云端客户端"""
+
+    client_type = 'ali'
+
+    def __init__(self, appcode="code"):
+        self.appcode = appcode
+
+    def recognize(self, image_source, is_url=False):
+        raise AssertionError("异步引擎不应调用同步识别")
+
+    def build_request(self, image_source):
+        return "https://ocr.invalid/recognize", {"Content-Type": "application/octet-stream"}, image_source
+
+    def classify_response(self, status_code, text, headers=None):  # pylint: disable=unused-argument
+        if status_code == 200:
+            return REQUEST_STATUS_OK
+        return REQUEST_STATUS_THROTTLED if status_code == 429 else REQUEST_STATUS_ERROR
+
+    def parse_response(self, response, image_source):  # pylint: disable=unused-argument
+        return response or None
+
+
+class _Server:
+    """MockTransport的请求处理函数，按请求体决定响应"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+
+    async def __call__(self, request):
+        body = request.content.decode()
+        with self._lock:
+            self.requests.append(body)
+        await asyncio.sleep(self.delay)
+        if body.startswith("status:"):
+            return httpx.Response(int(body.split(":")[1]), text="denied")
+        return httpx.Response(200, text=body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    handler = _Server()
+    original = httpx.AsyncClient
+    monkeypatch.setattr(async_engine.httpx, 'AsyncClient',
+                        lambda **kwargs: original(transport=httpx.MockTransport(handler), **kwargs))
+    return handler
+
+
+def _engine(**kwargs):
+    options = {'max_retries': 3, 'backoff_factor': 0.01, 'request_timeout': 5}
+    options.update(kwargs)
+    engine = AsyncCloudEngine(_FakeCloudClient(), **options)
+    engine.start()
+    return engine
+
+
+def test_client_errors_are_not_retried(server):
+    engine = _engine()
+    try:
+        for code in (401, 403, 400):
+            outcome = engine.submit(f"status:{code}".encode()).result(5)
+            assert outcome['status'] == REQUEST_STATUS_ERROR and outcome['attempts'] == 1
+        outcome = engine.submit(b"status:500").result(5)
+        assert outcome['attempts'] == 3
+        outcome = engine.submit(b"status:429").result(5)
+        assert outcome['status'] == REQUEST_STATUS_THROTTLED and outcome['attempts'] == 3
+        assert len(server.requests) == 3 + 3 + 3
+    finally:
+        engine.close()
+
+
+def test_rate_limit_wait_is_reported(server):  # pylint: disable=unused-argument,redefined-outer-name
+    engine = _engine(rate_limiter=TokenBucketRateLimiter(600))
+    try:
+        outcomes = [future.result(5) for future in [engine.submit(f"K{i}".encode()) for i in range(3)]]
+    finally:
+        engine.close()
+    assert [outcome['result'] for outcome in outcomes] == ["K0", "K1", "K2"]
+    assert sorted(outcome['rate_limit_wait'] for outcome in outcomes) == pytest.approx([0.0, 0.1, 0.2], abs=0.05)
+
+
+def test_empty_appcode_fails_before_start():
+    with pytest.raises(RuntimeError):
+        AsyncCloudEngine(_FakeCloudClient(appcode="")).start()
+
+
+def test_async_pipeline_sends_identical_images_once(server, tmp_path, monkeypatch):
+    server.delay = 0.1
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    files = []
+    for i in range(8):
+        path = source_dir / f"{i}.jpg"
+        path.write_text("K1" if i < 6 else f"K{i}", encoding='utf-8')
+        files.append(str(path))
+
+    cache = RecognitionCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(pipeline_module, 'get_recognition_cache', lambda *args, **kwargs: cache)
+    report = JsonlReportWriter(str(tmp_path / "report.jsonl"))
+    pipeline = ClassificationPipeline(
+        _FakeCloudClient(), files, str(tmp_path / "out"), False, report_writer=report,
+        config_overrides={"CLOUD_EXECUTOR": "async", "RECOGNITION_CACHE": True, "RE": r"K\d",
+                          "MAX_REQUESTS_PER_MINUTE": 6000, "REQUEST_INTERVAL": 0})
+    pipeline.run()
+    cache.close()
+
+    assert pipeline.success_count == 8
+    assert sorted(server.requests) == ["K1", "K6", "K7"]
+    assert sorted(os.listdir(tmp_path / "out")) == ["K1", "K6", "K7"]
+    with open(tmp_path / "report.jsonl", encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f]
+    sent = [row for row in rows if not row['cached']]
+    assert len(sent) == 3
+    assert all(row['rate_limit_wait_ms'] is not None for row in sent)
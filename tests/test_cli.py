@@ -0,0 +1,100 @@
+"""railwayocr 命令行与编程接口测试"""
+
+import json
+import os
+
+import pytest
+
+import pipeline
+import utils
+from clients.base_client import BaseClient
+from railwayocr import api, cli
+from railwayocr.api import classify_iter, is_inside
+
+
+class _FakeLocalClient(BaseClient):
+    """图像字节即识别结果的本地客户端"""
+
+    client_type = 'local'
+    replicas = 2
+
+    def recognize(self, image_source, is_url=False):
+        return image_source.decode() or None
+
+
+@pytest.fixture
+def config(monkeypatch):
+    """命令行和流水线读取的配置，不使用任务日志、增量索引和识别缓存"""
+    values = {"RE": ".*", "MODE_INDEX": 0, "RETRY_TIMES": 1, "JOB_JOURNAL": False, "SCAN_INDEX": False,
+              "RECOGNITION_CACHE": False}
+    monkeypatch.setattr(utils, 'load_config', lambda: values)
+    monkeypatch.setattr(pipeline, 'load_config', lambda: values)
+    monkeypatch.setattr(utils, 'LOG_SINK', None)
+    return values
+
+
+def _sources(directory, names):
+    os.makedirs(directory, exist_ok=True)
+    for name, text in names.items():
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+    return str(directory)
+
+
+def _events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_is_inside(tmp_path, monkeypatch):
+    source = str(tmp_path / "src")
+    assert is_inside(source, source)
+    assert is_inside(source, os.path.join(source, "out"))
+    assert not is_inside(source, str(tmp_path / "src2"))
+
+    def different_drives(paths):
+        raise ValueError("Paths don't have the same drive")
+
+    monkeypatch.setattr(api.os.path, 'commonpath', different_drives)
+    assert not is_inside("C:\\photos", "D:\\classified")
+
+
+def test_classify_rejects_dest_inside_source(tmp_path, capsys, config):  # pylint: disable=unused-argument
+    source = _sources(tmp_path / "src", {"a.jpg": "K1"})
+    assert cli.main(["classify", source, os.path.join(source, "out"), "--quiet"]) == cli.EXIT_USAGE
+    assert _events(capsys)[-1]['event'] == 'error'
+
+
+def test_classify_reports_usage_and_engine_errors(tmp_path, capsys, config, monkeypatch):
+    # pylint: disable=unused-argument
+    source = _sources(tmp_path / "src", {"a.jpg": "K1"})
+    dest = str(tmp_path / "out")
+    assert cli.main(["classify", source, dest, "--workers", "0", "--quiet"]) == cli.EXIT_USAGE
+
+    def broken_engine(engine, config):
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(cli, 'create_client', broken_engine)
+    assert cli.main(["classify", source, dest, "--quiet"]) == cli.EXIT_ENGINE
+    assert "model missing" in _events(capsys)[-1]['message']
+
+
+def test_classify_end_to_end(tmp_path, capsys, config, monkeypatch):  # pylint: disable=unused-argument
+    monkeypatch.setattr(cli, 'create_client', lambda engine, config: _FakeLocalClient())
+    source = _sources(tmp_path / "src", {"a.jpg": "K1", "b.jpg": "K2", "c.jpg": ""})
+    dest = str(tmp_path / "out")
+    assert cli.main(["classify", source, dest, "--quiet"]) == cli.EXIT_FAILURES
+    done = _events(capsys)[-1]
+    assert done['event'] == 'done'
+    assert (done['processed'], done['success'], done['failed']) == (3, 2, 1)
+    assert sorted(os.listdir(dest)) == ["K1", "K2", "识别失败"]
+
+
+def test_classify_iter_yields_each_file(tmp_path, config):  # pylint: disable=unused-argument
+    source = _sources(tmp_path / "src", {f"{i}.jpg": f"K{i % 2}" for i in range(6)})
+    paths = [os.path.join(source, name) for name in sorted(os.listdir(source))]
+    records = list(classify_iter(paths, engine=_FakeLocalClient(), max_in_flight=2))
+    assert sorted(record['file_path'] for record in records) == paths
+    assert all(record['success'] and record['target_path'] is None for record in records)
+
+    with pytest.raises(ValueError):
+        list(classify_iter(source, engine=_FakeLocalClient(), dest=os.path.join(source, "out")))
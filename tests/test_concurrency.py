@@ -0,0 +1,73 @@
+"""concurrency AIMD并发控制器测试"""
+
+import pytest
+
+from concurrency import AdaptiveConcurrencyController
+
+
+def _complete(controller, count, latency=1.0, **kwargs):
+    for _ in range(count):
+        controller.acquire()
+        controller.release(latency, **kwargs)
+
+
+def test_limit_increases_after_stable_window():
+    controller = AdaptiveConcurrencyController(2, max_limit=4)
+    _complete(controller, 2)
+    assert controller.limit == 3
+    _complete(controller, 3)
+    assert controller.limit == 4
+    _complete(controller, 8)
+    assert controller.limit == 4
+
+
+def test_latency_growth_blocks_increase():
+    controller = AdaptiveConcurrencyController(2, max_limit=8, latency_tolerance=1.5)
+    _complete(controller, 2, latency=1.0)
+    assert controller.limit == 3
+    _complete(controller, 3, latency=3.0)
+    assert controller.limit == 3
+
+
+def test_throttle_decreases_once_per_latency_period():
+    controller = AdaptiveConcurrencyController(8, max_limit=8)
+    _complete(controller, 1, throttled=True)
+    assert controller.limit == 4
+    # 同一个延迟周期内的后续限流不再回退
+    _complete(controller, 1, timed_out=True)
+    assert controller.limit == 4
+    assert controller.in_flight == 0
+
+
+def test_limit_never_drops_below_minimum():
+    controller = AdaptiveConcurrencyController(2, min_limit=2, max_limit=8)
+    _complete(controller, 1, throttled=True)
+    assert controller.limit == 2
+
+
+def test_rate_limit_caps_effective_concurrency():
+    controller = AdaptiveConcurrencyController(1, max_limit=16, rate_per_minute=60)
+    _complete(controller, 20, latency=1.0)
+    # 每秒1个请求、每个请求耗时1秒时，超过2个并发只会在限速器前排队
+    assert controller.limit == 2
+
+
+def test_try_acquire_and_discard():
+    controller = AdaptiveConcurrencyController(2, max_limit=2)
+    assert controller.try_acquire() and controller.try_acquire()
+    assert not controller.try_acquire()
+    controller.discard()
+    assert controller.in_flight == 1 and controller.limit == 2
+    assert controller.try_acquire()
+    # discard不计入观察窗口
+    controller.discard()
+    controller.discard()
+    assert controller.in_flight == 0 and controller.baseline_latency is None
+
+
+def test_acquire_can_be_cancelled_while_full():
+    controller = AdaptiveConcurrencyController(1, max_limit=1)
+    controller.acquire()
+    with pytest.raises(RuntimeError):
+        controller.acquire(is_cancelled=lambda: True)
+    assert controller.in_flight == 1
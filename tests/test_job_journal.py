@@ -0,0 +1,71 @@
+"""job_journal 任务日志测试"""
+
+import os
+
+from job_journal import STATE_PLACED, STATE_QUEUED, STATE_RECOGNIZED, JobJournal
+
+
+def _journal(tmp_path, move=False):
+    return JobJournal(str(tmp_path / "src"), str(tmp_path / "out"), move, jobs_dir=str(tmp_path / "jobs"))
+
+
+def test_states_are_replayed_after_reopen(tmp_path):
+    journal = _journal(tmp_path)
+    assert not journal.load()
+    journal.open()
+    pending, replay = journal.select(["/src/a.jpg", "/src/b.jpg", "/src/c.jpg"])
+    assert pending == ["/src/a.jpg", "/src/b.jpg", "/src/c.jpg"] and not replay
+    journal.record_recognized("/src/a.jpg", "K1")
+    journal.record_placed("/src/a.jpg", "/out/K1/a.jpg")
+    journal.record_recognized("/src/b.jpg", "K2")
+    journal.close()
+
+    reopened = _journal(tmp_path)
+    assert reopened.load()
+    assert reopened.states["/src/a.jpg"][0] == STATE_PLACED
+    assert reopened.states["/src/b.jpg"] == (STATE_RECOGNIZED, "K2")
+    assert reopened.states["/src/c.jpg"][0] == STATE_QUEUED
+    assert reopened.summary() == (3, 1)
+    reopened.open()
+    pending, replay = reopened.select(["/src/a.jpg", "/src/b.jpg", "/src/c.jpg", "/src/d.jpg"])
+    assert pending == ["/src/c.jpg", "/src/d.jpg"]
+    assert replay == [("/src/b.jpg", "K2")]
+    reopened.complete()
+    assert not os.path.exists(reopened.path)
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal = _journal(tmp_path)
+    journal.open()
+    journal.select(["/src/a.jpg"])
+    journal.record_placed("/src/a.jpg", "/out/K1/a.jpg")
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"f": "/src/b.jpg", "s": "plac')
+
+    reopened = _journal(tmp_path)
+    assert reopened.load()
+    assert set(reopened.states) == {"/src/a.jpg"}
+
+
+def test_move_mode_skips_sources_that_are_gone(tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    kept = source / "kept.jpg"
+    kept.write_bytes(b"x")
+    journal = _journal(tmp_path, move=True)
+    journal.open()
+    journal.select([str(kept), str(source / "moved.jpg")])
+    journal.close()
+
+    reopened = _journal(tmp_path, move=True)
+    reopened.load()
+    reopened.open()
+    pending, _ = reopened.select([str(kept), str(source / "moved.jpg")])
+    assert pending == [str(kept)]
+    reopened.discard()
+
+
+def test_jobs_are_keyed_by_folders_and_mode(tmp_path):
+    assert _journal(tmp_path).job_id == _journal(tmp_path).job_id
+    assert _journal(tmp_path).job_id != _journal(tmp_path, move=True).job_id
@@ -0,0 +1,56 @@
+"""log_bus 界面日志总线测试"""
+
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+# pylint: disable=wrong-import-position
+import utils
+from log_bus import LogBus
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def text_edit(app):  # pylint: disable=unused-argument,redefined-outer-name
+    widget = QtWidgets.QTextEdit()
+    yield widget
+    widget.deleteLater()
+
+
+def test_rate_limited_lines_are_suppressed_and_summarized(text_edit):  # pylint: disable=redefined-outer-name
+    bus = LogBus(text_edit, max_lines=100, rate_limits={"debug": 2}, interval_ms=60000)
+    assert [bus.post("DEBUG", f"d{i}") for i in range(4)] == [True, True, False, False]
+    assert bus.post("INFO", "info")
+    bus.stop()
+    text = text_edit.toPlainText()
+    assert "d0" in text and "d1" in text and "d2" not in text
+    assert "已省略2条DEBUG日志" in text
+
+
+def test_max_lines_keeps_latest(text_edit):  # pylint: disable=redefined-outer-name
+    bus = LogBus(text_edit, max_lines=5, interval_ms=60000)
+    for i in range(20):
+        bus.post("INFO", f"line{i}")
+    bus.stop()
+    assert text_edit.toPlainText().split("\n") == [f"line{i}" for i in range(15, 20)]
+
+
+def test_suppressed_lines_are_written_to_log_file(monkeypatch):
+    class _FullBus:
+        def post(self, level, html):  # pylint: disable=unused-argument
+            return level != "DEBUG"
+
+    written = []
+    monkeypatch.setattr(utils, 'MAIN_WINDOW', object())
+    monkeypatch.setattr(utils, 'LOG_BUS', _FullBus())
+    monkeypatch.setattr(utils, 'log_print', lambda message, level='INFO': written.append((level, message)))
+    utils.log("INFO", "shown")
+    utils.log("DEBUG", "hidden")
+    assert written == [("DEBUG", "hidden")]
@@ -0,0 +1,56 @@
+"""log_writer 异步日志文件写入测试"""
+
+import os
+import threading
+
+from log_writer import AsyncLogWriter
+
+
+def _lines(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_lines_from_many_threads_are_written(tmp_path):
+    path = str(tmp_path / "logs" / "log")
+    writer = AsyncLogWriter(path, flush_interval=0.05)
+
+    def worker(thread_id):
+        for i in range(200):
+            writer.write(f"{thread_id}-{i}")
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+    lines = _lines(path)
+    assert len(lines) == 800
+    assert [line for line in lines if line.startswith("2-")] == [f"2-{i}" for i in range(200)]
+    writer.close()
+
+
+def test_rotation_keeps_backup_count(tmp_path):
+    path = str(tmp_path / "log")
+    writer = AsyncLogWriter(path, rotation_size=1000, backup_count=2, flush_bytes=1)
+    for i in range(100):
+        writer.write(f"line {i:03d} " + "x" * 90)
+    writer.close()
+    assert sorted(os.listdir(tmp_path)) == ["log", "log.1", "log.2"]
+    # 更早的文件被删除，保留的文件按时间顺序连续，以最后一行结束
+    kept = [line[:8] for name in ("log.2", "log.1", "log") for line in _lines(os.path.join(tmp_path, name))
+            if line.startswith("line")]
+    first = int(kept[0][5:])
+    assert first > 0 and kept == [f"line {i:03d}" for i in range(first, 100)]
+
+
+def test_close_writes_pending_lines(tmp_path):
+    path = str(tmp_path / "log")
+    writer = AsyncLogWriter(path, flush_interval=60)
+    writer.write("last words")
+    writer.close()
+    assert _lines(path) == ["last words"]
+    # 未写入过日志的写入器关闭时不创建文件
+    AsyncLogWriter(str(tmp_path / "unused")).close()
+    assert not os.path.exists(tmp_path / "unused")
@@ -0,0 +1,195 @@
+"""pipeline 分类处理流水线测试"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import pipeline as pipeline_module
+from clients.base_client import REQUEST_STATUS_OK, REQUEST_STATUS_UNREADABLE, BaseClient
+from job_journal import JobJournal
+from pipeline import ClassificationPipeline
+from recognition_cache import RecognitionCache
+
+
+class _FakeLocalClient(BaseClient):
+    """按图像字节返回识别结果的本地客户端，每张图像耗时delay秒"""
+
+    client_type = 'local'
+
+    def __init__(self, replicas=1, delay=0.0):
+        self.replicas = replicas
+        self.delay = delay
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+
+    def recognize(self, image_source, is_url=False):
+        with self._calls_lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return image_source.decode() or None
+
+
+def _make_sources(directory, count, prefix="K"):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(str(directory), f"{i:03d}.jpg")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"{prefix}{i % 3}")
+        paths.append(path)
+    return paths
+
+
+def _run(client, files, dest_dir, **kwargs):
+    overrides = {"RECOGNITION_CACHE": False, "LOCAL_BATCH_SIZE": 1}
+    overrides.update(kwargs.pop('config_overrides', {}))
+    events = {}
+
+    def listener(name, *args):
+        events.setdefault(name, []).append(args)
+
+    pipeline = ClassificationPipeline(client, files, dest_dir, False, listener=listener,
+                                      config_overrides=overrides, per_file_events=False, **kwargs)
+    pipeline.run()
+    return pipeline, events
+
+
+def test_local_engine_is_not_rate_limited(tmp_path):
+    files = _make_sources(tmp_path / "src", 12)
+    client = _FakeLocalClient(replicas=8, delay=0.05)
+    started = time.monotonic()
+    pipeline, events = _run(client, files, str(tmp_path / "out"),
+                            config_overrides={"MAX_REQUESTS_PER_MINUTE": 60, "REQUEST_INTERVAL": 0.5})
+    elapsed = time.monotonic() - started
+    assert pipeline.rate_limiter is None and pipeline.concurrency_controller is None
+    assert events['processing_finished'][0][0]['success'] == 12
+    # 8个副本并行识别，12张图像约需两轮推理，不受每分钟请求数限制
+    assert elapsed < 3.0
+    assert sorted(os.listdir(tmp_path / "out")) == ["K0", "K1", "K2"]
+
+
+class _FakeBatchClient(_FakeLocalClient):
+    """提供recognize_batch的本地客户端，以"bad"开头的图像视为无法解码"""
+
+    def recognize_batch(self, image_sources):
+        outcomes = []
+        for image_source in image_sources:
+            if image_source.startswith(b"bad"):
+                outcomes.append((None, REQUEST_STATUS_UNREADABLE))
+            else:
+                outcomes.append((self.recognize(image_source), REQUEST_STATUS_OK))
+        return outcomes
+
+
+def _batch_pipeline(tmp_path, monkeypatch, client):
+    cache = RecognitionCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(pipeline_module, 'get_recognition_cache', lambda *args, **kwargs: cache)
+    pipeline = ClassificationPipeline(client, [], None, False,
+                                      config_overrides={"RECOGNITION_CACHE": True, "LOCAL_BATCH_SIZE": 4})
+    return pipeline, cache
+
+
+def test_batch_statuses_are_per_image(tmp_path, monkeypatch):
+    pipeline, cache = _batch_pipeline(tmp_path, monkeypatch, _FakeBatchClient())
+    batch = [("/src/a.jpg", b"K1", None), ("/src/b.jpg", b"bad", None), ("/src/c.jpg", b"K2", None)]
+    outputs = dict(pipeline._process_batch(batch, pipeline.shared_client))
+    assert outputs["/src/a.jpg"]['recognition'] == "K1" and outputs["/src/c.jpg"]['recognition'] == "K2"
+    assert not outputs["/src/b.jpg"]['success']
+    fingerprint = pipeline.cache_fingerprint
+    assert cache.get(cache.make_key(b"K1", fingerprint))['status'] == REQUEST_STATUS_OK
+    assert cache.get(cache.make_key(b"bad", fingerprint))['status'] == REQUEST_STATUS_UNREADABLE
+    cache.close()
+
+
+def test_cancel_during_batch_abandons_every_pending_key(tmp_path, monkeypatch):
+    pipeline, cache = _batch_pipeline(tmp_path, monkeypatch, _FakeBatchClient())
+    permits = iter([0.0, 0.0])
+
+    def check_rate_limit():
+        try:
+            return next(permits)
+        except StopIteration:
+            raise RuntimeError("等待速率限制许可时已取消") from None
+
+    monkeypatch.setattr(pipeline, '_check_rate_limit', check_rate_limit)
+    batch = [(f"/src/{i}.jpg", f"K{i}".encode(), None) for i in range(4)]
+    with pytest.raises(RuntimeError):
+        pipeline._process_batch(batch, pipeline.shared_client)
+    # 缓存是进程共享的，已登记的识别全部放弃后，之后的任务不会等待它们
+    assert not cache._inflight
+    assert cache.begin(cache.make_key(b"K0", pipeline.cache_fingerprint))[0] == "owner"
+    cache.close()
+
+
+def test_stop_during_batch_run_leaves_no_inflight_entries(tmp_path, monkeypatch):
+    gate = threading.Event()
+
+    class _SlowBatchClient(_FakeBatchClient):
+        def recognize_batch(self, image_sources):
+            gate.wait(5)
+            return super().recognize_batch(image_sources)
+
+    files = _make_sources(tmp_path / "src", 16)
+    cache = RecognitionCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(pipeline_module, 'get_recognition_cache', lambda *args, **kwargs: cache)
+    pipeline = ClassificationPipeline(_SlowBatchClient(replicas=2), files, str(tmp_path / "out"), False,
+                                      config_overrides={"RECOGNITION_CACHE": True, "LOCAL_BATCH_SIZE": 4})
+    runner = threading.Thread(target=pipeline.run)
+    runner.start()
+    deadline = time.monotonic() + 5
+    while not cache._inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+    gate.set()
+    runner.join(10)
+    assert not runner.is_alive()
+    assert not cache._inflight
+    assert pipeline.processed_count < 16
+    cache.close()
+
+
+def test_interrupted_run_resumes_from_journal(tmp_path):
+    class _RecordingClient(_FakeLocalClient):
+        def __init__(self, stop_after=None):
+            super().__init__(delay=0.01)
+            self.seen = []
+            self.stop_after = stop_after
+            self.pipeline = None
+
+        def recognize(self, image_source, is_url=False):
+            self.seen.append(image_source.decode())
+            if self.stop_after is not None and len(self.seen) == self.stop_after:
+                self.pipeline.stop()
+            return super().recognize(image_source, is_url)
+
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    for i in range(20):
+        (source_dir / f"{i:02d}.jpg").write_text(f"K{i:02d}", encoding='utf-8')
+    dest_dir = str(tmp_path / "out")
+    jobs_dir = str(tmp_path / "jobs")
+
+    def run(client):
+        journal = JobJournal(str(source_dir), dest_dir, False, jobs_dir=jobs_dir)
+        journal.load()
+        pipeline = ClassificationPipeline(client, None, dest_dir, False, journal=journal,
+                                          source_dir=str(source_dir), per_file_events=False,
+                                          config_overrides={"RECOGNITION_CACHE": False, "LOCAL_BATCH_SIZE": 1})
+        client.pipeline = pipeline
+        pipeline.run()
+        return journal
+
+    first = _RecordingClient(stop_after=5)
+    journal = run(first)
+    assert os.path.exists(journal.path)
+    placed_first = set(os.listdir(dest_dir))
+    assert placed_first and len(placed_first) < 20
+
+    second = _RecordingClient()
+    journal = run(second)
+    # 上次已放置的文件不再识别，任务完成后日志被删除
+    assert not placed_first & set(second.seen)
+    assert sorted(os.listdir(dest_dir)) == [f"K{i:02d}" for i in range(20)]
+    assert not os.path.exists(journal.path)
@@ -0,0 +1,147 @@
+"""placement 文件放置、文件名索引和分类文件夹缓存测试"""
+
+import errno
+import os
+import threading
+
+import pytest
+
+import placement
+from placement import (METHOD_HARDLINK, METHOD_RENAME, STRATEGY_HARDLINK, DirectoryNameIndex, PlacementEngine,
+                       TargetDirectoryCache)
+
+
+def _write(path, data=b"image"):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_move_on_same_device_renames(tmp_path):
+    source = _write(tmp_path / "a.jpg")
+    target = str(tmp_path / "out.jpg")
+    assert PlacementEngine().place(source, target, is_move=True) == METHOD_RENAME
+    assert not os.path.exists(source)
+    assert _read(target) == b"image"
+
+
+def test_copy_keeps_source_and_leaves_no_temp_file(tmp_path):
+    source = _write(tmp_path / "a.jpg", b"x" * 10000)
+    os.utime(source, (1000000000, 1000000000))
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    target = str(out_dir / "a.jpg")
+    engine = PlacementEngine()
+    engine.place(source, target)
+    assert _read(target) == _read(source)
+    assert os.stat(target).st_mtime == 1000000000
+    assert os.listdir(out_dir) == ["a.jpg"]
+    assert sum(engine.get_stats().values()) == 1
+
+
+def test_auto_strategy_does_not_hardlink(tmp_path):
+    source = _write(tmp_path / "a.jpg")
+    target = str(tmp_path / "b.jpg")
+    assert PlacementEngine().place(source, target) != METHOD_HARDLINK
+    assert not os.path.samefile(source, target)
+
+
+def test_hardlink_strategy_links_copies(tmp_path):
+    source = _write(tmp_path / "a.jpg")
+    target = str(tmp_path / "b.jpg")
+    assert PlacementEngine(STRATEGY_HARDLINK).place(source, target) == METHOD_HARDLINK
+    assert os.path.samefile(source, target)
+
+
+@pytest.mark.parametrize("is_move", [True, False])
+def test_existing_target_is_never_overwritten(tmp_path, is_move):
+    source = _write(tmp_path / "a.jpg", b"new")
+    target = _write(tmp_path / "taken.jpg", b"existing")
+    with pytest.raises(FileExistsError):
+        PlacementEngine().place(source, target, is_move=is_move)
+    assert _read(target) == b"existing"
+    assert _read(source) == b"new"
+    assert sorted(os.listdir(tmp_path)) == ["a.jpg", "taken.jpg"]
+
+
+def test_rename_without_hardlink_support_still_refuses_to_overwrite(tmp_path, monkeypatch):
+    def no_link(src, dst):
+        raise OSError(errno.EPERM, "hard links not supported")
+
+    monkeypatch.setattr(placement.os, 'link', no_link)
+    engine = PlacementEngine()
+    source = _write(tmp_path / "a.jpg", b"new")
+    target = _write(tmp_path / "taken.jpg", b"existing")
+    with pytest.raises(FileExistsError):
+        engine.place(source, target, is_move=True)
+    assert _read(target) == b"existing"
+
+    free_target = str(tmp_path / "free.jpg")
+    engine.place(source, free_target, is_move=True)
+    assert _read(free_target) == b"new" and not os.path.exists(source)
+
+
+def test_name_index_numbers_duplicates(tmp_path):
+    _write(tmp_path / "a.jpg")
+    _write(tmp_path / "a_1.jpg")
+    index = DirectoryNameIndex()
+    directory = str(tmp_path)
+    assert index.reserve(directory, "b.jpg") == os.path.join(directory, "b.jpg")
+    assert index.reserve(directory, "a.jpg") == os.path.join(directory, "a_2.jpg")
+    assert index.reserve(directory, "a.jpg") == os.path.join(directory, "a_3.jpg")
+
+    # 列出目录之后其他程序放入的同名文件不会被选中
+    _write(tmp_path / "c.jpg")
+    assert index.reserve(directory, "c.jpg") == os.path.join(directory, "c_1.jpg")
+
+    released = index.reserve(directory, "d.jpg")
+    index.release(released)
+    assert index.reserve(directory, "d.jpg") == released
+
+
+def test_name_index_is_unique_across_threads(tmp_path):
+    index = DirectoryNameIndex()
+    reserved = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            path = index.reserve(str(tmp_path), "same.jpg")
+            with lock:
+                reserved.append(path)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(reserved)) == 200
+
+
+def test_target_directory_cache_creates_each_class_once(tmp_path, monkeypatch):
+    (tmp_path / "EXISTING").mkdir()
+    cache = TargetDirectoryCache(lambda name: name.strip())
+    assert cache.warm(str(tmp_path)) == 1
+
+    created = []
+    original_makedirs = os.makedirs
+
+    def counting_makedirs(path, exist_ok=False):
+        created.append(path)
+        original_makedirs(path, exist_ok=exist_ok)
+
+    monkeypatch.setattr(placement.os, 'makedirs', counting_makedirs)
+    assert cache.resolve(str(tmp_path), "EXISTING") == os.path.join(str(tmp_path), "EXISTING")
+    for _ in range(3):
+        path = cache.resolve(str(tmp_path), " NEW ")
+    assert created == [path] and os.path.isdir(path)
+
+    os.rmdir(path)
+    cache.invalidate(path)
+    cache.resolve(str(tmp_path), " NEW ")
+    assert os.path.isdir(path)
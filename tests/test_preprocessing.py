@@ -0,0 +1,90 @@
+"""clients.preprocessing 查找表预处理测试"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageEnhance, ImageFilter
+
+from clients.preprocessing import contrast_lut, normalize_lut, otsu_threshold, preprocess_image
+
+
+def _random_gray_images(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        shape = (int(rng.integers(4, 64)), int(rng.integers(4, 64)))
+        pixels = rng.integers(0, 256, shape, dtype=np.uint8)
+        if i % 2:
+            # 一半图像压缩到较窄的灰度范围，覆盖拉伸和截断的边界
+            pixels = (pixels // 3 + rng.integers(0, 170)).astype(np.uint8)
+        yield Image.fromarray(pixels)
+
+
+def _histogram(image):
+    return np.asarray(image.histogram(), dtype=np.float64)
+
+
+def _reference_preprocess(image, enhance_attempt):
+    """原先按PIL逐步处理的实现，前两次尝试的输出应与查找表实现逐像素一致"""
+    gray = image.convert('L')
+    if enhance_attempt == 0:
+        gray = ImageEnhance.Contrast(gray).enhance(1.2)
+    else:
+        gray = ImageEnhance.Contrast(gray).enhance(1.8).filter(ImageFilter.SHARPEN)
+    pixels = np.array(gray)
+    low, high = pixels.min(), pixels.max()
+    if high > low:
+        pixels = ((pixels - low) / (high - low) * 255).astype(np.uint8)
+    return pixels
+
+
+@pytest.mark.parametrize("factor", [0.5, 1.0, 1.2, 1.8, 2.7])
+def test_contrast_lut_matches_image_enhance(factor):
+    for image in _random_gray_images(200, seed=int(factor * 10)):
+        expected = np.array(ImageEnhance.Contrast(image).enhance(factor))
+        actual = contrast_lut(_histogram(image), factor)[np.array(image)]
+        np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("enhance_attempt", [0, 1])
+def test_preprocess_matches_reference(enhance_attempt):
+    for image in _random_gray_images(200, seed=enhance_attempt):
+        expected = _reference_preprocess(image, enhance_attempt)
+        np.testing.assert_array_equal(preprocess_image(image, "test.jpg", enhance_attempt=enhance_attempt),
+                                      expected)
+
+
+def test_preprocess_three_channels_and_input_untouched():
+    image = next(_random_gray_images(1, seed=7)).convert('RGB')
+    before = np.array(image)
+    gray = preprocess_image(image, "test.jpg")
+    rgb = preprocess_image(image, "test.jpg", channels=3)
+    assert rgb.shape == gray.shape + (3,)
+    for channel in range(3):
+        np.testing.assert_array_equal(rgb[..., channel], gray)
+    np.testing.assert_array_equal(np.array(image), before)
+
+
+def test_preprocess_resizes_to_max_size():
+    image = Image.new('L', (1000, 500), 128)
+    assert preprocess_image(image, "test.jpg", max_size=200).shape == (100, 200)
+    assert preprocess_image(image, "test.jpg", max_size=200, resize=False).shape == (500, 1000)
+
+
+def test_normalize_lut_stretches_to_full_range():
+    histogram = np.zeros(256)
+    histogram[[40, 90, 200]] = 1
+    lut = normalize_lut(histogram)
+    assert lut[40] == 0 and lut[200] == 255
+    # 只有一种灰度时保持不变
+    single = np.zeros(256)
+    single[77] = 5
+    np.testing.assert_array_equal(normalize_lut(single), np.arange(256, dtype=np.uint8))
+
+
+def test_otsu_threshold_separates_bimodal_histogram():
+    histogram = np.zeros(256)
+    histogram[30:50] = 100
+    histogram[180:210] = 80
+    threshold = otsu_threshold(histogram)
+    assert 49 <= threshold < 180
+    binary = preprocess_image(Image.fromarray(np.array([[35, 200]], dtype=np.uint8)), "test.jpg", enhance_attempt=2)
+    np.testing.assert_array_equal(binary, [[0, 255]])
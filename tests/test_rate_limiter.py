@@ -0,0 +1,79 @@
+"""rate_limiter GCRA限速器测试"""
+
+import pytest
+
+import rate_limiter
+from rate_limiter import TokenBucketRateLimiter, get_rate_limiter
+
+
+class _Clock:
+    """手动推进的单调时钟，sleep直接推进时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', fake.sleep)
+    return fake
+
+
+def test_permits_are_evenly_spaced(clock):
+    limiter = TokenBucketRateLimiter(600)
+    assert [limiter.reserve() for _ in range(3)] == pytest.approx([0.0, 0.1, 0.2])
+    clock.now += 1.0
+    assert limiter.reserve() == 0.0
+    assert limiter.get_stats()['acquired'] == 4
+
+
+def test_burst_allows_immediate_requests(clock):  # pylint: disable=unused-argument
+    limiter = TokenBucketRateLimiter(60, burst=3)
+    assert [limiter.reserve() for _ in range(4)] == pytest.approx([0.0, 0.0, 0.0, 1.0])
+
+
+def test_min_interval_overrides_rate(clock):  # pylint: disable=unused-argument
+    limiter = TokenBucketRateLimiter(600, min_interval=0.5)
+    assert limiter.emission_interval == 0.5
+    limiter.reserve()
+    assert limiter.reserve() == pytest.approx(0.5)
+
+
+def test_refund_returns_unused_permit(clock):  # pylint: disable=unused-argument
+    limiter = TokenBucketRateLimiter(60)
+    limiter.reserve()
+    assert limiter.reserve() == pytest.approx(1.0)
+    limiter.refund()
+    assert limiter.reserve() == pytest.approx(1.0)
+    assert limiter.get_stats()['acquired'] == 2
+
+
+def test_acquire_waits_and_cancel_refunds(clock):
+    limiter = TokenBucketRateLimiter(60)
+    assert limiter.acquire() == 0.0
+    start = clock.now
+    waits = []
+    assert limiter.acquire(on_wait=waits.append) == pytest.approx(1.0)
+    assert clock.now - start == pytest.approx(1.0) and waits == [pytest.approx(1.0)]
+
+    with pytest.raises(RuntimeError):
+        limiter.acquire(is_cancelled=lambda: True)
+    assert limiter.get_stats()['acquired'] == 2
+    # 取消的许可已归还，下一次请求的等待时间不会被拉长
+    assert limiter.reserve() == pytest.approx(1.0)
+
+
+def test_get_rate_limiter_shares_instance_per_provider():
+    first = get_rate_limiter("test-provider", 60)
+    second = get_rate_limiter("test-provider", 120, burst=2)
+    assert first is second
+    assert first.emission_interval == pytest.approx(0.5) and first.burst == 2
+    assert get_rate_limiter("other-test-provider", 60) is not first
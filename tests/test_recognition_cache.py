@@ -0,0 +1,126 @@
+"""recognition_cache 识别结果缓存测试"""
+
+import threading
+import time
+
+import pytest
+
+from clients.base_client import REQUEST_STATUS_OK, REQUEST_STATUS_TIMEOUT
+from recognition_cache import RecognitionCache, make_fingerprint, recognition_fingerprint
+
+
+@pytest.fixture
+def cache(tmp_path):
+    instance = RecognitionCache(str(tmp_path / "cache.db"))
+    yield instance
+    instance.close()
+
+
+def _outcome(result, status=REQUEST_STATUS_OK, error=None):
+    return {'result': result, 'status': status, 'attempts': 1, 'error': error}
+
+
+def test_put_get_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = RecognitionCache(path)
+    key = RecognitionCache.make_key(b"image", make_fingerprint("local"))
+    assert cache.get(key) is None
+    cache.put(key, _outcome("K1234"))
+    cached = cache.get(key)
+    assert cached['result'] == "K1234" and cached['cached']
+    cache.close()
+
+    reopened = RecognitionCache(path)
+    assert reopened.get(key)['result'] == "K1234"
+    assert reopened.get_stats()['bytes'] > 0
+    reopened.close()
+
+
+def test_negative_results_are_cached(cache):
+    key = RecognitionCache.make_key(b"bad", "fp")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return _outcome(None, error="未识别到有效结果")
+
+    for _ in range(2):
+        outcome = cache.get_or_compute(key, compute, lambda outcome: True)
+        assert outcome['result'] is None and outcome['error'] == "未识别到有效结果"
+    assert len(calls) == 1
+
+
+def test_transient_failures_are_not_stored(cache):
+    key = RecognitionCache.make_key(b"slow", "fp")
+    outcome = _outcome(None, status=REQUEST_STATUS_TIMEOUT)
+    cache.get_or_compute(key, lambda: outcome, lambda result: result['status'] == REQUEST_STATUS_OK)
+    assert cache.get(key) is None
+
+
+def test_concurrent_identical_images_compute_once(cache):
+    key = RecognitionCache.make_key(b"same", "fp")
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return _outcome("K1")
+
+    def worker():
+        results.append(cache.get_or_compute(key, compute, lambda outcome: True))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert [result['result'] for result in results] == ["K1"] * 5
+    assert cache.get_stats()['shared'] + cache.get_stats()['hits'] == 4
+
+
+def test_failed_compute_lets_waiters_retry(cache):
+    key = RecognitionCache.make_key(b"boom", "fp")
+    with pytest.raises(ValueError):
+        cache.get_or_compute(key, lambda: (_ for _ in ()).throw(ValueError("boom")), lambda outcome: True)
+    assert cache.get_or_compute(key, lambda: _outcome("K2"), lambda outcome: True)['result'] == "K2"
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = RecognitionCache(str(tmp_path / "cache.db"), max_bytes=1024 * 1024)
+    keys = [RecognitionCache.make_key(str(i).encode(), "fp") for i in range(40)]
+    text = "A" * 10000
+    for i, key in enumerate(keys):
+        cache.put(key, _outcome(text))
+        if i >= 1:
+            # 持续访问第一条记录，淘汰时应保留
+            cache.get(keys[0])
+        time.sleep(0.001)
+    assert cache.get_stats()['bytes'] <= cache.max_bytes
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[-1]) is not None
+    cache.close()
+
+
+def test_fingerprint_tracks_recognition_settings():
+    class _Client:
+        client_type = 'local'
+        preprocess_version = 3
+        decode_size = 400
+
+    client = _Client()
+    config = {"RE": r"[A-Z]\d+", "RECOGNITION_ATTEMPTS": 2}
+    base = recognition_fingerprint(client, config)
+    assert recognition_fingerprint(client, dict(config)) == base
+    assert recognition_fingerprint(client, dict(config, RE=r".*")) != base
+    assert recognition_fingerprint(client, dict(config, RECOGNITION_ATTEMPTS=3)) != base
+    client.decode_size = None
+    assert recognition_fingerprint(client, config) != base
+    client.decode_size = 400
+    client.preprocess_version = 4
+    assert recognition_fingerprint(client, config) != base
+    client.client_type = 'paddle'
+    client.preprocess_version = 3
+    assert recognition_fingerprint(client, config) != base
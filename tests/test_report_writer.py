@@ -0,0 +1,77 @@
+"""report_writer 运行报告测试"""
+
+import csv
+import json
+import os
+
+import pytest
+
+import report_writer
+from report_writer import (REPORT_FIELDS, CsvReportWriter, JsonlReportWriter, ReportWriter,
+                           create_report_writer)
+
+
+def _record(index, **extra):
+    record = {'source_path': f"/src/{index}.jpg", 'recognition': f"A{index}", 'success': True,
+              'engine': 'local', 'attempts': 1, 'cached': False, 'read_ms': 1.5}
+    record.update(extra)
+    return record
+
+
+def test_report_writer_is_abstract():
+    with pytest.raises(TypeError):
+        ReportWriter("report.csv")  # pylint: disable=abstract-class-instantiated
+
+
+def test_csv_report_has_header_and_all_rows(tmp_path):
+    path = tmp_path / "report.csv"
+    writer = CsvReportWriter(str(path), batch_size=2)
+    for i in range(5):
+        writer.write(_record(i, unknown_field="ignored"))
+    writer.close()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert tuple(rows[0].keys()) == REPORT_FIELDS
+    assert [row['recognition'] for row in rows] == [f"A{i}" for i in range(5)]
+    assert rows[0]['error'] == ''
+    assert writer.count == 5
+
+
+def test_jsonl_report_batches_until_flush(tmp_path):
+    path = tmp_path / "report.jsonl"
+    writer = JsonlReportWriter(str(path), batch_size=10)
+    writer.write(_record(1, success=False, error="未识别到有效结果"))
+    assert path.read_text(encoding='utf-8') == ""
+    writer.flush()
+    record = json.loads(path.read_text(encoding='utf-8'))
+    assert set(record) == set(REPORT_FIELDS)
+    assert record['error'] == "未识别到有效结果" and record['target_path'] is None
+    writer.close()
+    # 关闭后写入的记录被忽略
+    writer.write(_record(2))
+    assert writer.count == 1
+
+
+def test_create_report_writer_format_and_default_directory(tmp_path, monkeypatch):
+    writer = create_report_writer(str(tmp_path / "run.jsonl"))
+    assert isinstance(writer, JsonlReportWriter)
+    writer.close()
+
+    monkeypatch.setattr(report_writer, 'REPORTS_DIR', str(tmp_path / "reports"))
+    writer = create_report_writer(fmt='csv')
+    assert os.path.dirname(writer.path) == str(tmp_path / "reports")
+    writer.close()
+
+    with pytest.raises(ValueError):
+        create_report_writer(str(tmp_path / "run.xlsx"))
+
+
+def test_parquet_falls_back_to_csv_without_pyarrow(tmp_path, monkeypatch):
+    def _missing_pyarrow(path):
+        raise ImportError("No module named 'pyarrow'")
+
+    monkeypatch.setattr(report_writer, 'ParquetReportWriter', _missing_pyarrow)
+    writer = create_report_writer(str(tmp_path / "run.parquet"))
+    assert isinstance(writer, CsvReportWriter)
+    assert writer.path == str(tmp_path / "run.csv")
+    writer.close()
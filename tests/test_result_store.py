@@ -0,0 +1,65 @@
+"""result_store 处理结果存储测试"""
+
+import os
+import threading
+
+from result_store import ResultStore
+
+
+def _result(index, success=True, **extra):
+    result = {'file_path': f"/src/{index}.jpg", 'target_path': f"/out/{index}.jpg" if success else None,
+              'success': success, 'attempts': 1}
+    if success:
+        result['recognition'] = f"K{index % 3}"
+    else:
+        result['error'] = "未识别到有效结果"
+    result.update(extra)
+    return result
+
+
+def test_records_round_trip_in_memory():
+    store = ResultStore()
+    store.append(_result(0, cached=True))
+    store.append(_result(1, success=False, attempts=2))
+    records = list(store)
+    assert [record.to_dict() for record in records] == [
+        {'filename': "0.jpg", 'success': True, 'attempts': 1, 'cached': True, 'file_path': "/src/0.jpg",
+         'target_path': "/out/0.jpg", 'result': "K0", 'recognition': "K0"},
+        {'filename': "1.jpg", 'success': False, 'attempts': 2, 'cached': False, 'file_path': "/src/1.jpg",
+         'target_path': None, 'error': "未识别到有效结果"},
+    ]
+    assert len(store) == 2
+
+
+def test_spill_keeps_order_and_removes_temp_file(tmp_path):
+    store = ResultStore(spill_threshold=4, spill_dir=str(tmp_path))
+    for i in range(10):
+        store.append(_result(i, success=i % 5 != 4, resumed=i == 2))
+    assert store.spilled == 8
+    assert len(os.listdir(tmp_path)) == 1
+    records = list(store)
+    assert [record.file_path for record in records] == [f"/src/{i}.jpg" for i in range(10)]
+    assert records[2].resumed and not records[3].resumed
+    assert records[4].error == "未识别到有效结果" and records[4].recognition is None
+    store.close()
+    assert not os.listdir(tmp_path)
+
+
+def test_label_counts_and_summary_across_threads(tmp_path):
+    store = ResultStore(spill_threshold=50, spill_dir=str(tmp_path))
+
+    def worker(offset):
+        for i in range(offset, offset + 300):
+            store.append(_result(i, success=i % 10 != 0))
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in (0, 300, 600)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    summary = store.summary()
+    assert summary['total'] == 900 and summary['failed'] == 90 and summary['success'] == 810
+    assert summary['classes'] == 3 and summary['spilled'] == 900
+    assert sum(store.label_counts().values()) == 810
+    assert len({record.file_path for record in store}) == 900
+    store.close()
@@ -0,0 +1,51 @@
+"""scan_index 源文件夹增量索引测试"""
+
+import os
+
+from scan_index import ScanIndex
+
+
+def _write(path, data=b"image"):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def _index(tmp_path, fingerprint="fp"):
+    return ScanIndex(str(tmp_path / "src"), str(tmp_path / "out"), fingerprint, index_dir=str(tmp_path / "index"))
+
+
+def test_unchanged_files_are_skipped(tmp_path):
+    (tmp_path / "src").mkdir()
+    files = [_write(tmp_path / "src" / f"{i}.jpg") for i in range(4)]
+    index = _index(tmp_path)
+    assert index.load() == 0
+    assert index.filter_changed(files) == (files, 0)
+    for path in files[:3]:
+        index.record(path, "K1")
+    index.close()
+
+    index = _index(tmp_path)
+    assert index.load() == 3
+    os.utime(files[1], ns=(0, os.stat(files[1]).st_mtime_ns + 10 ** 9))
+    _write(files[2], b"changed content")
+    new_file = _write(tmp_path / "src" / "new.jpg")
+    changed, skipped = index.filter_changed(files + [new_file, str(tmp_path / "src" / "missing.jpg")])
+    assert skipped == 1
+    assert changed == files[1:] + [new_file, str(tmp_path / "src" / "missing.jpg")]
+    index.close()
+
+
+def test_fingerprint_selects_a_separate_index(tmp_path):
+    (tmp_path / "src").mkdir()
+    path = _write(tmp_path / "src" / "a.jpg")
+    index = _index(tmp_path, "engine-a")
+    index.load()
+    index.record(path, "K1")
+    index.close()
+
+    other = _index(tmp_path, "engine-b")
+    assert other.path != index.path
+    assert other.load() == 0
+    assert other.filter_changed([path]) == ([path], 0)
+    other.close()
@@ -0,0 +1,94 @@
+"""scanner 目录扫描与文件夹监视测试"""
+
+import os
+import time
+
+import scanner
+from scanner import DirectoryScanner, FolderWatcher
+
+
+def _write(path, data=b"data"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def _age_tree(root, seconds=60):
+    """把目录和文件的修改时间调早，模拟已经稳定的目录树"""
+    past = time.time() - seconds
+    for directory, _, files in os.walk(root):
+        for name in files:
+            os.utime(os.path.join(directory, name), (past, past))
+        os.utime(directory, (past, past))
+
+
+def test_directory_scanner_finds_images_recursively(tmp_path):
+    expected = {_write(str(tmp_path / "a.jpg")), _write(str(tmp_path / "sub" / "deep" / "b.PNG"))}
+    _write(str(tmp_path / "notes.txt"))
+    directory_scanner = DirectoryScanner(str(tmp_path), workers=2, batch_size=1)
+    directory_scanner.start()
+    found = {path for batch in directory_scanner.batches() for path in batch}
+    assert found == expected
+    assert directory_scanner.dir_count == 3
+
+
+def test_watcher_reports_new_files_once_stable(tmp_path):
+    existing = _write(str(tmp_path / "old.jpg"))
+    watcher = FolderWatcher(str(tmp_path))
+    watcher.mark_seen([existing])
+    assert not watcher.poll()
+
+    new_file = _write(str(tmp_path / "sub" / "new.jpg"))
+    # 第一次发现时记录状态，下一次轮询状态不变才视为写入完成
+    assert not watcher.poll()
+    assert watcher.poll() == [new_file]
+    assert not watcher.poll()
+
+
+def test_watcher_waits_for_growing_file(tmp_path):
+    watcher = FolderWatcher(str(tmp_path))
+    watcher.poll()
+    path = _write(str(tmp_path / "copying.jpg"), b"a")
+    watcher.poll()
+    with open(path, 'ab') as f:
+        f.write(b"more")
+    assert not watcher.poll()
+    assert watcher.poll() == [path]
+
+
+def test_watcher_skips_unchanged_directories(tmp_path, monkeypatch):
+    for i in range(3):
+        _write(str(tmp_path / f"dir{i}" / "img.jpg"))
+    _age_tree(str(tmp_path))
+    watcher = FolderWatcher(str(tmp_path))
+    watcher.mark_seen(os.path.join(str(tmp_path), f"dir{i}", "img.jpg") for i in range(3))
+    assert not watcher.poll()
+
+    scanned = []
+    original_scandir = os.scandir
+
+    def counting_scandir(path):
+        scanned.append(path)
+        return original_scandir(path)
+
+    monkeypatch.setattr(scanner.os, 'scandir', counting_scandir)
+    assert not watcher.poll()
+    assert not scanned
+
+    new_file = _write(str(tmp_path / "dir1" / "new.jpg"))
+    watcher.poll()
+    assert scanned == [str(tmp_path / "dir1")]
+    assert watcher.poll() == [new_file]
+
+
+def test_watcher_treats_replaced_file_as_new(tmp_path):
+    path = _write(str(tmp_path / "a.jpg"))
+    watcher = FolderWatcher(str(tmp_path))
+    watcher.mark_seen([path])
+    watcher.poll()
+    os.remove(path)
+    watcher.poll()
+    _write(path, b"replacement")
+    watcher.poll()
+    assert watcher.poll() == [path]
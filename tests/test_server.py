@@ -0,0 +1,131 @@
+"""railwayocr.server 本地识别服务测试"""
+
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from clients.base_client import REQUEST_STATUS_ERROR, REQUEST_STATUS_OK
+from railwayocr.server import RecognitionService, ServiceOverloaded, _Job, create_server
+
+
+class _FakeClient:
+    """按图像字节返回识别结果的本地客户端"""
+
+    client_type = 'local'
+
+    def __init__(self, batch_limit=None, gate=None):
+        self.batch_limit = batch_limit
+        self.gate = gate
+        self.recognized = []
+        self._status = REQUEST_STATUS_OK
+
+    def set_request_status(self, status):
+        self._status = status
+
+    def get_request_status(self):
+        return self._status
+
+    def recognize(self, source, is_url=False):  # pylint: disable=unused-argument
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.recognized.append(source)
+        return source.decode()
+
+    def recognize_batch(self, sources):
+        results = [(self.recognize(source), REQUEST_STATUS_OK) for source in sources]
+        return results[:self.batch_limit] if self.batch_limit is not None else results
+
+
+def _wait_idle(service, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while service.pending and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return service.pending
+
+
+def test_short_batch_result_finishes_every_job():
+    service = RecognitionService(_FakeClient(batch_limit=2), max_batch=4, max_wait=0.2)
+    service.start()
+    try:
+        jobs = [_Job(f"A{i}".encode()) for i in range(4)]
+        service.submit(jobs)
+        for job in jobs:
+            assert job.done.wait(5)
+        assert [job.result for job in jobs] == ["A0", "A1", None, None]
+        assert [job.status for job in jobs[2:]] == [REQUEST_STATUS_ERROR] * 2
+        assert service.pending == 0
+    finally:
+        service.stop()
+
+
+def test_abandoned_jobs_are_skipped_and_release_capacity():
+    gate = threading.Event()
+    client = _FakeClient(gate=gate)
+    service = RecognitionService(client, max_batch=1, max_pending=3)
+    service.start()
+    try:
+        busy = _Job(b"busy")
+        service.submit([busy])
+        abandoned = [_Job(b"late1"), _Job(b"late2")]
+        service.submit(abandoned)
+        with pytest.raises(ServiceOverloaded):
+            service.submit([_Job(b"extra")])
+
+        service.abandon(abandoned)
+        gate.set()
+        assert _wait_idle(service) == 0
+        assert client.recognized == [b"busy"]
+        assert all(job.done.is_set() and job.result is None for job in abandoned)
+    finally:
+        service.stop()
+
+
+def test_http_recognize_and_overload():
+    gate = threading.Event()
+    service = RecognitionService(_FakeClient(gate=gate), max_batch=1, max_pending=1)
+    service.start()
+    server = create_server(service, port=0, request_timeout=0.3)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    def post(path, body, content_type="application/octet-stream"):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.request("POST", path, body=body, headers={"Content-Type": content_type})
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+        connection.close()
+        return response.status, payload
+
+    try:
+        # 识别被阻塞，请求超时返回504，排队名额在识别结束后释放
+        assert post("/recognize", b"slow")[0] == 504
+        gate.set()
+        assert _wait_idle(service) == 0
+
+        status, payload = post("/recognize", b"K1234")
+        assert status == 200 and payload["result"] == "K1234" and payload["success"]
+
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.putrequest("POST", "/recognize")
+        connection.putheader("Content-Length", "abc")
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400 and "Content-Length" in json.loads(response.read())["error"]
+        connection.close()
+
+        gate.clear()
+        blocked = threading.Thread(target=post, args=("/recognize", b"wait"))
+        blocked.start()
+        while service.pending == 0:
+            time.sleep(0.01)
+        assert post("/recognize", b"extra")[0] == 503
+        gate.set()
+        blocked.join()
+        assert _wait_idle(service) == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
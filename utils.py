@@ -6,7 +6,7 @@ import logging
 from datetime import datetime
 from functools import lru_cache, wraps
 
-from PyQt6.QtWidgets import QMessageBox
+from log_writer import AsyncLogWriter
 
 MODE_LOCAL = 0
 MODE_PADDLE = 1
@@ -14,9 +14,15 @@ MODE_BAIDU = 2
 MODE_ALI = 3
 
 MAIN_WINDOW = None
+# 无界面运行（命令行）时的日志输出函数，参数为(level, message)
+LOG_SINK = None
 LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_internal', 'log')
 MAX_LINES = 3000
-_LOG_FILE_HANDLE = None
+# 界面日志总线（log_bus.LogBus），由主窗口创建
+LOG_BUS = None
+_LOG_WRITER = AsyncLogWriter(LOG_PATH)
+# 文件日志的最低级别，第一次写日志时从配置中读取
+_LOG_LEVEL = None
 
 
 def exception_handler(max_retries=1, retry_delay=1.0, log_level="ERROR"):
@@ -92,60 +98,29 @@ def _init_log_system():
 _init_log_system()
 
 
-def _get_log_file_handle():
-    """获取日志文件句柄
-
-    若句柄未初始化或已关闭，则重新打开日志文件
-    返回日志文件句柄，失败时返回None
-    """
-    global _LOG_FILE_HANDLE
-    if _LOG_FILE_HANDLE is None or _LOG_FILE_HANDLE.closed:
-        try:
-            # pylint: disable=R1732
-            _LOG_FILE_HANDLE = open(LOG_PATH, 'a', encoding='utf-8')
-        except (IOError, OSError) as e:
-            return None
-    return None
-
-
 def close_log_file():
-    """关闭日志文件句柄
+    """关闭日志文件
 
-    安全关闭当前打开的日志文件，释放资源
+    等待队列中的日志写入文件后停止写入线程
     """
-    global _LOG_FILE_HANDLE
-    if _LOG_FILE_HANDLE and not _LOG_FILE_HANDLE.closed:
-        try:
-            _LOG_FILE_HANDLE.close()
-            _LOG_FILE_HANDLE = None
+    _LOG_WRITER.close()
 
-        except (OSError, IOError) as e:
-            log_print(f"[ERROR] 关闭日志文件失败: {str(e)}", "ERROR")
 
-
-# 添加日志计数器，用于控制flush频率
-_LOG_COUNTER = 0
-_LOG_FLUSH_INTERVAL = 10  # 每10条日志flush一次
+def reload_log_settings():
+    """重新读取日志级别和轮转设置，配置保存后调用"""
+    global _LOG_LEVEL
+    config = load_config()
+    _LOG_LEVEL = getattr(logging, str(config.get("LOG_LEVEL", "INFO")).upper(), logging.INFO)
+    _LOG_WRITER.configure(config.get("LOG_ROTATION_SIZE", 5 * 1024 * 1024), config.get("LOG_BACKUP_COUNT", 3))
 
 
 def _write_to_log_file(message):
-    """统一的日志写入函数
+    """统一的日志写入函数，日志交给后台线程批量写入
     
     Args:
         message (str): 日志消息
     """
-    global _LOG_COUNTER
-    
-    try:
-        log_handle = _get_log_file_handle()
-        if log_handle:
-            log_handle.write(f"{message}\n")
-            _LOG_COUNTER += 1
-            # 优化：每10条日志flush一次，降低磁盘IO
-            if _LOG_COUNTER % _LOG_FLUSH_INTERVAL == 0:
-                log_handle.flush()
-    except (OSError, IOError):
-        pass
+    _LOG_WRITER.write(message)
 
 
 def log_print(message, level='INFO'):
@@ -155,49 +130,24 @@ def log_print(message, level='INFO'):
         message (str): 日志消息
         level (str): 日志级别，可选值：DEBUG, INFO, WARNING, ERROR, CRITICAL
     """
-    global _LOG_COUNTER
-    
-    # 根据配置过滤日志级别
-    config = load_config()
-    config_level = getattr(logging, config.get("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    # 根据配置过滤日志级别，配置只在第一次调用和配置更新时读取
+    if _LOG_LEVEL is None:
+        reload_log_settings()
     message_level = getattr(logging, level.upper(), logging.INFO)
-    
-    if message_level < config_level:
+    if message_level < _LOG_LEVEL:
         return  # 低于配置级别的日志不输出
-    
+
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted_log = f"[{timestamp}] [{level}] {message}"
-    
-    # 使用统一的日志处理机制
-    _write_to_log_file(formatted_log)
-    try:
-        log_rotation_size = config.get("LOG_ROTATION_SIZE", 5 * 1024 * 1024)
-        log_backup_count = config.get("LOG_BACKUP_COUNT", 3)
-
-        if os.path.exists(LOG_PATH) and os.path.getsize(LOG_PATH) > log_rotation_size:
-            for i in range(log_backup_count - 1, 0, -1):
-                backup_path = f"{LOG_PATH}.{i}"
-                prev_backup_path = f"{LOG_PATH}.{i - 1}"
-                if os.path.exists(prev_backup_path):
-                    if os.path.exists(backup_path):
-                        os.remove(backup_path)
-                    os.rename(prev_backup_path, backup_path)
-            backup_path = f"{LOG_PATH}.1"
-            if os.path.exists(backup_path):
-                os.remove(backup_path)
-            os.rename(LOG_PATH, backup_path)
-            with open(LOG_PATH, 'w', encoding='utf-8') as f:
-                f.write(f"# Log file created at {datetime.now()}\n")
+    _write_to_log_file(f"[{timestamp}] [{level}] {message}")
+
 
-        log_handle = _get_log_file_handle()
-        if log_handle:
-            log_handle.write(f"{formatted_log}\n")
-            _LOG_COUNTER += 1
-            # 优化：每10条日志flush一次，降低磁盘IO
-            if _LOG_COUNTER % _LOG_FLUSH_INTERVAL == 0:
-                log_handle.flush()
-    except (OSError, IOError) as e:
-        pass
+def _show_config_error(message):
+    """显示配置错误，只有界面已加载时才弹出对话框，命令行运行时写入标准错误输出"""
+    qt_widgets = sys.modules.get("PyQt6.QtWidgets")
+    if qt_widgets is not None and qt_widgets.QApplication.instance() is not None:
+        qt_widgets.QMessageBox.critical(None, "配置错误", message)
+    else:
+        sys.stderr.write(f"配置错误: {message}\n")
 
 
 @lru_cache(maxsize=1)
@@ -224,7 +174,7 @@ def load_config():
                 with open(file_path, 'w', encoding='utf-8') as f:
                     json.dump(default_config, f, ensure_ascii=False, indent=2)
             except IOError as e:
-                QMessageBox.critical(None, "配置错误", f"创建默认配置文件失败: {str(e)}")
+                _show_config_error(f"创建默认配置文件失败: {str(e)}")
             return default_config
 
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -250,5 +200,16 @@ def log(level, message):
     }
     color = colors.get(level, "#000000")
     formatted_message = f'<span style="color:{color}">[{timestamp}] [{level}] {message}</span>'
+    if MAIN_WINDOW is None:
+        # 没有界面时（例如本地OCR子进程或命令行）写入日志文件，命令行另外输出到LOG_SINK
+        log_print(message, level)
+        if LOG_SINK is not None:
+            LOG_SINK(level, message)
+        return
+    if LOG_BUS is not None:
+        # 界面日志经日志总线批量追加，工作线程不直接操作控件；超出速率上限不显示的日志写入日志文件
+        if not LOG_BUS.post(level, formatted_message):
+            log_print(message, level)
+        return
     MAIN_WINDOW.textEdit_log.append(formatted_message)
     MAIN_WINDOW.textEdit_log.ensureCursorVisible()